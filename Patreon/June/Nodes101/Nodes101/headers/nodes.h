@@ -24,6 +24,9 @@ static const char* NODE_TRIG_SIN_NAME = "trig_sin";
 static const int NODE_TRIG_COS_ID = 0x0012a23e;
 static const char* NODE_TRIG_COS_NAME = "trig_cos";
 
+static const int NODE_TRIG_ID = 0x0012a239;
+static const char* NODE_TRIG_NAME = "trig_pedal";
+
 
 /*      DAG      */
 static const int MATRIX_STATICHRC_ID = 0x0012a23d;
@@ -80,6 +83,30 @@ public:
 };
 
 
+/*      sin, cos and pedal    */
+class TrigNode : public MPxNode {
+public:
+    TrigNode();
+    virtual ~TrigNode();
+
+    virtual MStatus compute(const MPlug& plug, MDataBlock& datablock);
+
+    static void* creator();
+    static MStatus initialize();
+
+    static MTypeId id;
+    static MString name;
+
+    static MObject operand_smob;
+    static MObject length_smob;
+
+    static MObject sin_smob;
+    static MObject cos_smob;
+    static MObject offset_y_smob;
+    static MObject offset_z_smob;
+};
+
+
 
 /*  +---------------------+
     |       DAG NODES     |
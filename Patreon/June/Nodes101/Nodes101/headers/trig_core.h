@@ -0,0 +1,32 @@
+#ifndef TRIG_CORE_GUARD
+#define TRIG_CORE_GUARD
+
+#include <cmath>
+
+/*  Host independent maths for the trig nodes.
+    Nothing in here knows about Maya, so it can be compiled,
+      tested and benchmarked on its own.                        */
+
+struct TrigResult {
+    double sin;
+    double cos;
+    double offset_y;
+    double offset_z;
+};
+
+
+/*  sin and cos of the angle, and the pedal offset of the FKIK switch (s00_d014):
+      a point at length along the pedal, rotated by the angle,
+      relative to where it sits at rest
+        y = cos * length - length
+        z = sin * length                                        */
+inline TrigResult trigFromRadians(double radians, double length) {
+    TrigResult result;
+    result.sin = std::sin(radians);
+    result.cos = std::cos(radians);
+    result.offset_y = result.cos * length - length;
+    result.offset_z = result.sin * length;
+    return result;
+}
+
+#endif // !TRIG_CORE_GUARD
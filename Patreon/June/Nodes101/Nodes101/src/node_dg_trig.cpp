@@ -0,0 +1,116 @@
+#include "../headers/nodes.h"
+#include "../headers/trig_core.h"
+
+
+MTypeId TrigNode::id = NODE_TRIG_ID;
+MString TrigNode::name = NODE_TRIG_NAME;
+MObject TrigNode::operand_smob;
+MObject TrigNode::length_smob;
+MObject TrigNode::sin_smob;
+MObject TrigNode::cos_smob;
+MObject TrigNode::offset_y_smob;
+MObject TrigNode::offset_z_smob;
+
+
+TrigNode::TrigNode(){}
+
+TrigNode::~TrigNode(){}
+
+void* TrigNode::creator() {
+    return new TrigNode();
+}
+
+
+MStatus TrigNode::initialize() {
+    MStatus status;
+    MFnUnitAttribute fn_unit;
+
+    operand_smob = fn_unit.create("operand", "operand", MFnUnitAttribute::kAngle, 0.0, &status);
+    fn_unit.setStorable(true);
+    fn_unit.setWritable(true);
+    fn_unit.setKeyable(true);
+
+    MFnNumericAttribute fn_numeric;
+
+    length_smob = fn_numeric.create("length", "length", MFnNumericData::kDouble, 1.0, &status);
+    fn_numeric.setStorable(true);
+    fn_numeric.setWritable(true);
+    fn_numeric.setKeyable(true);
+
+    sin_smob = fn_numeric.create("sin", "sin", MFnNumericData::kDouble, 0.0, &status);
+    fn_numeric.setStorable(false);
+    fn_numeric.setWritable(false);
+    fn_numeric.setKeyable(false);
+
+    cos_smob = fn_numeric.create("cos", "cos", MFnNumericData::kDouble, 1.0, &status);
+    fn_numeric.setStorable(false);
+    fn_numeric.setWritable(false);
+    fn_numeric.setKeyable(false);
+
+    offset_y_smob = fn_numeric.create("offsetY", "offsetY", MFnNumericData::kDouble, 0.0, &status);
+    fn_numeric.setStorable(false);
+    fn_numeric.setWritable(false);
+    fn_numeric.setKeyable(false);
+
+    offset_z_smob = fn_numeric.create("offsetZ", "offsetZ", MFnNumericData::kDouble, 0.0, &status);
+    fn_numeric.setStorable(false);
+    fn_numeric.setWritable(false);
+    fn_numeric.setKeyable(false);
+
+    addAttribute(operand_smob);
+    addAttribute(length_smob);
+    addAttribute(sin_smob);
+    addAttribute(cos_smob);
+    addAttribute(offset_y_smob);
+    addAttribute(offset_z_smob);
+
+    attributeAffects(operand_smob, sin_smob);
+    attributeAffects(operand_smob, cos_smob);
+    attributeAffects(operand_smob, offset_y_smob);
+    attributeAffects(operand_smob, offset_z_smob);
+
+    attributeAffects(length_smob, offset_y_smob);
+    attributeAffects(length_smob, offset_z_smob);
+
+    return status;
+}
+
+
+/*  All outputs come out of the same sin and cos,
+      so whichever one is asked for all of them are computed and cleaned
+      in one go, and the others won't trigger a compute of their own. */
+MStatus TrigNode::compute(const MPlug& plug, MDataBlock& datablock) {
+    if( plug == sin_smob || plug == cos_smob ||
+        plug == offset_y_smob || plug == offset_z_smob ) {
+        MStatus status;
+
+        MDataHandle operand_hdl = datablock.inputValue(operand_smob, &status);
+        MAngle operand = operand_hdl.asAngle();
+
+        MDataHandle length_hdl = datablock.inputValue(length_smob, &status);
+        double length = length_hdl.asDouble();
+
+        TrigResult result = trigFromRadians(operand.asRadians(), length);
+
+        MDataHandle sin_hdl = datablock.outputValue(sin_smob, &status);
+        sin_hdl.setDouble(result.sin);
+        sin_hdl.setClean();
+
+        MDataHandle cos_hdl = datablock.outputValue(cos_smob, &status);
+        cos_hdl.setDouble(result.cos);
+        cos_hdl.setClean();
+
+        MDataHandle offset_y_hdl = datablock.outputValue(offset_y_smob, &status);
+        offset_y_hdl.setDouble(result.offset_y);
+        offset_y_hdl.setClean();
+
+        MDataHandle offset_z_hdl = datablock.outputValue(offset_z_smob, &status);
+        offset_z_hdl.setDouble(result.offset_z);
+        offset_z_hdl.setClean();
+
+        return status;
+    }
+    else {
+        return MStatus::kUnknownParameter;
+    }
+}
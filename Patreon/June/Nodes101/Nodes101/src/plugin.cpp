@@ -19,6 +19,10 @@ MStatus initializePlugin(MObject pluginMob) {
                              &CosNode::creator, &CosNode::initialize,
                              MPxNode::kDependNode, nullptr);
 
+    status = fn.registerNode(TrigNode::name, TrigNode::id,
+                             &TrigNode::creator, &TrigNode::initialize,
+                             MPxNode::kDependNode, nullptr);
+
     /* DAG NODES */
     status = fn.registerTransform(StaticHrc::name, StaticHrc::id,
                                   &StaticHrc::creator, &StaticHrc::initialize,
@@ -40,6 +44,7 @@ MStatus uninitializePlugin(MObject pluginMob) {
 
     fn.deregisterNode(SinNode::id);
     fn.deregisterNode(CosNode::id);
+    fn.deregisterNode(TrigNode::id);
 
     fn.deregisterNode(StaticHrc::id);
     fn.deregisterNode(AimTransform::id);
@@ -0,0 +1,201 @@
+"""
+Timing and invocation counters for callbacks and commands.
+
+When enabled, callbacks wrapped through the profiler and command methods
+  instrumented through it record how many times they ran, how long they took
+  in total, on average and at worst, and how often they exited early.
+An early exit is counted when the wrapped function returns EARLY_EXIT,
+  which callbacks can return from their cheap rejection branches, e.g. the
+  msg != 2056 check, Maya ignores what callbacks return anyway.
+
+When disabled, wrap() hands back the function it was given untouched and
+  instrumentMethod() does nothing, so there is no cost at all.
+Enable it before installing the callbacks, or loading the plugin, you want to measure.
+
+Much like the callback registry the profiler survives this module being reloaded.
+The directory this file is in needs to be on sys.path for the scripts to import it.
+"""
+
+import json
+from timeit import default_timer
+
+
+# Returned by a callback to signal it decided there was nothing to do
+EARLY_EXIT = 'EARLY_EXIT'
+
+
+class CallStats(object):
+    """
+    Counters for a single callback or command
+    """
+    __slots__ = ('name', 'count', 'earlyExitCount', 'totalTime', 'maxTime')
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.earlyExitCount = 0
+        self.totalTime = 0.0
+        self.maxTime = 0.0
+
+
+    @property
+    def meanTime(self):
+        return self.totalTime / self.count if self.count else 0.0
+
+
+    @property
+    def earlyExitRate(self):
+        return float(self.earlyExitCount) / self.count if self.count else 0.0
+
+
+    def asDict(self):
+        """
+        :return: [dict] all counters by name, times are in seconds
+        """
+        return {'name': self.name,
+                'count': self.count,
+                'totalTime': self.totalTime,
+                'meanTime': self.meanTime,
+                'maxTime': self.maxTime,
+                'earlyExitRate': self.earlyExitRate,
+                }
+
+
+class CallbackProfiler(object):
+    TABLE_HEADER = ('name', 'count', 'total ms', 'mean ms', 'max ms', 'early exit %')
+
+    def __init__(self):
+        self.enabled = False
+        self.__stats = {} # name -> CallStats
+        self.__instrumented = [] # (class, method name, original function, statistics name)
+
+
+    def wrap(self, name, func):
+        """
+        :param name: [str] the name the statistics are recorded under
+        :param func: [callable] the callback to measure
+        :return: [callable] a measuring wrapper around func if enabled, func itself otherwise
+        """
+        if not self.enabled:
+            return func
+
+        stats = self.__stats.setdefault(name, CallStats(name))
+        profiler = self
+
+        def profiledCall(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+
+            start = default_timer()
+            try:
+                ret = func(*args, **kwargs)
+            finally:
+                elapsed = default_timer() - start
+                stats.count += 1
+                stats.totalTime += elapsed
+                if elapsed > stats.maxTime:
+                    stats.maxTime = elapsed
+
+            if ret is EARLY_EXIT:
+                stats.earlyExitCount += 1
+            return ret
+
+        profiledCall.__name__ = getattr(func, '__name__', name)
+        profiledCall.__doc__ = getattr(func, '__doc__', None)
+        return profiledCall
+
+
+    def instrumentMethod(self, cls, methodName, name=None):
+        """
+        Replaces a method on a class, e.g. an MPxCommand's doIt, with a measuring wrapper
+        :param cls: [type] the class owning the method
+        :param methodName: [str] name of the method to instrument
+        :param name: [str|None] the name the statistics are recorded under,
+                                defaults to ClassName.methodName
+        :return: [bool] True if the method was instrumented
+        """
+        if not self.enabled:
+            return False
+
+        if any(c is cls and m == methodName for c, m, _, _ in self.__instrumented):
+            return False
+        original = cls.__dict__[methodName]
+
+        name = name or '{}.{}'.format(cls.__name__, methodName)
+        setattr(cls, methodName, self.wrap(name, original))
+        self.__instrumented.append((cls, methodName, original, name))
+        return True
+
+
+    def restoreMethods(self, names=None):
+        """
+        Puts back methods instrumentMethod() replaced, e.g. a plugin's own on unloading,
+          without touching what other tools instrumented
+        :param names: [iterable(str)|None] statistics names of the methods to restore, all if None
+        :return: [int] number of methods restored
+        """
+        names = None if names is None else set(names)
+        kept = []
+        for entry in self.__instrumented:
+            cls, methodName, original, name = entry
+            if names is not None and name not in names:
+                kept.append(entry)
+                continue
+            setattr(cls, methodName, original)
+        restoredCount = len(self.__instrumented) - len(kept)
+        self.__instrumented = kept
+        return restoredCount
+
+
+    def reset(self):
+        """
+        Zeroes all counters, what's wrapped stays wrapped
+        :return: [None]
+        """
+        for k in self.__stats:
+            self.__stats[k].__init__(k)
+
+
+    def table(self):
+        """
+        :return: [list(CallStats)] statistics for everything measured, most expensive first
+        """
+        return sorted(self.__stats.itervalues(), key=lambda stats: stats.totalTime, reverse=True)
+
+
+    def formatTable(self):
+        """
+        :return: [str] the table as a block of text fit for the script editor
+        """
+        rows = [self.TABLE_HEADER]
+        for stats in self.table():
+            rows.append((stats.name,
+                         str(stats.count),
+                         '{:.3f}'.format(stats.totalTime * 1000.0),
+                         '{:.3f}'.format(stats.meanTime * 1000.0),
+                         '{:.3f}'.format(stats.maxTime * 1000.0),
+                         '{:.1f}'.format(stats.earlyExitRate * 100.0)))
+
+        widths = [max(len(row[i]) for row in rows) for i in xrange(len(self.TABLE_HEADER))]
+        return '\n'.join('  '.join(cell.ljust(widths[i]) for i, cell in enumerate(row))
+                         for row in rows)
+
+
+    def dump(self, filePath):
+        """
+        Writes the table out as JSON
+        :param filePath: [str] where to write to
+        :return: [int] number of entries written
+        """
+        entries = [stats.asDict() for stats in self.table()]
+        with open(filePath, 'w') as f:
+            json.dump(entries, f, indent=2)
+        return len(entries)
+
+
+# Re-running or reloading this module must not lose what was measured,
+#  so the profiler is only created the first time around
+try:
+    PROFILER
+except NameError:
+    PROFILER = CallbackProfiler()
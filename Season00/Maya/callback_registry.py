@@ -0,0 +1,206 @@
+"""
+A registry keeping track of the node callbacks our scripts install.
+
+Removing callbacks by asking Maya for every callback on a node with
+  MMessage.nodeCallbacks() is indiscriminate, it will happily remove callbacks
+  other tools installed on the same node, and it needs to scan each node every time.
+The registry instead records the IDs it's been handed per node and per feature
+  (a feature is just a name for what the callback does, e.g. 'FKIK_switch'),
+  so it can install and remove in bulk only what belongs to that feature.
+
+Nodes deleted for good take their callbacks with them, their entries are dropped
+  the next time the registry comes across them or is asked for counts.
+
+The registry lives in this module, and the module is written so that reloading it
+  doesn't lose track of what was installed before the reload.
+The directory this file is in needs to be on sys.path for the scripts to import it.
+"""
+
+from maya.api import _OpenMaya_py2 as om2
+
+
+class CallbackRegistry(object):
+    def __init__(self):
+        self.__nodes = {} # node hashCode -> list of [MObjectHandle, {feature: [callback ids]}]
+        self.__sceneCallbackIDs = []
+
+
+    def __entryForNode(self, node_mob, create=False):
+        mobha = om2.MObjectHandle(node_mob)
+        bucket = self.__nodes.get(mobha.hashCode())
+        if bucket is not None:
+            bucket[:] = [eachEntry for eachEntry in bucket if eachEntry[0].isValid()]
+            if not bucket:
+                del self.__nodes[mobha.hashCode()]
+                bucket = None
+        if bucket is None:
+            if not create:
+                return None
+            bucket = self.__nodes[mobha.hashCode()] = []
+
+        for eachEntry in bucket:
+            if eachEntry[0] == mobha:
+                return eachEntry
+
+        if not create:
+            return None
+        entry = [mobha, {}]
+        bucket.append(entry)
+        return entry
+
+
+    def __ensureSceneCallbacks(self):
+        # callbacks don't survive the scene they were installed in,
+        #  so we forget about them when a scene is about to go
+        if self.__sceneCallbackIDs:
+            return
+        for eachMsg in (om2.MSceneMessage.kBeforeNew, om2.MSceneMessage.kBeforeOpen):
+            self.__sceneCallbackIDs.append(om2.MSceneMessage.addCallback(eachMsg, self.__onSceneChange))
+
+
+    def __onSceneChange(self, clientData):
+        self.removeAll()
+
+
+    def add(self, node_mob, feature, callbackIDs):
+        """
+        Records callbacks installed by someone else as belonging to a node and a feature
+        :param node_mob: [MObject] the node the callbacks are installed on
+        :param feature: [str] the name of the feature the callbacks belong to
+        :param callbackIDs: [int|list(int)] one or more callback IDs
+        :return: [int] number of callbacks recorded
+        """
+        if not isinstance(callbackIDs, (list, tuple)):
+            callbackIDs = [callbackIDs]
+
+        self.__ensureSceneCallbacks()
+        entry = self.__entryForNode(node_mob, create=True)
+        entry[1].setdefault(feature, []).extend(callbackIDs)
+        return len(callbackIDs)
+
+
+    def installOnNodes(self, nodes, feature, installer):
+        """
+        Installs and records callbacks for a feature on any number of nodes in one call
+        :param nodes: [iterable(MObject)] the nodes to install the feature on
+        :param feature: [str] the name of the feature the callbacks belong to
+        :param installer: [callable] takes a node MObject and returns one or more callback IDs,
+                                     or None if nothing was installed on that node
+        :return: [int] number of callbacks installed
+        """
+        cbCount = 0
+        for eachMob in nodes:
+            callbackIDs = installer(eachMob)
+            if callbackIDs is None:
+                continue
+            cbCount += self.add(eachMob, feature, callbackIDs)
+        return cbCount
+
+
+    def removeFromNodes(self, nodes, feature=None):
+        """
+        Removes the callbacks this registry knows about from any number of nodes,
+          callbacks installed by anything else are left alone
+        :param nodes: [iterable(MObject)] the nodes to remove callbacks from
+        :param feature: [str|None] only remove the callbacks for this feature, all if None
+        :return: [int] number of callbacks removed
+        """
+        toRemove = []
+        for eachMob in nodes:
+            entry = self.__entryForNode(eachMob)
+            if entry is None:
+                continue
+            toRemove.extend(self.__popFeatures(entry, feature))
+
+        self.__pruneEmpty()
+        return self.__removeIDs(toRemove)
+
+
+    def removeFeature(self, feature):
+        """
+        Removes all callbacks for a feature wherever they were installed
+        :param feature: [str] the name of the feature the callbacks belong to
+        :return: [int] number of callbacks removed
+        """
+        toRemove = []
+        for eachBucket in self.__nodes.itervalues():
+            for eachEntry in eachBucket:
+                if eachEntry[0].isValid():
+                    toRemove.extend(self.__popFeatures(eachEntry, feature))
+
+        self.__pruneEmpty()
+        return self.__removeIDs(toRemove)
+
+
+    def removeAll(self):
+        """
+        Removes every callback this registry installed or was told about
+        :return: [int] number of callbacks removed
+        """
+        toRemove = []
+        for eachBucket in self.__nodes.itervalues():
+            for eachEntry in eachBucket:
+                toRemove.extend(self.__popFeatures(eachEntry, None))
+
+        self.__nodes.clear()
+        return self.__removeIDs(toRemove)
+
+
+    def counts(self):
+        """
+        :return: [dict] feature names in keys, (node count, callback count) in values
+        """
+        self.__pruneEmpty()
+        countsDict = {}
+        for eachBucket in self.__nodes.itervalues():
+            for eachEntry in eachBucket:
+                for feature, callbackIDs in eachEntry[1].iteritems():
+                    nodeCount, cbCount = countsDict.get(feature, (0, 0))
+                    countsDict[feature] = (nodeCount + 1, cbCount + len(callbackIDs))
+        return countsDict
+
+
+    @staticmethod
+    def __popFeatures(entry, feature):
+        features = entry[1]
+        if feature is None:
+            callbackIDs = [cbID for eachIDs in features.itervalues() for cbID in eachIDs]
+            features.clear()
+            return callbackIDs
+        return features.pop(feature, [])
+
+
+    def __pruneEmpty(self):
+        # entries without callbacks left, or whose node is gone along with its callbacks
+        for k in list(self.__nodes.iterkeys()):
+            bucket = [eachEntry for eachEntry in self.__nodes[k] if eachEntry[1] and eachEntry[0].isValid()]
+            if bucket:
+                self.__nodes[k] = bucket
+            else:
+                del self.__nodes[k]
+
+
+    @staticmethod
+    def __removeIDs(callbackIDs):
+        if not callbackIDs:
+            return 0
+
+        try:
+            om2.MMessage.removeCallbacks(callbackIDs)
+        except RuntimeError:
+            # some of the nodes might have been deleted and taken their callbacks with them,
+            #  in which case we fall back to removing one by one and skip the stale ones
+            for eachID in callbackIDs:
+                try:
+                    om2.MMessage.removeCallback(eachID)
+                except RuntimeError:
+                    pass
+        return len(callbackIDs)
+
+
+# Re-running or reloading this module must not lose track of what's installed,
+#  so the registry is only created the first time around
+try:
+    REGISTRY
+except NameError:
+    REGISTRY = CallbackRegistry()
@@ -0,0 +1,113 @@
+"""
+A scheduler to coalesce the work attribute changed callbacks do.
+
+During an interactive drag a node can fire its attribute changed callbacks
+  many times before the viewport even gets to redraw, and most of those
+  are superseded by the next one before anybody gets to see the result.
+Callbacks can hand their work to the scheduler instead of doing it on the spot:
+  only the latest request per node and handler is kept, and all pending requests
+  are flushed once, when Maya is next idle.
+Callbacks that need their work done synchronously can still ask for immediate delivery,
+  so each one chooses per call.
+
+Much like the callback registry the scheduler survives this module being reloaded.
+The directory this file is in needs to be on sys.path for the scripts to import it.
+"""
+
+import traceback
+
+from maya.api import _OpenMaya_py2 as om2
+from maya import utils as m_utils
+
+
+class CoalescingScheduler(object):
+    def __init__(self):
+        # node hashCode -> list of [node MObjectHandle, handler, args],
+        #   hash codes can collide so the handles in a bucket are compared to tell nodes apart
+        self.__pending = {}
+        self.__order = [] # the same entries, in the order they were first requested since the last flush
+        self.__isFlushScheduled = False
+
+
+    @property
+    def pendingCount(self):
+        """
+        :return: [int] number of requests waiting for the next flush
+        """
+        return len(self.__order)
+
+
+    def deliver(self, node_mob, handler, args=(), coalesce=True):
+        """
+        Runs a callback's work, either right away or on the next idle flush
+        :param node_mob: [MObject] the node the work relates to, requests are coalesced per node
+        :param handler: [callable] the function doing the work
+        :param args: [tuple] arguments for the handler, a later request replaces them
+        :param coalesce: [bool] if False the handler runs immediately and nothing is deferred
+        :return: [None]
+        """
+        if not coalesce:
+            handler(*args)
+            return
+
+        mobha = om2.MObjectHandle(node_mob)
+        bucket = self.__pending.setdefault(mobha.hashCode(), [])
+        for entry in bucket:
+            if entry[1] == handler and entry[0] == mobha:
+                entry[2] = args
+                break
+        else:
+            entry = [mobha, handler, args]
+            bucket.append(entry)
+            self.__order.append(entry)
+
+        if not self.__isFlushScheduled:
+            self.__isFlushScheduled = True
+            m_utils.executeDeferred(self.flush)
+
+
+    def flush(self):
+        """
+        Runs every pending request once, in the order they first came in.
+        Requests made while flushing, e.g. by callbacks fired by the handlers' own edits,
+          are left for the following flush.
+        A handler raising is reported and doesn't stop the ones after it.
+        :return: [int] number of handlers that ran
+        """
+        order = self.__order
+        self.__pending = {}
+        self.__order = []
+        self.__isFlushScheduled = False
+
+        runCount = 0
+        for mobha, handler, args in order:
+            if not mobha.isValid():
+                # the node went away before we got to it, or is only kept around for undo
+                continue
+            try:
+                handler(*args)
+            except Exception:
+                om2.MGlobal.displayError('callback_scheduler: {} failed\n{}'.format(
+                                         getattr(handler, '__name__', handler), traceback.format_exc()))
+                continue
+            runCount += 1
+        return runCount
+
+
+    def discard(self):
+        """
+        Drops all pending requests without running them
+        :return: [int] number of requests dropped
+        """
+        droppedCount = len(self.__order)
+        self.__pending = {}
+        self.__order = []
+        return droppedCount
+
+
+# Re-running or reloading this module must not drop what's pending,
+#  so the scheduler is only created the first time around
+try:
+    SCHEDULER
+except NameError:
+    SCHEDULER = CoalescingScheduler()
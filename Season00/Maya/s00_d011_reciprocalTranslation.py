@@ -1,5 +1,9 @@
 from maya.api import _OpenMaya_py2 as om2 # helps autocompletion along in most IDEs
 
+from callback_registry import REGISTRY
+from callback_scheduler import SCHEDULER
+from callback_profiler import PROFILER, EARLY_EXIT
+
 
 def iterSelection():
     """
@@ -11,17 +15,6 @@ def iterSelection():
         yield sel.getDependNode(i)
 
 
-def removeCallbacksFromNode(node_mob):
-    """
-    :param node_mob: [MObject] the node to remove all node callbacks from 
-    :return: [int] number of callbacks removed
-    """
-    cbs = om2.MMessage.nodeCallbacks(node_mob)
-    for eachCB in cbs:
-        om2.MMessage.removeCallback(eachCB)
-    len(cbs)
-
-
 def translationPlugsFromAnyPlug(plug):
     """
     :param plug: [MPlug] plug on a node to retrieve translation related plugs from
@@ -61,25 +54,143 @@ def almostEqual(a, b, rel_tol=1e-09, abs_tol=0.0):
     return abs(a-b) <= max(rel_tol * max(abs(a), abs(b)), abs_tol)
 
 
-def cb(msg, plug1, plug2, payload):
-    if msg != 2056: #check most common case first and return unless it's
-        return      # an attribute edit type of callback
+def markSeen(seen, mob):
+    """
+    :param seen: [dict] hashCode -> list of MObjectHandle, as built up by successive calls
+    :param mob: [MObject] node to mark
+    :return: [bool] True if the node wasn't in seen already
+    """
+    # hash codes can collide, so the handles in a bucket are compared to tell nodes apart
+    mobha = om2.MObjectHandle(mob)
+    bucket = seen.setdefault(mobha.hashCode(), [])
+    for eachHandle in bucket:
+        if eachHandle == mobha:
+            return False
+    bucket.append(mobha)
+    return True
 
-    srcTranslationPlugs = translationPlugsFromAnyPlug(plug1)
-    if not len(srcTranslationPlugs):
-        return
 
-    # trim out the first plug, the translate compound, and only work on the triplet xyz
-    values = [p.asFloat() for p in srcTranslationPlugs[1:4]]
+def translationGroupFromNode(node_mob):
+    """
+    Transitive closure of the message connections leaving a node, which is
+      every node a change would eventually reach if each one forwarded it to
+      its own message destinations.
+    Nodes without translation plugs end the walk along their branch.
+    :param node_mob: [MObject] node the group is seen from
+    :return: [tuple(tuple(MPlug))] xyz translation plugs of every other node in the group
+    """
+    seen = {}
+    markSeen(seen, node_mob)
+    toVisit = [node_mob]
+    groupPlugs = []
+
+    while toVisit:
+        mfn_dep = om2.MFnDependencyNode(toVisit.pop())
+        for eachDestPlug in msgConnectedPlugs(mfn_dep.findPlug('message', False)):
+            destMob = eachDestPlug.node()
+            if not markSeen(seen, destMob):
+                continue
 
-    for eachDestPlug in msgConnectedPlugs(plug1): # all receiving plugs
-        destTranslationPlugs = translationPlugsFromAnyPlug(eachDestPlug)[1:4]
-        for i, p in enumerate(destTranslationPlugs):
-            if almostEqual(p.asFloat(), values[i]):
+            destTranslationPlugs = translationPlugsFromAnyPlug(eachDestPlug)
+            if not destTranslationPlugs:
                 continue
-            p.setFloat(values[i])
 
+            groupPlugs.append(destTranslationPlugs[1:4])
+            toVisit.append(destMob)
+
+    return tuple(groupPlugs)
+
+
+# Writing into the group fires every member's own callback,
+#  which would then write back into the group. While we are the ones
+#  writing this is flipped on and all callbacks return immediately.
+propagationState = {'isPropagating': False}
+
+# Groups follow message connections anywhere down the line, not only on the node
+#  a group is seen from, so any message connection made or broken in the scene
+#  bumps the generation and each payload rebuilds its group the next time it's used.
+# Only created the first time around, so re-running can remove the previous callback.
+try:
+    groupState
+except NameError:
+    groupState = {'generation': 0, 'callbackID': None}
 
-for eachMob in iterSelection():
-    removeCallbacksFromNode(eachMob)
-    om2.MNodeMessage.addAttributeChangedCallback(eachMob, cb)
+
+def onConnectionChange(srcPlug, destPlug, made, clientData):
+    if srcPlug.partialName(useLongNames=True) == 'message':
+        groupState['generation'] += 1
+
+def propagate(payload):
+    """
+    Writes the translation of the node the payload was built for into every
+      other member of its group
+    :param payload: [dict] as bound to the callback by installCallback()
+    :return: [None]
+    """
+    # the payload holds the xyz triplet of this node and of the group,
+    #  the group is only resolved again if message connections changed since
+    if payload['generation'] != groupState['generation']:
+        payload['group'] = translationGroupFromNode(payload['node'].object())
+        payload['generation'] = groupState['generation']
+
+    values = [p.asFloat() for p in payload['source']]
+
+    propagationState['isPropagating'] = True
+    try:
+        for destTranslationPlugs in payload['group']: # every member once
+            for i, p in enumerate(destTranslationPlugs):
+                if almostEqual(p.asFloat(), values[i]):
+                    continue
+                p.setFloat(values[i])
+    finally:
+        propagationState['isPropagating'] = False
+
+
+def cb(msg, plug1, plug2, payload):
+    if msg != 2056: #check most common case first and return unless it's
+        return EARLY_EXIT # an attribute edit type of callback
+
+    if propagationState['isPropagating']:
+        return EARLY_EXIT
+
+    # propagate() reads the values when it runs, so when coalesced only
+    #  the latest state of the node is pushed to the group on the next idle
+    SCHEDULER.deliver(plug1.node(), propagate, (payload,), coalesce=payload['coalesce'])
+
+
+def installCallback(node_mob):
+    """
+    :param node_mob: [MObject] the node to install the callback on
+    :return: [int|None] the callback ID, None if the node has no translation to propagate
+    """
+    if not node_mob.hasFn(om2.MFn.kTransform):
+        return None
+
+    mfn_dep = om2.MFnDependencyNode(node_mob)
+    payload = {
+        # trim out the first plug, the translate compound, and only work on the triplet xyz
+        'source': translationPlugsFromAnyPlug(mfn_dep.findPlug('message', False))[1:4],
+        'node': om2.MObjectHandle(node_mob),
+        'group': translationGroupFromNode(node_mob),
+        'generation': groupState['generation'],
+        'coalesce': COALESCE_DELIVERY,
+    }
+    return om2.MNodeMessage.addAttributeChangedCallback(node_mob, installedCb, payload)
+
+
+FEATURE_NAME = 'reciprocalTranslation'
+COALESCE_DELIVERY = True # False to propagate synchronously on every change
+
+# PROFILER.wrap() returns cb itself unless profiling was enabled beforehand
+installedCb = PROFILER.wrap('{}.cb'.format(FEATURE_NAME), cb)
+
+if groupState['callbackID'] is not None:
+    try:
+        om2.MMessage.removeCallback(groupState['callbackID'])
+    except RuntimeError:
+        pass
+groupState['callbackID'] = om2.MDGMessage.addConnectionCallback(onConnectionChange)
+
+selectedMobs = list(iterSelection())
+REGISTRY.removeFromNodes(selectedMobs, FEATURE_NAME)
+REGISTRY.installOnNodes(selectedMobs, FEATURE_NAME, installCallback)
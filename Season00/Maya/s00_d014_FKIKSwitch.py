@@ -5,6 +5,10 @@ from maya.api import _OpenMaya_py2 as om2
 from maya import cmds
 import math
 
+from callback_registry import REGISTRY
+from callback_scheduler import SCHEDULER
+from callback_profiler import PROFILER, EARLY_EXIT
+
 def iterSelection():
     """
     generator style iterator over current Maya active selection
@@ -15,63 +19,46 @@ def iterSelection():
         yield sel.getDependNode(i)
 
 
-def removeCallbacksFromNode(node_mob):
-    """
-    :param node_mob: [MObject] the node to remove all node callbacks from
-    :return: [int] number of callbacks removed
-    """
-    cbs = om2.MMessage.nodeCallbacks(node_mob)
-    cbCount = len(cbs)
-    for eachCB in cbs:
-        om2.MMessage.removeCallback(eachCB)
-    return cbCount
+# all interesting attribute names the callback needs plugs for
+settingsAttrNames = ('fkRotation',
+                     'ikRotation',
+                     'fk_ctrl_rotx',
+                     'ik_ctrl_translate',
+                     'ikPedalOffset',
+                     )
 
 
-def removeCallbacksFromSel():
+def settingsPayloadFromNode(node_mob):
     """
-    Will remove all callbacks from each node in the current selection
-    :return: [(int, int)] total number of objects that had callbacks removed,
-                            and total count of all callbacks removed across them
+    Resolves everything the callback needs from a settings node once, at install time,
+      so that the callback itself never has to look an attribute or plug up by name
+    :param node_mob: [MObject] the settings node the callback will be installed on
+    :return: [dict|None] the watched attribute under 'switchAttr', and a plug for each
+                         of settingsAttrNames under its own name.
+                         None if the node isn't conformant and can't operate as we expect it to.
     """
-    cbCount = 0
-    mobCount = 0
-    for eachMob in iterSelection():
-        mobCount += 1
-        cbCount += removeCallbacksFromNode(eachMob)
-    return mobCount, cbCount
+    mfn_dep = om2.MFnDependencyNode(node_mob)
+    for eachPName in (fkik_attrName,) + settingsAttrNames:
+        if not mfn_dep.hasAttribute(eachPName):
+            return None
 
+    payload = {'switchAttr': mfn_dep.attribute(fkik_attrName)}
+    for eachPName in settingsAttrNames:
+        payload[eachPName] = mfn_dep.findPlug(eachPName, False)
+    return payload
 
-def cb(msg, plug1, plug2, payload):
-    if msg != 2056: #check most common case first and return unless it's
-        return      # an attribute edit type of callback
-
-    if not plug1.partialName(includeNodeName=False, useAlias=False) == fkik_attrName:
-        # We ensure if the attribute being changed is uninteresting we do nothing
-        return
 
+def switchFKIK(plug1, payload):
+    """
+    Matches FK to IK or vice versa depending on the current state of the switch
+    :param plug1: [MPlug] the switch plug
+    :param payload: [dict] as returned by settingsPayloadFromNode()
+    :return: [None]
+    """
     isFK = plug1.asBool() == False # Switched To FK
     isIK = not isFK # Switched to IK
 
-    settingsAttrs = { # all interesting attribute names in keys, respective plugs in values
-                     'fkRotation': None,
-                     'ikRotation': None,
-                     'fk_ctrl_rotx': None,
-                     'ik_ctrl_translate': None,
-                     'ikPedalOffset': None,
-                     }
-
-    mfn_dep = om2.MFnDependencyNode(plug1.node())
-    # We populate the dictionary of interesting attributes with their plugs
-    for eachPName in settingsAttrs.iterkeys():
-        plug = mfn_dep.findPlug(eachPName, False)
-        settingsAttrs[eachPName] = plug
-
-    for p in settingsAttrs.itervalues():
-        # We will exit early and do nothing if a plug couldn't be initialised, the object
-        #  is malformed, or we installed the callback on an object that is only
-        #  conformant by accident and can't operate as we expect it to.
-        if p is None:
-            return
+    settingsAttrs = payload # plugs were resolved when the callback was installed
 
     angle = None # empty init
     if isFK:
@@ -99,6 +86,38 @@ def cb(msg, plug1, plug2, payload):
                 ikSourcePlug.child(i).setDouble(z)
 
 
-removeCallbacksFromSel()
-for eachMob in iterSelection():
-    om2.MNodeMessage.addAttributeChangedCallback(eachMob, cb)
\ No newline at end of file
+def cb(msg, plug1, plug2, payload):
+    if msg != 2056: #check most common case first and return unless it's
+        return EARLY_EXIT # an attribute edit type of callback
+
+    if plug1.attribute() != payload['switchAttr']:
+        # We ensure if the attribute being changed is uninteresting we do nothing
+        return EARLY_EXIT
+
+    # switchFKIK() reads the switch when it runs, so when coalesced
+    #  only the state the switch settled on is matched on the next idle
+    SCHEDULER.deliver(plug1.node(), switchFKIK, (plug1, payload), coalesce=payload['coalesce'])
+
+
+def installCallback(node_mob):
+    """
+    :param node_mob: [MObject] the settings node to install the callback on
+    :return: [int|None] the callback ID, None if the node isn't conformant
+    """
+    settingsPayload = settingsPayloadFromNode(node_mob)
+    if settingsPayload is None:
+        return None
+    settingsPayload['coalesce'] = COALESCE_DELIVERY
+    return om2.MNodeMessage.addAttributeChangedCallback(node_mob, installedCb, settingsPayload)
+
+
+# The switch is a discrete change, a script keying right after setting it
+#   needs the match done by then, so it's delivered immediately unless asked otherwise
+COALESCE_DELIVERY = False # True to defer matching to the next idle flush
+
+# PROFILER.wrap() returns cb itself unless profiling was enabled beforehand
+installedCb = PROFILER.wrap('{}.cb'.format(fkik_attrName), cb)
+
+selectedMobs = list(iterSelection())
+REGISTRY.removeFromNodes(selectedMobs, fkik_attrName)
+REGISTRY.installOnNodes(selectedMobs, fkik_attrName, installCallback)
\ No newline at end of file
@@ -2,9 +2,49 @@ from maya.api import OpenMaya as om2
 from maya import cmds
 import math
 
+try:
+    # the registry lives with the Season00 tools, which a scene can well be opened without,
+    #   in which case callbacks are managed directly on the node as they used to be
+    from callback_registry import REGISTRY
+except ImportError:
+    REGISTRY = None
+
+fkik_attrName = 'FKIK_switch'
+
+# all interesting attribute names the callback needs plugs for
+settingsAttrNames = (
+    'fkRotation',
+    'ikRotation',
+    'fk_ctrl_rotx',
+    'ik_ctrl_translate',
+    'ikPedalOffset',
+    'dirtyTracker',
+)
+
+
+def settingsPayloadFromNode(node_mob):
+    """
+    Resolves everything the callback needs from a settings node once, at install time,
+      so that the callback itself never has to look an attribute or plug up by name
+    :param node_mob: [MObject] the settings node the callback will be installed on
+    :return: [dict|None] the watched attribute under 'switchAttr', and a plug for each
+                         of settingsAttrNames under its own name.
+                         None if the node isn't conformant and can't operate as we expect it to.
+    """
+    mfn_dep = om2.MFnDependencyNode(node_mob)
+    for eachPName in (fkik_attrName,) + settingsAttrNames:
+        if not mfn_dep.hasAttribute(eachPName):
+            return None
+
+    payload = {'switchAttr': mfn_dep.attribute(fkik_attrName)}
+    for eachPName in settingsAttrNames:
+        payload[eachPName] = mfn_dep.findPlug(eachPName, False)
+    return payload
+
 
 def removeCallbacksFromNode(node_mob):
     """
+    Fallback for when the registry isn't available
     :param node_mob: [MObject] the node to remove all node callbacks from
     :return: [int] number of callbacks removed
     """
@@ -16,38 +56,17 @@ def removeCallbacksFromNode(node_mob):
 
 
 def cb(msg, plug1, plug2, payload):
-    fkik_attrName = 'FKIK_switch'
     if msg != 2056:  # check most common case first and return unless it's
         return  # an attribute edit type of callback
 
-    if not plug1.partialName(includeNodeName=False, useAlias=False) == fkik_attrName:
+    if plug1.attribute() != payload['switchAttr']:
         # We ensure if the attribute being changed is uninteresting we do nothing
         return
 
     isFK = plug1.asBool() == False  # Switched To FK
     isIK = not isFK  # Switched to IK
 
-    settingsAttrs = {  # all interesting attribute names in keys, respective plugs in values
-        'fkRotation': None,
-        'ikRotation': None,
-        'fk_ctrl_rotx': None,
-        'ik_ctrl_translate': None,
-        'ikPedalOffset': None,
-        'dirtyTracker': None,
-    }
-
-    mfn_dep = om2.MFnDependencyNode(plug1.node())
-    # We populate the dictionary of interesting attributes with their plugs
-    for eachPName in settingsAttrs.iterkeys():
-        plug = mfn_dep.findPlug(eachPName, False)
-        settingsAttrs[eachPName] = plug
-
-    for p in settingsAttrs.itervalues():
-        # We will exit early and do nothing if a plug couldn't be initialised, the object
-        #  is malformed, or we installed the callback on an object that is only
-        #  conformant by accident and can't operate as we expect it to.
-        if p is None:
-            return
+    settingsAttrs = payload  # plugs were resolved when the callback was installed
 
     dirtyTrackerPlug = settingsAttrs.get('dirtyTracker')
     isDirty = dirtyTrackerPlug.asBool() != plug1.asBool()
@@ -98,14 +117,22 @@ if found: # act only if found
     #  by aligning the value of the switch the rig was save with
     #  into the dirty tracker
     mfn_dep = om2.MFnDependencyNode(settingsMob)
-    fkikPlug = mfn_dep.findPlug('FKIK_switch', False)
+    fkikPlug = mfn_dep.findPlug(fkik_attrName, False)
     dirtyTracker = mfn_dep.findPlug('dirtyTracker', False)
     dirtyTracker.setBool(fkikPlug.asBool())
 
     # as this is on scene open only the following callback removal
     #  shouldn't be necessary since callbacks don't persist on scene save,
-    #  but why not?
-    removeCallbacksFromNode(settingsMob)
-
-    # and we finally add the callback implementation to the settings node
-    om2.MNodeMessage.addAttributeChangedCallback(settingsMob, cb)
+    #  but why not? The registry only removes what it installed itself.
+    if REGISTRY is not None:
+        REGISTRY.removeFromNodes([settingsMob], fkik_attrName)
+    else:
+        removeCallbacksFromNode(settingsMob)
+
+    # and we finally add the callback implementation to the settings node,
+    #  with all the plugs it needs resolved once and bound to it
+    settingsPayload = settingsPayloadFromNode(settingsMob)
+    if settingsPayload is not None:
+        callbackID = om2.MNodeMessage.addAttributeChangedCallback(settingsMob, cb, settingsPayload)
+        if REGISTRY is not None:
+            REGISTRY.add(settingsMob, fkik_attrName, callbackID)
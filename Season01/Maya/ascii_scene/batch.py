@@ -0,0 +1,301 @@
+"""
+Runs scene jobs over a directory tree of .ma files across a pool of processes.
+
+Each file is handled by its own worker process, at most a given number at a time,
+  so a file that hangs or blows up can be killed on its timeout without taking
+  anything else with it, and memory is returned to the system after every file.
+This is deliberately not a multiprocessing.Pool: a pooled worker can't be killed on a timeout
+  without breaking the pool, and a memory cap or leak would carry over from one file to the next.
+Starting a process costs milliseconds, parsing a rig scene costs seconds, so nothing is lost.
+Where the platform allows it a worker's address space is capped,
+  a file exceeding it fails with a MemoryError rather than swapping the machine to death.
+
+Jobs are plain functions taking the scene path and the job options,
+  and returning a JSON friendly dictionary. They are registered by name in JOBS:
+ * inventory: components, containers and plugin requirements in a scene
+ * validate: structural problems with containers and components
+ * strip_guides: guide removal as done by the guides module, needs an output directory
+
+Inspection jobs can reuse the scene index caches from the cache module,
+  files that didn't change since the last run then don't need parsing.
+
+The report aggregates the results of every file along with its status
+  (ok, error, timeout or crashed) and how long it took.
+
+Can be run from the command line, e.g.:
+  python -m Maya.ascii_scene.batch /assets/rigs -j inventory -w 8 -t 60 -m 2048 -r report.json
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+from . import cache
+from . import guides
+from . import parser
+
+try:
+    import resource
+except ImportError: # not available on Windows, memory isn't capped there
+    resource = None
+
+
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+STATUS_CRASHED = 'crashed'
+
+POLL_INTERVAL = 0.05
+
+
+def _index_for(path, options):
+    if options.get('cache'):
+        return cache.cached_parse(path, options.get('cache_dir'))
+    return parser.parse_scene(path)
+
+
+def inventory_job(path, options):
+    with _index_for(path, options) as index:
+        components = []
+        for comp_id in index.components():
+            container_id = index.container_of(comp_id)
+            components.append({'name': index.node_names[comp_id],
+                               'container': index.node_names[container_id] if container_id >= 0 else None,
+                               })
+        return {'nodes': index.node_count(),
+                'connections': index.connection_count(),
+                'containers': [index.node_names[container_id] for container_id in index.containers()],
+                'components': components,
+                'requires': [list(each) for each in index.requires],
+                }
+
+
+def validate_job(path, options):
+    with _index_for(path, options) as index:
+        issues = []
+
+        for comp_id in index.components():
+            if index.container_of(comp_id) < 0:
+                issues.append("component {} isn't in a container".format(index.node_path(comp_id)))
+
+        for container_id in index.containers():
+            container_name = index.node_names[container_id]
+            if not index.container_members(container_id):
+                issues.append("container {} has no members".format(container_name))
+                continue
+            key_obs = index.important_objects(container_id)
+            if key_obs['guide'] >= 0 and key_obs['toolParameters'] < 0:
+                issues.append("container {} has a guide but no tool parameters".format(container_name))
+
+        for node_id in index.undeclared_nodes:
+            issues.append("{} is referenced but never created".format(index.node_names[node_id]))
+
+        return {'valid': not issues, 'issues': issues}
+
+
+def strip_guides_job(path, options):
+    out_path = os.path.join(options['output_dir'], os.path.relpath(path, options['root']))
+    out_dir = os.path.dirname(out_path)
+    if not os.path.isdir(out_dir):
+        try:
+            os.makedirs(out_dir)
+        except OSError: # another worker beat us to it
+            if not os.path.isdir(out_dir):
+                raise
+
+    results = guides.process_file(path, out_path, swap=True, remove_dg=True, remove_dag=True)
+    return {'output': out_path, 'components': results}
+
+
+JOBS = {'inventory': inventory_job,
+        'validate': validate_job,
+        'strip_guides': strip_guides_job,
+        }
+
+
+def iter_scenes(root, pattern='*.ma'):
+    """
+    :param root: `str` directory to walk, or a single file
+    :param pattern: `str` fnmatch pattern files have to match
+    :return: `generator` of `str` paths, in a stable order
+    """
+    if os.path.isfile(root):
+        yield root
+        return
+
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        for file_name in sorted(fnmatch.filter(file_names, pattern)):
+            yield os.path.join(dir_path, file_name)
+
+
+def _worker(job_name, path, options, memory_mb, connection):
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, resource.error):
+            pass
+
+    try:
+        outcome = (STATUS_OK, JOBS[job_name](path, options))
+    except MemoryError:
+        outcome = (STATUS_ERROR, "exceeded the {} MB memory limit".format(memory_mb))
+    except Exception:
+        outcome = (STATUS_ERROR, traceback.format_exc())
+    connection.send(outcome)
+    connection.close()
+
+
+def _receive(connection, process):
+    try:
+        outcome = connection.recv()
+    except EOFError:
+        outcome = (STATUS_CRASHED, "worker exited without a result")
+    process.join()
+    return outcome
+
+
+def _finish(entry, status, payload, report):
+    record = {'path': entry['path'],
+              'status': status,
+              'seconds': round(time.time() - entry['start'], 3),
+              }
+    if status == STATUS_OK:
+        record['result'] = payload
+    else:
+        record['error'] = payload
+    report['files'].append(record)
+    report['counts'][status] = report['counts'].get(status, 0) + 1
+
+
+def run_batch(root, job_name, workers=None, timeout=None, memory_mb=None,
+              pattern='*.ma', options=None, progress=None):
+    """
+    :param root: `str` directory to process, or a single file
+    :param job_name: `str` one of the keys in JOBS
+    :param workers: `int | None` processes running at once, defaults to the CPU count
+    :param timeout: `float | None` seconds a single file is allowed before its worker is killed
+    :param memory_mb: `int | None` address space cap for each worker
+    :param pattern: `str` fnmatch pattern for scene files
+    :param options: `dict | None` passed on to the job, root is always added
+    :param progress: `callable | None` called with every file's record as it completes
+    :return: `dict` the report, JSON friendly
+    """
+    if job_name not in JOBS:
+        raise ValueError("unknown job {}, expected one of {}".format(job_name, sorted(JOBS)))
+
+    workers = workers or multiprocessing.cpu_count()
+    options = dict(options or {})
+    options['root'] = root if os.path.isdir(root) else os.path.dirname(root)
+
+    report = {'job': job_name,
+              'root': root,
+              'workers': workers,
+              'timeout': timeout,
+              'memoryMB': memory_mb,
+              'files': [],
+              'counts': {},
+              }
+
+    batch_start = time.time()
+    pending = iter_scenes(root, pattern)
+    running = []
+    exhausted = False
+
+    while running or not exhausted:
+        while not exhausted and len(running) < workers:
+            try:
+                path = next(pending)
+            except StopIteration:
+                exhausted = True
+                break
+
+            parent_end, child_end = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_worker,
+                                              args=(job_name, path, options, memory_mb, child_end))
+            process.daemon = True
+            process.start()
+            child_end.close()
+            running.append({'path': path, 'process': process, 'connection': parent_end, 'start': time.time()})
+
+        still_running = []
+        for entry in running:
+            process = entry['process']
+            connection = entry['connection']
+
+            if connection.poll():
+                status, payload = _receive(connection, process)
+            elif not process.is_alive():
+                # the worker may have sent its result and exited since the poll above,
+                #   once it's joined anything it sent is already in the pipe
+                process.join()
+                if connection.poll():
+                    status, payload = _receive(connection, process)
+                else:
+                    status, payload = STATUS_CRASHED, "worker exited with code {}".format(process.exitcode)
+            elif timeout and time.time() - entry['start'] > timeout:
+                process.terminate()
+                process.join()
+                status, payload = STATUS_TIMEOUT, "exceeded {} seconds".format(timeout)
+            else:
+                still_running.append(entry)
+                continue
+
+            connection.close()
+            _finish(entry, status, payload, report)
+            if progress is not None:
+                progress(report['files'][-1])
+
+        running = still_running
+        if running:
+            time.sleep(POLL_INTERVAL)
+
+    report['files'].sort(key=lambda record: record['path'])
+    report['seconds'] = round(time.time() - batch_start, 3)
+    return report
+
+
+def main(argv=None):
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0].strip())
+    arg_parser.add_argument('root', help="directory to process, or a single .ma file")
+    arg_parser.add_argument('-j', '--job', required=True, choices=sorted(JOBS))
+    arg_parser.add_argument('-w', '--workers', type=int, help="processes running at once, defaults to the CPU count")
+    arg_parser.add_argument('-t', '--timeout', type=float, help="seconds allowed per file")
+    arg_parser.add_argument('-m', '--memory', type=int, help="address space cap per worker in MB")
+    arg_parser.add_argument('-p', '--pattern', default='*.ma')
+    arg_parser.add_argument('-o', '--output-dir', help="where rewriting jobs write their scenes, mirroring root")
+    arg_parser.add_argument('-r', '--report', help="JSON report file, printed if omitted")
+    arg_parser.add_argument('-c', '--cache', action='store_true', help="reuse and write scene index caches")
+    arg_parser.add_argument('--cache-dir', help="where caches are kept, next to each scene if omitted")
+    args = arg_parser.parse_args(argv)
+
+    if args.job == 'strip_guides' and not args.output_dir:
+        arg_parser.error("strip_guides needs an output directory")
+
+    def progress(record):
+        sys.stderr.write('{} {} {:.3f}s\n'.format(record['status'], record['path'], record['seconds']))
+
+    report = run_batch(args.root, args.job, args.workers, args.timeout, args.memory,
+                       pattern=args.pattern, options={'output_dir': args.output_dir, 'cache': args.cache, 'cache_dir': args.cache_dir}, progress=progress)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    return 0 if report['counts'].get(STATUS_OK, 0) == len(report['files']) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
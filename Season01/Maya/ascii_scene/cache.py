@@ -0,0 +1,510 @@
+"""
+A binary sidecar cache for scene indices, so unchanged scenes don't need parsing again.
+
+The tables of a SceneIndex are written column by column to a single file,
+  each column a contiguous run of fixed width integers, along with a string table
+  and the lookups the queries need (name and uid orderings, incoming and outgoing
+  connections per node), all precomputed at write time.
+Reading the cache maps the file in memory and only loads the columns a query touches,
+  so asking what a container owns, or what feeds a plug, costs a few page-ins
+  instead of a parse. Strings are only decoded when they're asked for.
+
+A cache is reused if the scene has the same size and modification time it had when
+  the cache was written, or, failing the latter, if its content still hashes the same,
+  in which case the cache is stamped with the new modification time so it isn't hashed again.
+Anything else, including a cache written on a platform with a different byte order
+  or integer sizes, is considered stale and the scene is parsed again.
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import bisect
+import errno
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from . import parser
+
+
+MAGIC = b'MAIDX\x00\x00\x00'
+VERSION = 1
+CACHE_EXTENSION = '.maidx'
+
+# magic, version, byte order, scene size, scene mtime in ns, scene sha1, codec, column count
+_HEADER = struct.Struct('<8sIBxxxqq20s16sI')
+# where the scene mtime sits in the header, to re-stamp a cache in place
+_HEADER_MTIME_OFFSET = struct.calcsize('<8sIBxxxq')
+_MTIME = struct.Struct('<q')
+# name, typecode, item size, byte offset, item count
+_COLUMN = struct.Struct('<24scBxxxxxxqq')
+
+_HASH_BLOCK = 1 << 20
+
+# where writing a cache can fail without anything being wrong, the scene is just read only
+_READ_ONLY_ERRNOS = frozenset((errno.EACCES, errno.EPERM, errno.EROFS))
+
+_log = logging.getLogger(__name__)
+
+
+def _array_from_bytes(typecode, data):
+    column = array(typecode)
+    if hasattr(column, 'frombytes'):
+        column.frombytes(data)
+    else: # Python 2
+        column.fromstring(data)
+    return column
+
+
+def _array_bytes(column):
+    return column.tobytes() if hasattr(column, 'tobytes') else column.tostring()
+
+
+def scene_stamp(scene_path, with_hash=True):
+    """
+    :param scene_path: `str`
+    :param with_hash: `bool` also hash the content, which means reading the whole file
+    :return: (`int`, `int`, `bytes | None`) size, modification time in nanoseconds and sha1 digest
+    """
+    stat = os.stat(scene_path)
+    mtime_ns = getattr(stat, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(stat.st_mtime * 1e9)
+
+    digest = None
+    if with_hash:
+        sha = hashlib.sha1()
+        with io.open(scene_path, 'rb') as stream:
+            block = stream.read(_HASH_BLOCK)
+            while block:
+                sha.update(block)
+                block = stream.read(_HASH_BLOCK)
+        digest = sha.digest()
+    return stat.st_size, mtime_ns, digest
+
+
+def cache_path_for(scene_path, cache_dir=None):
+    """
+    :param scene_path: `str`
+    :param cache_dir: `str | None` keeps all caches in one directory, next to the scene if None
+    :return: `str` where the cache for the scene lives
+    """
+    if cache_dir is None:
+        return scene_path + CACHE_EXTENSION
+    key = hashlib.sha1(os.path.abspath(scene_path).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key + CACHE_EXTENSION)
+
+
+def _sorted_ids(keys):
+    # ids sorted by their key, ties broken by id to keep the order stable
+    return array('i', sorted(range(len(keys)), key=lambda i: (keys[i], i)))
+
+
+def _adjacency(node_count, conn_nodes):
+    # compressed rows, connections for node i are conns[start[i]:start[i + 1]]
+    rows = [[] for _ in range(node_count)]
+    for conn_id, node_id in enumerate(conn_nodes):
+        rows[node_id].append(conn_id)
+    start = array('i', [0])
+    conns = array('i')
+    for row in rows:
+        conns.extend(row)
+        start.append(len(conns))
+    return start, conns
+
+
+def write_cache(index, cache_path=None, stamp=None):
+    """
+    :param index: `SceneIndex` a freshly parsed index
+    :param cache_path: `str | None` defaults to a sidecar next to the scene
+    :param stamp: `tuple | None` as returned by scene_stamp(), computed if None
+    :return: `str` the path written to
+    """
+    cache_path = cache_path or cache_path_for(index.path)
+    size, mtime_ns, digest = stamp if stamp is not None and stamp[2] is not None else scene_stamp(index.path)
+
+    # names and uids go in the string table too, a copy of it so the index is left alone
+    strings = list(index.strings)
+    string_ids = dict((text, i) for i, text in enumerate(strings))
+
+    def intern(text):
+        string_id = string_ids.get(text)
+        if string_id is None:
+            string_id = string_ids[text] = len(strings)
+            strings.append(text)
+        return string_id
+
+    node_names = array('i', [intern(name) for name in index.node_names])
+    node_uids = array('i', [intern(uid) for uid in index.node_uids])
+
+    encoded = [text.encode('utf-8') for text in strings]
+    string_ends = array(parser.OFFSET_TYPECODE)
+    end = 0
+    for each in encoded:
+        end += len(each)
+        string_ends.append(end)
+
+    in_start, in_conns = _adjacency(index.node_count(), index.conn_dst)
+    out_start, out_conns = _adjacency(index.node_count(), index.conn_src)
+
+    extras = {'requires': [list(each) for each in index.requires],
+              'extra_parents': [list(each) for each in index.extra_parents],
+              'undeclared_nodes': list(index.undeclared_nodes),
+              'statement_count': index.statement_count,
+              }
+
+    columns = [
+        ('string_blob', array('B', b''.join(encoded))),
+        ('string_ends', string_ends),
+        ('string_order', _sorted_ids(strings)),
+        ('node_names', node_names),
+        ('node_types', index.node_types),
+        ('node_parents', index.node_parents),
+        ('node_uids', node_uids),
+        ('node_offsets', index.node_offsets),
+        ('name_order', _sorted_ids(index.node_names)),
+        ('uid_order', array('i', [i for i in _sorted_ids(index.node_uids) if index.node_uids[i]])),
+        ('conn_src', index.conn_src),
+        ('conn_src_attr', index.conn_src_attr),
+        ('conn_dst', index.conn_dst),
+        ('conn_dst_attr', index.conn_dst_attr),
+        ('conn_offsets', index.conn_offsets),
+        ('conn_lengths', index.conn_lengths),
+        ('in_start', in_start),
+        ('in_conns', in_conns),
+        ('out_start', out_start),
+        ('out_conns', out_conns),
+        ('setattr_node', index.setattr_node),
+        ('setattr_attr', index.setattr_attr),
+        ('setattr_offsets', index.setattr_offsets),
+        ('setattr_lengths', index.setattr_lengths),
+        ('addattr_node', index.addattr_node),
+        ('addattr_long', index.addattr_long),
+        ('addattr_short', index.addattr_short),
+        ('addattr_parent', index.addattr_parent),
+        ('addattr_type', index.addattr_type),
+        ('extras', array('B', json.dumps(extras).encode('utf-8'))),
+    ]
+
+    byte_order = 0 if sys.byteorder == 'little' else 1
+    directory_size = _HEADER.size + _COLUMN.size * len(columns)
+
+    cache_dir = os.path.dirname(cache_path)
+    if cache_dir and not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError: # another worker beat us to it
+            if not os.path.isdir(cache_dir):
+                raise
+
+    # written to a temporary file first, a half written cache must never be picked up
+    temp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+    with io.open(temp_path, 'wb') as stream:
+        stream.write(_HEADER.pack(MAGIC, VERSION, byte_order, size, mtime_ns, digest,
+                                  index.codec.encode('ascii'), len(columns)))
+        offset = directory_size
+        for name, column in columns:
+            stream.write(_COLUMN.pack(name.encode('ascii'), column.typecode.encode('ascii'),
+                                      column.itemsize, offset, len(column)))
+            offset += column.itemsize * len(column)
+        for _, column in columns:
+            stream.write(_array_bytes(column))
+
+    if os.path.exists(cache_path):
+        os.remove(cache_path) # Windows won't rename over an existing file
+    os.rename(temp_path, cache_path)
+    return cache_path
+
+
+class _LazyStrings(object):
+    """
+    Sequence over the cached string table, strings are decoded the first time they're asked for
+    """
+    def __init__(self, buffer, blob_offset, ends):
+        self.__buffer = buffer
+        self.__blob_offset = blob_offset
+        self.__ends = ends
+        self.__decoded = {}
+
+
+    def __len__(self):
+        return len(self.__ends)
+
+
+    def __getitem__(self, string_id):
+        text = self.__decoded.get(string_id)
+        if text is None:
+            start = self.__blob_offset + (self.__ends[string_id - 1] if string_id else 0)
+            end = self.__blob_offset + self.__ends[string_id]
+            text = self.__buffer[start:end].decode('utf-8')
+            self.__decoded[string_id] = text
+        return text
+
+
+    def __iter__(self):
+        for string_id in range(len(self)):
+            yield self[string_id]
+
+
+class _StringColumn(object):
+    """
+    Sequence of strings over a column of string ids
+    """
+    def __init__(self, ids, strings):
+        self.__ids = ids
+        self.__strings = strings
+
+
+    def __len__(self):
+        return len(self.__ids)
+
+
+    def __getitem__(self, i):
+        return self.__strings[self.__ids[i]]
+
+
+    def __iter__(self):
+        for string_id in self.__ids:
+            yield self.__strings[string_id]
+
+
+class MappedSceneIndex(parser.SceneIndex):
+    """
+    A read only SceneIndex whose tables live in a memory mapped cache file.
+    Columns are copied out of the map the first time they're used, and kept after that.
+    The map stays open until close() is called, or the index is used as a context manager,
+      columns loaded by then remain usable but anything still lazy won't be.
+    """
+    def __init__(self, scene_path, cache_path):
+        # the base class constructor isn't called on purpose, it would set up
+        #   empty tables where we want the attribute lookups to fall through to the columns
+        self.path = scene_path
+        self.cache_path = cache_path
+        with io.open(cache_path, 'rb') as stream:
+            self.__map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, byte_order, self.scene_size, self.scene_mtime_ns,
+         self.scene_digest, codec, column_count) = _HEADER.unpack_from(self.__map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} isn't a version {} scene cache".format(cache_path, VERSION))
+        if byte_order != (0 if sys.byteorder == 'little' else 1):
+            raise ValueError("{} was written with a different byte order".format(cache_path))
+        self.codec = codec.rstrip(b'\x00').decode('ascii')
+
+        self.__columns = {}
+        for i in range(column_count):
+            name, typecode, itemsize, offset, count = _COLUMN.unpack_from(self.__map, _HEADER.size + i * _COLUMN.size)
+            typecode = typecode.decode('ascii')
+            if array(typecode).itemsize != itemsize:
+                raise ValueError("{} was written with different integer sizes".format(cache_path))
+            self.__columns[name.rstrip(b'\x00').decode('ascii')] = (typecode, offset, itemsize * count)
+
+        extras = json.loads(self.__bytes('extras').decode('utf-8'))
+        self.requires = [(plugin, version, tuple(node_types)) for plugin, version, node_types in extras['requires']]
+        self.extra_parents = [tuple(each) for each in extras['extra_parents']]
+        self.undeclared_nodes = extras['undeclared_nodes']
+        self.statement_count = extras['statement_count']
+        self.__node_paths = {}
+        self._row_index = {}
+
+
+    def __bytes(self, name):
+        typecode, offset, length = self.__columns[name]
+        return self.__map[offset:offset + length]
+
+
+    def __getattr__(self, name):
+        # only ever called for attributes that aren't set yet, i.e. columns not loaded yet
+        columns = self.__dict__.get('_MappedSceneIndex__columns')
+        if columns is None:
+            raise AttributeError(name)
+
+        if name == 'strings':
+            value = _LazyStrings(self.__map, columns['string_blob'][1], self.string_ends)
+        elif name in ('node_names', 'node_uids'):
+            value = _StringColumn(self.__load(name), self.strings)
+        elif name in columns:
+            value = self.__load(name)
+        else:
+            raise AttributeError(name)
+
+        setattr(self, name, value)
+        return value
+
+
+    def __load(self, name):
+        typecode, offset, length = self.__columns[name]
+        return _array_from_bytes(typecode, self.__map[offset:offset + length])
+
+
+    def close(self):
+        self.__map.close()
+
+
+    def handle_statement(self, offset, raw):
+        raise TypeError("a cached scene index is read only")
+
+
+    def intern(self, text):
+        string_id = self.string_id(text)
+        if string_id is None:
+            raise TypeError("a cached scene index is read only")
+        return string_id
+
+
+    def __bisect(self, order, key_of, key):
+        lo = bisect.bisect_left(_KeyView(order, key_of), key)
+        found = []
+        while lo < len(order) and key_of(order[lo]) == key:
+            found.append(order[lo])
+            lo += 1
+        return found
+
+
+    def string_id(self, text):
+        found = self.__bisect(self.string_order, self.strings.__getitem__, text)
+        return found[0] if found else None
+
+
+    def nodes_named(self, name):
+        return self.__bisect(self.name_order, self.node_names.__getitem__, name)
+
+
+    def node_by_uid(self, uid):
+        found = self.__bisect(self.uid_order, self.node_uids.__getitem__, uid)
+        return found[0] if found else -1
+
+
+    def nodes_of_type(self, node_type):
+        type_id = self.string_id(node_type)
+        if type_id is None:
+            return []
+        return [node_id for node_id, each_type in enumerate(self.node_types) if each_type == type_id]
+
+
+    def node_path(self, node_id):
+        path = self.__node_paths.get(node_id)
+        if path is None:
+            parent_id = self.node_parents[node_id]
+            prefix = self.node_path(parent_id) if parent_id >= 0 else ''
+            path = self.__node_paths[node_id] = '{}|{}'.format(prefix, self.node_names[node_id])
+        return path
+
+
+    def find(self, name):
+        if name.startswith(':') and '|' not in name:
+            name = name[1:]
+
+        candidates = self.nodes_named(name.rsplit('|', 1)[-1])
+        if '|' not in name:
+            return candidates[0] if candidates else -1
+
+        suffix = name if name.startswith('|') else '|' + name
+        for each_id in candidates:
+            path = self.node_path(each_id)
+            if path == name or (not name.startswith('|') and path.endswith(suffix)):
+                return each_id
+        return -1
+
+
+    def resolve(self, name):
+        return self.find(name)
+
+
+    def incoming(self, node_id):
+        return self.in_conns[self.in_start[node_id]:self.in_start[node_id + 1]].tolist()
+
+
+    def outgoing(self, node_id):
+        return self.out_conns[self.out_start[node_id]:self.out_start[node_id + 1]].tolist()
+
+
+class _KeyView(object):
+    # lets bisect search an id ordering by the keys of the ids
+    def __init__(self, order, key_of):
+        self.order = order
+        self.key_of = key_of
+
+
+    def __len__(self):
+        return len(self.order)
+
+
+    def __getitem__(self, i):
+        return self.key_of(self.order[i])
+
+
+def _restamp(cache_path, mtime_ns):
+    # the content is the same, only the mtime moved, e.g. a touch or a fresh checkout
+    try:
+        with io.open(cache_path, 'r+b') as stream:
+            stream.seek(_HEADER_MTIME_OFFSET)
+            stream.write(_MTIME.pack(mtime_ns))
+    except (IOError, OSError) as error:
+        if error.errno not in _READ_ONLY_ERRNOS:
+            raise
+        _log.warning("can't re-stamp the cache at %s: %s", cache_path, error)
+
+
+def load_cache(scene_path, cache_path=None, verify_hash=False):
+    """
+    :param scene_path: `str`
+    :param cache_path: `str | None` defaults to the sidecar next to the scene
+    :param verify_hash: `bool` check the content hash even if size and modification time match
+    :return: `MappedSceneIndex | None` None if there is no usable cache for the scene
+    """
+    cache_path = cache_path or cache_path_for(scene_path)
+    if not os.path.isfile(cache_path):
+        return None
+
+    try:
+        index = MappedSceneIndex(scene_path, cache_path)
+    except (ValueError, struct.error, KeyError):
+        return None
+
+    size, mtime_ns, _ = scene_stamp(scene_path, with_hash=False)
+    if size == index.scene_size:
+        if mtime_ns == index.scene_mtime_ns and not verify_hash:
+            return index
+        if scene_stamp(scene_path)[2] == index.scene_digest:
+            if mtime_ns != index.scene_mtime_ns:
+                _restamp(cache_path, mtime_ns)
+                index.scene_mtime_ns = mtime_ns
+            return index
+
+    index.close()
+    return None
+
+
+def cached_parse(scene_path, cache_dir=None, verify_hash=False):
+    """
+    Loads a scene's index from its cache, parsing the scene and writing the cache if needed.
+    The caller owns the index and should close() it when done, or use it in a with statement,
+      a MappedSceneIndex keeps its cache file mapped until then.
+    :param scene_path: `str`
+    :param cache_dir: `str | None` see cache_path_for()
+    :param verify_hash: `bool` see load_cache()
+    :return: `SceneIndex` a MappedSceneIndex if the cache was usable
+    """
+    cache_path = cache_path_for(scene_path, cache_dir)
+    index = load_cache(scene_path, cache_path, verify_hash)
+    if index is not None:
+        return index
+
+    stamp = scene_stamp(scene_path)
+    index = parser.parse_scene(scene_path)
+    try:
+        write_cache(index, cache_path, stamp)
+    except (IOError, OSError) as error:
+        if error.errno not in _READ_ONLY_ERRNOS:
+            raise
+        # a read only library is still readable, it just won't be any faster next time
+        _log.warning("can't write the cache of %s to %s: %s", scene_path, cache_path, error)
+    return index
@@ -0,0 +1,308 @@
+"""
+Node level connection graph over a parsed scene, for bulk queries without Maya.
+
+Connections are turned into two compressed adjacency tables, forward (downstream)
+  and reverse (upstream): for node i its neighbours are nodes[start[i]:start[i + 1]],
+  with the connection each edge came from alongside it in conns.
+Both are plain integer arrays, built once in linear time, and every query below
+  is a walk over them rather than a chain of per plug lookups.
+
+Queries:
+ * downstream/upstream: everything reachable from a set of nodes, optionally depth limited
+ * neighbourhood: the k-hop neighbourhood of a set of nodes, in either or both directions
+ * fan_in/fan_out: distinct nodes feeding, or fed by, every node
+ * strongly_connected_components, and cycles: the node sets involved in a cycle
+ * source_chain: the plug level source().source()... walk the plugin's swap code does
+
+Container bookkeeping (message into hyperLayout, hyperLayout into container) forms
+  edges like any other connection, a connection filter can leave them out.
+
+Can be run from the command line for a report on a scene:
+  python -m Maya.ascii_scene.graph path/to/scene.ma --top 10 --no-message
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import sys
+from array import array
+from collections import deque
+
+from . import parser
+
+
+DIRECTION_DOWNSTREAM = 'downstream'
+DIRECTION_UPSTREAM = 'upstream'
+DIRECTION_BOTH = 'both'
+
+
+def skip_message_connections(index):
+    """
+    :return: `callable` a connection filter leaving out connections from message plugs
+    """
+    message_ids = set(index.string_id(attr) for attr in parser.MESSAGE_ATTRS)
+    message_ids.discard(None)
+    return lambda conn_id: index.conn_src_attr[conn_id] not in message_ids
+
+
+def _compressed_rows(node_count, from_nodes, to_nodes, conn_ids):
+    # counting sort of edges by their from node, stable so connection order is kept
+    start = array('i', [0]) * (node_count + 1)
+    for node_id in from_nodes:
+        start[node_id + 1] += 1
+    for i in range(node_count):
+        start[i + 1] += start[i]
+
+    fill = array('i', start)
+    nodes = array('i', [0]) * len(from_nodes)
+    conns = array('i', [0]) * len(from_nodes)
+    for from_id, to_id, conn_id in zip(from_nodes, to_nodes, conn_ids):
+        slot = fill[from_id]
+        nodes[slot] = to_id
+        conns[slot] = conn_id
+        fill[from_id] = slot + 1
+    return start, nodes, conns
+
+
+class NodeGraph(object):
+    def __init__(self, index, connection_filter=None):
+        """
+        :param index: `SceneIndex` parsed or cached
+        :param connection_filter: `callable | None` takes a connection id, False leaves it out
+        """
+        self.index = index
+        node_count = index.node_count()
+
+        conn_ids = [conn_id for conn_id in range(index.connection_count())
+                    if connection_filter is None or connection_filter(conn_id)]
+        src = [index.conn_src[conn_id] for conn_id in conn_ids]
+        dst = [index.conn_dst[conn_id] for conn_id in conn_ids]
+
+        self.fwd_start, self.fwd_nodes, self.fwd_conns = _compressed_rows(node_count, src, dst, conn_ids)
+        self.rev_start, self.rev_nodes, self.rev_conns = _compressed_rows(node_count, dst, src, conn_ids)
+
+
+    @property
+    def node_count(self):
+        return len(self.fwd_start) - 1
+
+
+    @property
+    def edge_count(self):
+        return len(self.fwd_nodes)
+
+
+    def _rows(self, direction):
+        if direction == DIRECTION_DOWNSTREAM:
+            return ((self.fwd_start, self.fwd_nodes),)
+        if direction == DIRECTION_UPSTREAM:
+            return ((self.rev_start, self.rev_nodes),)
+        if direction == DIRECTION_BOTH:
+            return (self.fwd_start, self.fwd_nodes), (self.rev_start, self.rev_nodes)
+        raise ValueError("unknown direction {}".format(direction))
+
+
+    def successors(self, node_id):
+        """
+        :return: `list` of `int` nodes node_id connects into, one entry per connection
+        """
+        return self.fwd_nodes[self.fwd_start[node_id]:self.fwd_start[node_id + 1]].tolist()
+
+
+    def predecessors(self, node_id):
+        """
+        :return: `list` of `int` nodes connecting into node_id, one entry per connection
+        """
+        return self.rev_nodes[self.rev_start[node_id]:self.rev_start[node_id + 1]].tolist()
+
+
+    def neighbourhood(self, node_ids, k=1, direction=DIRECTION_BOTH, include_roots=False):
+        """
+        Breadth first walk from any number of nodes at once
+        :param node_ids: `iterable` of `int` where to start from
+        :param k: `int | None` how many hops to go, None for no limit
+        :param direction: `str` one of the DIRECTION_ constants
+        :param include_roots: `bool` whether the starting nodes are part of the result
+        :return: `dict` node id to the number of hops it was first reached at
+        """
+        rows = self._rows(direction)
+        depths = {}
+        queue = deque()
+        for node_id in node_ids:
+            if node_id not in depths:
+                depths[node_id] = 0
+                queue.append(node_id)
+
+        while queue:
+            node_id = queue.popleft()
+            depth = depths[node_id]
+            if k is not None and depth >= k:
+                continue
+            for start, nodes in rows:
+                for i in range(start[node_id], start[node_id + 1]):
+                    neighbour = nodes[i]
+                    if neighbour not in depths:
+                        depths[neighbour] = depth + 1
+                        queue.append(neighbour)
+
+        if not include_roots:
+            for node_id in node_ids:
+                if depths.get(node_id) == 0:
+                    del depths[node_id]
+        return depths
+
+
+    def downstream(self, node_ids, max_depth=None, include_roots=False):
+        """
+        :return: `list` of `int` every node reachable from node_ids following connections, nearest first
+        """
+        depths = self.neighbourhood(node_ids, max_depth, DIRECTION_DOWNSTREAM, include_roots)
+        return sorted(depths, key=lambda node_id: (depths[node_id], node_id))
+
+
+    def upstream(self, node_ids, max_depth=None, include_roots=False):
+        """
+        :return: `list` of `int` every node node_ids can be reached from, nearest first
+        """
+        depths = self.neighbourhood(node_ids, max_depth, DIRECTION_UPSTREAM, include_roots)
+        return sorted(depths, key=lambda node_id: (depths[node_id], node_id))
+
+
+    def fan_in(self):
+        """
+        :return: `array` of `int` number of distinct nodes feeding each node
+        """
+        return self.__distinct_counts(self.rev_start, self.rev_nodes)
+
+
+    def fan_out(self):
+        """
+        :return: `array` of `int` number of distinct nodes each node feeds
+        """
+        return self.__distinct_counts(self.fwd_start, self.fwd_nodes)
+
+
+    @staticmethod
+    def __distinct_counts(start, nodes):
+        counts = array('i', [0]) * (len(start) - 1)
+        for node_id in range(len(counts)):
+            counts[node_id] = len(set(nodes[start[node_id]:start[node_id + 1]]))
+        return counts
+
+
+    def strongly_connected_components(self):
+        """
+        Tarjan's algorithm, iteratively so deep graphs don't hit the recursion limit
+        :return: `list` of `list` of `int` every node in exactly one component,
+                   components come out downstream first, i.e. in reverse topological order
+        """
+        node_count = self.node_count
+        order = array('i', [-1]) * node_count
+        low = array('i', [0]) * node_count
+        on_stack = bytearray(node_count)
+        stack = []
+        found = []
+        counter = 0
+
+        for root in range(node_count):
+            if order[root] >= 0:
+                continue
+
+            work = [(root, self.fwd_start[root])]
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+
+            while work:
+                node_id, edge = work[-1]
+                if edge < self.fwd_start[node_id + 1]:
+                    work[-1] = (node_id, edge + 1)
+                    neighbour = self.fwd_nodes[edge]
+                    if order[neighbour] < 0:
+                        order[neighbour] = low[neighbour] = counter
+                        counter += 1
+                        stack.append(neighbour)
+                        on_stack[neighbour] = 1
+                        work.append((neighbour, self.fwd_start[neighbour]))
+                    elif on_stack[neighbour]:
+                        low[node_id] = min(low[node_id], order[neighbour])
+                    continue
+
+                work.pop()
+                if work:
+                    parent_id = work[-1][0]
+                    low[parent_id] = min(low[parent_id], low[node_id])
+
+                if low[node_id] == order[node_id]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node_id:
+                            break
+                    found.append(sorted(component))
+
+        return found
+
+
+    def cycles(self):
+        """
+        :return: `list` of `list` of `int` node sets taking part in a cycle,
+                   a single node only if it connects into itself
+        """
+        return [component for component in self.strongly_connected_components()
+                if len(component) > 1 or component[0] in self.successors(component[0])]
+
+
+    def source_chain(self, node_id, attr, max_length=None):
+        """
+        Follows a plug to its source, then that plug to its own source and so on,
+          like chaining MPlug.source() calls
+        :param node_id: `int`
+        :param attr: `str` attribute path as written in the file
+        :param max_length: `int | None` how many hops to follow at most
+        :return: `list` of (`int`, `str`) source plugs, nearest first
+        """
+        chain = []
+        seen = set(((node_id, attr),))
+        plug = self.index.source(node_id, attr)
+        while plug is not None and plug not in seen:
+            chain.append(plug)
+            if max_length is not None and len(chain) >= max_length:
+                break
+            seen.add(plug)
+            plug = self.index.source(*plug)
+        return chain
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0].strip())
+    arg_parser.add_argument('scene')
+    arg_parser.add_argument('--top', type=int, default=10, help="how many nodes to list by fan in and fan out")
+    arg_parser.add_argument('--no-message', action='store_true', help="leave message connections out")
+    args = arg_parser.parse_args(argv)
+
+    index = parser.parse_scene(args.scene)
+    graph = NodeGraph(index, skip_message_connections(index) if args.no_message else None)
+
+    def top(counts):
+        ranked = sorted(range(len(counts)), key=lambda node_id: (-counts[node_id], node_id))[:args.top]
+        return [[index.node_path(node_id), counts[node_id]] for node_id in ranked if counts[node_id]]
+
+    print(json.dumps({'nodes': graph.node_count,
+                      'edges': graph.edge_count,
+                      'fanIn': top(graph.fan_in()),
+                      'fanOut': top(graph.fan_out()),
+                      'cycles': [[index.node_path(node_id) for node_id in component]
+                                 for component in graph.cycles()],
+                      }, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,468 @@
+"""
+Offline counterpart of the corps_guidance plugin's swapGuideControl command.
+
+The same rules the plugin applies in a live session are applied here to a parsed
+  .ma scene, and the edited scene is streamed back out to a new file:
+ * swap: every connected toSwap pair on a component's tool parameters panel
+         is connected, disconnected or swapped exactly as SwapOperation does it
+ * remove DG: nodes connected into the panel's toDelete array are deleted
+ * remove DAG: the component's guide DAG node is deleted, its hierarchy with it
+Swaps are planned on the scene as it was read, across all components, before anything
+  is applied, and removals happen after all swaps, same as in the plugin.
+
+Deleting a node removes its createNode block, every connection to or from it,
+  and any parent or relationship statement referring to it.
+Everything else in the file is copied through byte for byte.
+
+Can be run from the command line, e.g. to strip guides from a published rig:
+  python -m Maya.ascii_scene.guides rig.ma -o rig_published.ma -sw -rd -rg
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import io
+import json
+import sys
+
+from . import parser
+
+
+SWAP_OP_CONNECT = 'connect'
+SWAP_OP_DISCONNECT = 'disconnect'
+SWAP_OP_SWAP = 'swap'
+
+PLAN_VERSION = 1 # same as the plugin's SwapPlan, the JSON layout is shared
+
+# commands that act on the node most recently created or selected
+NODE_SCOPED_COMMANDS = frozenset((b'setAttr', b'addAttr', b'rename', b'lockNode', b'deleteAttr'))
+# commands whose quoted arguments are all nodes or plugs, and go if any of them does
+NODE_REFERENCING_COMMANDS = frozenset((b'parent', b'relationship'))
+
+
+class SwapOperation(object):
+    """
+    A single decision taken on a toSwap pair, see SwapOperation in the plugin.
+    Plugs are (node id, attribute) tuples on a SceneIndex, or None.
+    """
+    PLUG_KEYS = ('trackerOrigin', 'trackerGuided', 'activeOrigin', 'activeGuided', 'activeGuidedSource')
+
+    def __init__(self, tracker_origin, tracker_guided, active_origin, active_guided, active_guided_source):
+        self.tracker_origin = tracker_origin
+        self.tracker_guided = tracker_guided
+        self.active_origin = active_origin
+        self.active_guided = active_guided
+        self.active_guided_source = active_guided_source
+
+        if active_origin is not None and active_guided_source is None:
+            self.kind = SWAP_OP_CONNECT
+        elif active_origin is None and active_guided_source is not None:
+            self.kind = SWAP_OP_DISCONNECT
+        elif active_origin is not None and active_guided_source is not None:
+            self.kind = SWAP_OP_SWAP
+        else:
+            raise ValueError("a swap operation with neither an active origin or a guided source does nothing")
+
+
+    @classmethod
+    def from_element(cls, index, panel_id, element):
+        """
+        :param index: `SceneIndex`
+        :param panel_id: `int` the tool parameters node
+        :param element: `dict` {origin: conn_id, guided: conn_id} as returned by SceneIndex.swap_elements()
+        :return: `SwapOperation | None` None if the pair requires nothing to be done
+        """
+        tracker_origin = None
+        tracker_guided = None
+        active_origin = None
+        active_guided = None
+        active_guided_source = None
+
+        if element['origin'] >= 0:
+            active_origin_id, active_origin_attr, _, tracker_attr = index.connection(element['origin'])
+            active_origin = (active_origin_id, active_origin_attr)
+            tracker_origin = (panel_id, tracker_attr)
+            tracker_guided = (panel_id, tracker_attr.rsplit('.', 1)[0] + '.guided')
+
+        if element['guided'] >= 0:
+            active_guided_id, active_guided_attr, _, tracker_attr = index.connection(element['guided'])
+            active_guided = (active_guided_id, active_guided_attr)
+            tracker_guided = (panel_id, tracker_attr)
+            active_guided_source = index.source(active_guided_id, active_guided_attr)
+            if tracker_origin is None:
+                # the origin isn't connected, so it doesn't appear in the file,
+                #   but it's the guided sibling's neighbour in the same element
+                tracker_origin = (panel_id, tracker_attr.rsplit('.', 1)[0] + '.origin')
+
+        if active_origin is None and active_guided_source is None:
+            return None
+
+        return cls(tracker_origin, tracker_guided, active_origin, active_guided, active_guided_source)
+
+
+    def as_dict(self, index):
+        """
+        :param index: `SceneIndex`
+        :return: `dict` same layout as the plugin's SwapOperation.asDict()
+        """
+        op_dict = {'op': self.kind}
+        for k, plug in zip(self.PLUG_KEYS, (self.tracker_origin, self.tracker_guided, self.active_origin,
+                                            self.active_guided, self.active_guided_source)):
+            op_dict[k] = plug_name(index, plug)
+        return op_dict
+
+
+    def queue_on(self, edit):
+        """
+        :param edit: `SceneEdit`
+        :return: `None`
+        """
+        if self.kind == SWAP_OP_CONNECT:
+            edit.connect(self.active_origin, self.active_guided)
+            edit.disconnect(self.active_origin, self.tracker_origin)
+
+        elif self.kind == SWAP_OP_DISCONNECT:
+            edit.disconnect(self.active_guided_source, self.active_guided)
+            edit.connect(self.active_guided_source, self.tracker_origin)
+
+        elif self.kind == SWAP_OP_SWAP:
+            edit.disconnect(self.active_origin, self.tracker_origin)
+            edit.disconnect(self.active_guided_source, self.active_guided)
+            edit.connect(self.active_guided_source, self.tracker_origin)
+            edit.connect(self.active_origin, self.active_guided)
+
+        else:
+            raise RuntimeError("WTF, mate?!")
+
+
+def node_ref(index, node_id):
+    """
+    :return: `str` the shortest name a statement can use to refer to the node unambiguously
+    """
+    name = index.node_names[node_id]
+    if index.is_placeholder(node_id):
+        return ':' + name
+    if len(index.nodes_named(name)) == 1:
+        return name
+    return index.node_path(node_id)
+
+
+def plug_name(index, plug):
+    """
+    :param plug: (`int`, `str`) | None
+    :return: `str` "node.attr", or an empty string for None
+    """
+    if plug is None:
+        return ''
+    return '{}.{}'.format(node_ref(index, plug[0]), plug[1])
+
+
+def plan_swap(index, panel_id):
+    """
+    Offline counterpart of the plugin's planSwapFromPanel()
+    :param index: `SceneIndex`
+    :param panel_id: `int` the tool parameters node of a component
+    :return: `list` of `SwapOperation`
+    """
+    ops = []
+    for _, element in index.swap_elements(panel_id):
+        op = SwapOperation.from_element(index, panel_id, element)
+        if op is not None:
+            ops.append(op)
+    return ops
+
+
+class SceneEdit(object):
+    """
+    Pending edits to a parsed scene, applied when the scene is written out.
+    Much like an MDagModifier nothing in the index changes, edits are only queued.
+    """
+    def __init__(self, index):
+        self.index = index
+        self.removed_nodes = set()
+        self.removed_connections = set() # connection ids in the index
+        self.added_connections = [] # (src plug, dst plug) in the order they were made
+
+
+    def connect(self, src, dst):
+        """
+        :param src: (`int`, `str`) source plug
+        :param dst: (`int`, `str`) destination plug
+        :return: `None`
+        """
+        self.added_connections.append((src, dst))
+
+
+    def disconnect(self, src, dst):
+        """
+        :param src: (`int`, `str`) source plug
+        :param dst: (`int`, `str`) destination plug
+        :return: `None`
+        """
+        if (src, dst) in self.added_connections:
+            self.added_connections.remove((src, dst))
+            return
+
+        for conn_id in self.index.incoming(dst[0]):
+            if conn_id in self.removed_connections:
+                continue
+            src_id, src_attr, _, dst_attr = self.index.connection(conn_id)
+            if (src_id, src_attr) == src and dst_attr == dst[1]:
+                self.removed_connections.add(conn_id)
+                return
+
+        raise RuntimeError("{} isn't connected to {}".format(plug_name(self.index, src),
+                                                             plug_name(self.index, dst)))
+
+
+    def delete_nodes(self, node_ids):
+        """
+        Deletes nodes, DAG nodes take their hierarchy with them
+        :param node_ids: `iterable` of `int`
+        :return: `int` number of nodes deleted, descendants included
+        """
+        children = {}
+        for each_id, parent_id in enumerate(self.index.node_parents):
+            if parent_id >= 0:
+                children.setdefault(parent_id, []).append(each_id)
+
+        to_visit = list(node_ids)
+        deleted_count = 0
+        while to_visit:
+            node_id = to_visit.pop()
+            if node_id in self.removed_nodes:
+                continue
+            self.removed_nodes.add(node_id)
+            deleted_count += 1
+            to_visit.extend(children.get(node_id, ()))
+
+            self.removed_connections.update(self.index.incoming(node_id))
+            self.removed_connections.update(self.index.outgoing(node_id))
+
+        self.added_connections = [(src, dst) for src, dst in self.added_connections
+                                  if src[0] not in self.removed_nodes and dst[0] not in self.removed_nodes]
+        return deleted_count
+
+
+    def __references_removed(self, raw, quoted_limit=None):
+        # with a quoted_limit only the leading plug is looked at, string values that follow
+        #   it can't be mistaken for node names, and large data isn't tokenized for nothing
+        tokens = parser.tokenize(raw.decode(self.index.codec, 'replace'), quoted_limit)
+        for is_quoted, value in tokens:
+            if not is_quoted:
+                continue
+            node_id = self.index.find(parser.split_plug(value)[0])
+            if node_id >= 0 and node_id in self.removed_nodes:
+                return True
+        return False
+
+
+    def write(self, out_stream):
+        """
+        Streams the edited scene out
+        :param out_stream: `file` binary stream to write to
+        :return: `int` number of statements dropped
+        """
+        index = self.index
+        removed_offsets = set(index.node_offsets[node_id] for node_id in self.removed_nodes)
+        removed_offsets.update(index.conn_offsets[conn_id] for conn_id in self.removed_connections)
+        insert_after = max(index.conn_offsets) if len(index.conn_offsets) else -1
+
+        dropped_count = 0
+        with io.open(index.path, 'rb') as stream, io.open(index.path, 'rb') as gap_stream:
+            newline = b'\r\n' if gap_stream.readline().endswith(b'\r\n') else b'\n'
+            gap_stream.seek(0)
+
+            pos = 0
+            in_removed_node = False
+            for offset, raw in parser.iter_statements(stream):
+                # indentation only goes out with the statement it belongs to
+                gap = gap_stream.read(offset - pos)
+                line_break = gap.rfind(b'\n') + 1
+                out_stream.write(gap[:line_break])
+                gap_stream.seek(offset + len(raw))
+                pos = offset + len(raw)
+
+                command = raw.split(None, 1)[0].rstrip(b';')
+                if command == b'createNode':
+                    in_removed_node = offset in removed_offsets
+                    drop = in_removed_node
+                elif command == b'select':
+                    names = [value for is_quoted, value in parser.tokenize(raw.decode(index.codec, 'replace'))[1:]
+                             if is_quoted or not value.startswith('-')]
+                    in_removed_node = bool(names) and index.find(names[-1]) in self.removed_nodes
+                    drop = in_removed_node
+                elif command in NODE_SCOPED_COMMANDS:
+                    drop = in_removed_node or self.__references_removed(raw, quoted_limit=1)
+                elif command == b'connectAttr':
+                    drop = offset in removed_offsets
+                elif command in NODE_REFERENCING_COMMANDS:
+                    drop = self.__references_removed(raw)
+                else:
+                    drop = False
+
+                if drop:
+                    dropped_count += 1
+                    # take the line break following the statement along with it
+                    if gap_stream.read(len(newline)) == newline:
+                        pos += len(newline)
+                    else:
+                        gap_stream.seek(pos)
+                else:
+                    out_stream.write(gap[line_break:])
+                    out_stream.write(raw)
+
+                if offset == insert_after:
+                    self.__write_connections(out_stream, newline, leading=not drop)
+
+            if insert_after < 0:
+                self.__write_connections(out_stream, newline, leading=True)
+            out_stream.write(gap_stream.read())
+
+        return dropped_count
+
+
+    def __write_connections(self, out_stream, newline, leading):
+        for i, (src, dst) in enumerate(self.added_connections):
+            statement = 'connectAttr "{}" "{}";'.format(plug_name(self.index, src),
+                                                       plug_name(self.index, dst))
+            if leading or i:
+                out_stream.write(newline)
+            out_stream.write(statement.encode(self.index.codec))
+        if self.added_connections and not leading:
+            out_stream.write(newline)
+
+
+def components_from_index(index, names=None):
+    """
+    :param index: `SceneIndex`
+    :param names: `iterable` of `str` | None component names to limit to, all if None
+    :return: `list` of `dict` as returned by SceneIndex.important_objects()
+    """
+    wanted = set(names) if names else None
+    found = []
+    for container_id in index.containers():
+        key_obs = index.important_objects(container_id)
+        if key_obs['toolParameters'] < 0 and key_obs['guide'] < 0:
+            continue
+        if wanted is not None and key_obs['componentName'] not in wanted:
+            continue
+        found.append(key_obs)
+    return found
+
+
+def plan_as_json(index, plan, **kwargs):
+    """
+    :param plan: `list` of (`str`, `list` of `SwapOperation`) per component
+    :param kwargs: forwarded to json.dumps()
+    :return: `str` JSON in the same layout as the plugin's SwapPlan.toJson()
+    """
+    return json.dumps({'version': PLAN_VERSION,
+                       'components': [{'component': component_name,
+                                       'operations': [op.as_dict(index) for op in ops]}
+                                      for component_name, ops in plan]},
+                      **kwargs)
+
+
+def guide_control(index, components=None, swap=False, remove_dg=False, remove_dag=False):
+    """
+    Applies the swapGuideControl command phases to a parsed scene
+    :param index: `SceneIndex`
+    :param components: `iterable` of `str` | None component names to limit to, all if None
+    :param swap: `bool` same as -sw
+    :param remove_dg: `bool` same as -rd
+    :param remove_dag: `bool` same as -rg
+    :return: (`SceneEdit`, `list`, `list`) the pending edit, the plan as (componentName, ops) tuples,
+               and per component results as strings formatted like the plugin's
+    """
+    comp_dicts = components_from_index(index, components)
+    comp_results = [{'swapped': 0, 'removedDG': 0, 'removedDAG': 0} for _ in comp_dicts]
+    edit = SceneEdit(index)
+
+    plan = []
+    if swap:
+        for comp_dict, comp_result in zip(comp_dicts, comp_results):
+            if comp_dict['toolParameters'] < 0:
+                continue
+            ops = plan_swap(index, comp_dict['toolParameters'])
+            comp_result['swapped'] = len(ops)
+            plan.append((comp_dict['componentName'], ops))
+
+        for _, ops in plan:
+            for op in ops:
+                op.queue_on(edit)
+
+    to_remove = []
+    if remove_dg:
+        for comp_dict, comp_result in zip(comp_dicts, comp_results):
+            if comp_dict['toolParameters'] < 0:
+                continue
+            flagged = index.flagged_nodes(comp_dict['toolParameters'])
+            comp_result['removedDG'] = len(flagged)
+            to_remove.extend(flagged)
+
+    if remove_dag:
+        for comp_dict, comp_result in zip(comp_dicts, comp_results):
+            if comp_dict['guide'] >= 0:
+                comp_result['removedDAG'] = 1
+                to_remove.append(comp_dict['guide'])
+
+    edit.delete_nodes(to_remove)
+
+    results = ['{} swapped={} removedDG={} removedDAG={}'.format(comp_dict['componentName'],
+                                                                 comp_result['swapped'],
+                                                                 comp_result['removedDG'],
+                                                                 comp_result['removedDAG'])
+               for comp_dict, comp_result in zip(comp_dicts, comp_results)]
+    return edit, plan, results
+
+
+def process_file(in_path, out_path=None, components=None, swap=False,
+                 remove_dg=False, remove_dag=False, dry_run=False):
+    """
+    Parses, edits and writes a scene in one go
+    :param in_path: `str`
+    :param out_path: `str | None` where to write the edited scene, required unless dry_run
+    :param dry_run: `bool` only plan the swap and return it as JSON, same as -dr
+    :return: `list` of `str` | `str` per component results, or the plan as JSON for a dry run
+    """
+    index = parser.parse_scene(in_path)
+    edit, plan, results = guide_control(index, components, swap=swap or dry_run,
+                                        remove_dg=remove_dg and not dry_run,
+                                        remove_dag=remove_dag and not dry_run)
+    if dry_run:
+        return plan_as_json(index, plan, indent=2)
+
+    with io.open(out_path, 'wb') as out_stream:
+        edit.write(out_stream)
+    return results
+
+
+def main(argv=None):
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0].strip())
+    arg_parser.add_argument('scene', help=".ma file to read")
+    arg_parser.add_argument('-o', '--output', help=".ma file to write, required unless -dr is used")
+    arg_parser.add_argument('-c', '--component', action='append', help="component name, can be repeated, defaults to all")
+    arg_parser.add_argument('-sw', '--swapPlugs', action='store_true')
+    arg_parser.add_argument('-rd', '--removeDG', action='store_true')
+    arg_parser.add_argument('-rg', '--removeDAG', action='store_true')
+    arg_parser.add_argument('-dr', '--dryRun', action='store_true')
+    args = arg_parser.parse_args(argv)
+
+    if not args.dryRun and not args.output:
+        arg_parser.error("an output file is required unless -dr is used")
+
+    result = process_file(args.scene, args.output, args.component, swap=args.swapPlugs,
+                          remove_dg=args.removeDG, remove_dag=args.removeDAG, dry_run=args.dryRun)
+    if args.dryRun:
+        print(result)
+    else:
+        for each_line in result:
+            print(each_line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Parses a single large .ma file across several processes.
+
+The file is cut in chunks at lines starting with createNode at column zero.
+Maya only ever writes those at the start of a statement, since strings can't
+  span lines and continuation lines are indented, so every chunk holds whole statements.
+Workers split and tokenize their chunk, which is where the time goes,
+  and send back only what the index needs from each statement.
+The main process then applies the statements chunk after chunk in file order,
+  so the result is identical to what parse_scene() builds in a single pass.
+
+Small files aren't worth the process overhead and are parsed serially.
+
+Can be run from the command line to time both ways on the same file:
+  python -m Maya.ascii_scene.parallel path/to/scene.ma -w 8
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import io
+import multiprocessing
+import os
+import sys
+
+from . import parser
+
+
+BOUNDARY_PREFIX = b'createNode '
+MIN_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def chunk_boundaries(path, chunk_count, min_chunk_size=MIN_CHUNK_SIZE):
+    """
+    :param path: `str`
+    :param chunk_count: `int` how many chunks are wanted at most
+    :param min_chunk_size: `int` chunks aren't made smaller than this many bytes
+    :return: `list` of (`int`, `int | None`) start and end offsets, the last end is None
+    """
+    size = os.path.getsize(path)
+    chunk_count = max(1, min(chunk_count, size // max(1, min_chunk_size)))
+
+    starts = [0]
+    with io.open(path, 'rb') as stream:
+        for i in range(1, chunk_count):
+            target = size * i // chunk_count
+            if target <= starts[-1]:
+                continue
+            stream.seek(target)
+            stream.readline() # most likely half a line, the next one is the first whole one
+            pos = stream.tell()
+            for line in iter(stream.readline, b''):
+                if line.startswith(BOUNDARY_PREFIX):
+                    break
+                pos += len(line)
+            else:
+                break # nothing left to split at
+            if pos > starts[-1]:
+                starts.append(pos)
+
+    return list(zip(starts, starts[1:] + [None]))
+
+
+def parse_chunk(args):
+    """
+    Worker side of the parallel parse
+    :param args: (`str`, `str`, `int`, `int | None`) path, codec, start and end offsets
+    :return: (`int`, `list`) number of statements in the chunk, and (offset, length, command, tokens)
+               for the statements the index cares about
+    """
+    path, codec, start, end = args
+    statement_count = 0
+    records = []
+    with io.open(path, 'rb') as stream:
+        for offset, raw in parser.iter_statements(stream, start, end):
+            statement_count += 1
+            command, tokens = parser.parse_statement(raw, codec)
+            if tokens is not None:
+                records.append((offset, len(raw), command, tokens))
+    return statement_count, records
+
+
+def parse_scene_parallel(path, workers=None, min_chunk_size=MIN_CHUNK_SIZE):
+    """
+    Drop in replacement for parser.parse_scene() on large files
+    :param path: `str`
+    :param workers: `int | None` processes to use, defaults to the CPU count
+    :param min_chunk_size: `int` see chunk_boundaries()
+    :return: `SceneIndex`
+    """
+    workers = workers or multiprocessing.cpu_count()
+    chunks = chunk_boundaries(path, workers * 4, min_chunk_size) if workers > 1 else [(0, None)]
+    if len(chunks) == 1:
+        return parser.parse_scene(path)
+
+    with io.open(path, 'rb') as stream:
+        codec = parser.codec_from_header(stream)
+    index = parser.SceneIndex(path, codec)
+
+    pool = multiprocessing.Pool(min(workers, len(chunks)))
+    try:
+        # imap hands results back in chunk order, so they can be applied as they come
+        for statement_count, records in pool.imap(parse_chunk, [(path, codec, start, end) for start, end in chunks]):
+            for offset, length, command, tokens in records:
+                index.apply_statement(offset, length, command, tokens)
+            index.statement_count += statement_count - len(records)
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    return index
+
+
+# every table SceneIndex builds, what two indices of the same file have to agree on
+COMPARED_TABLES = ('strings', 'node_names', 'node_types', 'node_parents', 'node_uids', 'node_offsets',
+                   'conn_src', 'conn_src_attr', 'conn_dst', 'conn_dst_attr', 'conn_offsets', 'conn_lengths',
+                   'setattr_node', 'setattr_attr', 'setattr_offsets', 'setattr_lengths',
+                   'addattr_node', 'addattr_long', 'addattr_short', 'addattr_parent', 'addattr_type',
+                   'requires', 'extra_parents', 'undeclared_nodes', 'statement_count')
+
+
+def indices_match(first, second):
+    """
+    :param first: `SceneIndex`
+    :param second: `SceneIndex`
+    :return: `bool` True if every table in both is the same
+    """
+    for name in COMPARED_TABLES:
+        first_table = getattr(first, name)
+        second_table = getattr(second, name)
+        if isinstance(first_table, int):
+            if first_table != second_table:
+                return False
+        elif list(first_table) != list(second_table):
+            return False
+    return True
+
+
+def main(argv=None):
+    import argparse
+    from timeit import default_timer
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0].strip())
+    arg_parser.add_argument('scene')
+    arg_parser.add_argument('-w', '--workers', type=int)
+    arg_parser.add_argument('--min-chunk', type=int, default=MIN_CHUNK_SIZE, help="smallest chunk in bytes")
+    args = arg_parser.parse_args(argv)
+
+    start = default_timer()
+    serial = parser.parse_scene(args.scene)
+    serial_time = default_timer() - start
+
+    start = default_timer()
+    parallel = parse_scene_parallel(args.scene, args.workers, args.min_chunk)
+    parallel_time = default_timer() - start
+
+    print('serial   {:.3f}s'.format(serial_time))
+    print('parallel {:.3f}s'.format(parallel_time))
+    if not indices_match(serial, parallel):
+        print('DIFFERENT')
+        return 1
+    print('identical')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,927 @@
+"""
+A streaming parser and index for Maya ASCII (.ma) scenes that doesn't need Maya.
+
+The file is read once, line by line, and split into statements at every semicolon
+  that isn't inside a quoted string, so memory is bounded by the largest single
+  statement rather than by the size of the file.
+Only the statements that describe the structure of the scene are kept:
+  createNode (type, name, parent, uid), connectAttr, setAttr, addAttr and requires.
+setAttr values aren't decoded, only the byte span of the statement is recorded,
+  so values can be read back from the file on demand.
+
+Everything is stored in flat, parallel tables indexed by integer ids, with all
+  repeated strings (types, attribute names) interned once in a string table.
+Nodes that are only referenced, like Maya's default nodes (:time1, :renderPartition etc.),
+  get a placeholder entry with an empty type and no statement.
+
+Can be run from the command line to print a summary of a scene:
+  python -m Maya.ascii_scene.parser path/to/scene.ma
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import io
+import re
+import sys
+from array import array
+
+try:
+    array('q')
+    OFFSET_TYPECODE = 'q'
+except ValueError: # Python 2 has no long long arrays
+    OFFSET_TYPECODE = 'l'
+
+
+# Attribute names come in short and long flavours depending on who saved the file,
+#   these are the few the queries below need to recognise
+MESSAGE_ATTRS = frozenset(('msg', 'message'))
+HYPERLAYOUT_ATTRS = frozenset(('hl', 'hyperLayout'))
+HYPERPOSITION_ATTRS = frozenset(('hyp', 'hyperPosition'))
+DEPENDNODE_ATTRS = frozenset(('dn', 'dependNode'))
+
+CONTAINER_TYPES = frozenset(('container', 'dagContainer'))
+HYPERLAYOUT_TYPE = 'hyperLayout'
+
+CODESETS = {'1252': 'cp1252', 'UTF-8': 'utf-8', 'utf-8': 'utf-8', '65001': 'utf-8', '932': 'cp932'}
+DEFAULT_CODEC = 'utf-8'
+
+
+_STATEMENT_TOKEN = re.compile(br'"(?:[^"\\\n]|\\.)*"|;')
+_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|([^\s;]+)')
+_UNESCAPE = re.compile(r'\\(.)')
+_UNESCAPED = {'n': '\n', 't': '\t', 'r': '\r'}
+
+
+def codec_from_header(stream):
+    """
+    Reads the //Codeset: comment at the top of the file, if any
+    :param stream: `file` binary stream positioned at the start of the file
+    :return: `str` a Python codec name
+    """
+    for line in stream:
+        if not line.startswith(b'//'):
+            break
+        if line.startswith(b'//Codeset:'):
+            codeset = line.split(b':', 1)[1].strip().decode('ascii', 'replace')
+            return CODESETS.get(codeset, DEFAULT_CODEC)
+    return DEFAULT_CODEC
+
+
+def iter_statements(stream, start=0, end=None):
+    """
+    Splits a binary stream in statements.
+    Statements are yielded as raw bytes from their first non blank character
+      to their closing semicolon included, whatever is in between statements
+      (blanks, comments) is left out, but offsets make it possible to recover it.
+    :param stream: `file` seekable binary stream
+    :param start: `int` byte offset to start from, must be at the start of a line
+    :param end: `int | None` no statement starting at or after this offset is yielded
+    :return: `generator` of (`int`, `bytes`) tuples, offset and raw statement
+    """
+    stream.seek(start)
+    pos = start
+
+    pending = []
+    stmt_start = -1
+
+    for line in stream:
+        line_start = pos
+        pos += len(line)
+
+        if stmt_start < 0:
+            stripped = line.lstrip()
+            if not stripped or stripped.startswith(b'//'):
+                continue
+            cursor = len(line) - len(stripped)
+        else:
+            cursor = 0
+
+        if b';' not in line:
+            # by far the most common case for long statements spanning many lines
+            if stmt_start < 0:
+                stmt_start = line_start + cursor
+                if end is not None and stmt_start >= end:
+                    return
+            pending.append(line[cursor:])
+            continue
+
+        for m in _STATEMENT_TOKEN.finditer(line, cursor):
+            if m.group(0) != b';':
+                continue # a quoted string, semicolons inside it don't count
+
+            if stmt_start < 0:
+                stmt_start = line_start + cursor
+                if end is not None and stmt_start >= end:
+                    return
+            pending.append(line[cursor:m.end()])
+            yield stmt_start, b''.join(pending)
+
+            pending = []
+            stmt_start = -1
+            cursor = m.end()
+            while cursor < len(line) and line[cursor:cursor + 1].isspace():
+                cursor += 1
+
+        if cursor < len(line):
+            if stmt_start < 0:
+                stmt_start = line_start + cursor
+                if end is not None and stmt_start >= end:
+                    return
+            pending.append(line[cursor:])
+
+    if pending:
+        # an unterminated trailing statement, we still report it
+        yield stmt_start, b''.join(pending)
+
+
+def _unescape(text):
+    if '\\' not in text:
+        return text
+    return _UNESCAPE.sub(lambda m: _UNESCAPED.get(m.group(1), m.group(1)), text)
+
+
+def tokenize(text, quoted_limit=None):
+    """
+    Splits a statement in tokens, honouring quotes and joining "a" + "b" concatenations
+    :param text: `str` a single statement
+    :param quoted_limit: `int | None` stop after this many quoted tokens, e.g. 1 to get
+                                      a setAttr's attribute without going through its data
+    :return: `list` of (`bool`, `str`) tuples, whether the token was quoted, and its value
+    """
+    tokens = []
+    join_next = False
+    quoted_count = 0
+    for m in _TOKEN.finditer(text):
+        quoted, bare = m.groups()
+        if bare is not None:
+            if bare == '+' and tokens and tokens[-1][0]:
+                join_next = True
+                continue
+            if quoted_count == quoted_limit:
+                break
+            tokens.append((False, bare))
+        else:
+            value = _unescape(quoted)
+            if join_next:
+                tokens[-1] = (True, tokens[-1][1] + value)
+            elif quoted_count == quoted_limit:
+                break
+            else:
+                tokens.append((True, value))
+                quoted_count += 1
+        join_next = False
+    return tokens
+
+
+def _flag_value(tokens, *flags):
+    # value of the first unquoted occurrence of any of the flags, None if absent
+    for i in range(len(tokens) - 1):
+        is_quoted, value = tokens[i]
+        if not is_quoted and value in flags:
+            return tokens[i + 1][1]
+    return None
+
+
+def _quoted(tokens):
+    return [value for is_quoted, value in tokens if is_quoted]
+
+
+def split_plug(plug_name):
+    """
+    :param plug_name: `str` e.g. "|grp|node.attr[0].child" or ":time1.o"
+    :return: (`str`, `str`) node name and attribute path
+    """
+    node_name, _, attr = plug_name.partition('.')
+    return node_name, attr
+
+
+def attr_root(attr):
+    """
+    :param attr: `str` an attribute path like "tgi[0].ni[1].dn"
+    :return: `str` the top level attribute name without indices, e.g. "tgi"
+    """
+    return attr.split('.', 1)[0].split('[', 1)[0]
+
+
+def attr_leaf(attr):
+    """
+    :param attr: `str` an attribute path like "hyp[3].dn"
+    :return: `str` the last attribute name without indices, e.g. "dn"
+    """
+    return attr.rsplit('.', 1)[-1].split('[', 1)[0]
+
+
+def _grouped_rows(node_count, column):
+    """
+    Compressed rows over a column of node ids, a counting sort of the positions by node id
+    :param node_count: `int`
+    :param column: `array` of node ids, -1 included
+    :return: (`array`, `array`) start and ids, positions holding node n are ids[start[n + 1]:start[n + 2]],
+               -1 gets the first row
+    """
+    start = array('i', [0]) * (node_count + 2)
+    for node_id in column:
+        start[node_id + 2] += 1
+    for i in range(node_count + 1):
+        start[i + 1] += start[i]
+
+    fill = array('i', start)
+    ids = array('i', [0]) * len(column)
+    for position, node_id in enumerate(column):
+        slot = fill[node_id + 1]
+        ids[slot] = position
+        fill[node_id + 1] = slot + 1
+    return start, ids
+
+
+class SceneIndex(object):
+    """
+    Compact tables for the structure of a single scene, see module docstring.
+    Node, connection, setAttr and addAttr ids are just positions in their tables.
+    """
+    def __init__(self, path=None, codec=DEFAULT_CODEC):
+        self.path = path
+        self.codec = codec
+
+        # string table, every type and attribute name is stored once
+        self.strings = []
+        self._string_ids = {}
+
+        # nodes
+        self.node_names = []
+        self.node_types = array('i')
+        self.node_parents = array('i')
+        self.node_uids = []
+        self.node_offsets = array(OFFSET_TYPECODE) # -1 for placeholders
+        self._node_paths = []
+
+        # connections
+        self.conn_src = array('i')
+        self.conn_src_attr = array('i')
+        self.conn_dst = array('i')
+        self.conn_dst_attr = array('i')
+        self.conn_offsets = array(OFFSET_TYPECODE)
+        self.conn_lengths = array('i')
+
+        # setAttr statements
+        self.setattr_node = array('i')
+        self.setattr_attr = array('i')
+        self.setattr_offsets = array(OFFSET_TYPECODE)
+        self.setattr_lengths = array('i')
+
+        # addAttr statements, parent and type are -1 when not specified
+        self.addattr_node = array('i')
+        self.addattr_long = array('i')
+        self.addattr_short = array('i')
+        self.addattr_parent = array('i')
+        self.addattr_type = array('i')
+
+        # requires statements as (plugin, version, (node types, ...))
+        self.requires = []
+
+        # extra parents from parent -add statements, (child id, parent id)
+        self.extra_parents = []
+
+        # placeholders referred to without the leading colon Maya writes default nodes with,
+        #   which usually means the file refers to something it never created
+        self.undeclared_nodes = []
+
+        self.statement_count = 0
+
+        self._by_name = {}
+        self._by_path = {}
+        self._by_uid = {}
+        self._by_type = {}
+        self._incoming = None
+        self._outgoing = None
+        self._row_index = {} # column name -> (column and node count, start, ids), see _rows()
+        self._current = -1
+
+
+    # strings
+    def intern(self, text):
+        """
+        :param text: `str`
+        :return: `int` id of the string in the string table
+        """
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = self._string_ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+
+    def string_id(self, text):
+        """
+        :param text: `str`
+        :return: `int | None` id of the string in the string table, None if it isn't in it
+        """
+        return self._string_ids.get(text)
+
+
+    # ownership, a parsed index holds nothing but a cached one keeps its file mapped
+    def close(self):
+        pass
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+
+    # nodes
+    def node_count(self):
+        return len(self.node_names)
+
+
+    def node_type(self, node_id):
+        return self.strings[self.node_types[node_id]]
+
+
+    def node_path(self, node_id):
+        """
+        :return: `str` full DAG path, or |name for DG nodes and placeholders
+        """
+        return self._node_paths[node_id]
+
+
+    def is_placeholder(self, node_id):
+        return self.node_offsets[node_id] < 0
+
+
+    def add_node(self, name, node_type, parent_id=-1, offset=-1):
+        """
+        Adds a node to the tables, statements do it through createNode,
+          but an index can also be filled from elsewhere, e.g. a live scene
+        :param name: `str` short name
+        :param node_type: `str` an empty string for placeholders
+        :param parent_id: `int` DAG parent, -1 for DG nodes and nodes directly under world
+        :param offset: `int` byte offset of the createNode statement, -1 for placeholders
+        :return: `int` node id
+        """
+        node_id = len(self.node_names)
+        self.node_names.append(name)
+        self.node_types.append(self.intern(node_type))
+        self.node_parents.append(parent_id)
+        self.node_uids.append('')
+        self.node_offsets.append(offset)
+
+        if parent_id >= 0:
+            path = '{}|{}'.format(self._node_paths[parent_id], name)
+        else:
+            path = '|' + name
+        self._node_paths.append(path)
+
+        self._by_name.setdefault(name, []).append(node_id)
+        self._by_path[path] = node_id
+        self._by_type.setdefault(self.node_types[node_id], []).append(node_id)
+        return node_id
+
+
+    def find(self, name):
+        """
+        Resolves a node the way a statement in the file would refer to it
+        :param name: `str` short name, partial or full DAG path, or :name for default nodes
+        :return: `int` node id, -1 if not found
+        """
+        if name.startswith(':') and '|' not in name:
+            name = name[1:]
+
+        if '|' not in name:
+            candidates = self._by_name.get(name)
+            return candidates[0] if candidates else -1
+
+        if name.startswith('|'):
+            return self._by_path.get(name, -1)
+
+        # partial path, the short name narrows it down and the path suffix decides
+        suffix = '|' + name
+        for each_id in self._by_name.get(name.rsplit('|', 1)[-1], ()):
+            if self._node_paths[each_id].endswith(suffix):
+                return each_id
+        return -1
+
+
+    def resolve(self, name):
+        """
+        Like find(), but nodes the file doesn't create get a placeholder instead of -1
+        :param name: `str`
+        :return: `int` node id
+        """
+        node_id = self.find(name)
+        if node_id < 0:
+            node_id = self.add_node(name.lstrip(':').rsplit('|', 1)[-1], '', -1, -1)
+            if not name.startswith(':'):
+                self.undeclared_nodes.append(node_id)
+        return node_id
+
+
+    def nodes_named(self, name):
+        """
+        :param name: `str` short name
+        :return: `list` of `int` node ids, more than one if the name isn't unique
+        """
+        return list(self._by_name.get(name, ()))
+
+
+    def nodes_of_type(self, node_type):
+        """
+        :param node_type: `str` e.g. "transform"
+        :return: `list` of `int` node ids
+        """
+        string_id = self.string_id(node_type)
+        return list(self._by_type.get(string_id, ())) if string_id is not None else []
+
+
+    def node_by_uid(self, uid):
+        """
+        :param uid: `str` as set by rename -uid
+        :return: `int` node id, -1 if not found
+        """
+        return self._by_uid.get(uid, -1)
+
+
+    def children(self, node_id):
+        """
+        :return: `list` of `int` node ids parented directly under node_id, -1 for world
+        """
+        return self._row('node_parents', node_id).tolist()
+
+
+    # per node rows over the columns
+    def _rows(self, column_name):
+        # built the first time a column is queried, and again only if it or the node table grew since
+        column = getattr(self, column_name)
+        sizes = (len(column), self.node_count())
+        rows = self._row_index.get(column_name)
+        if rows is None or rows[0] != sizes:
+            rows = self._row_index[column_name] = (sizes,) + _grouped_rows(sizes[1], column)
+        return rows[1], rows[2]
+
+
+    def _row(self, column_name, node_id):
+        """
+        :param column_name: `str` a column of node ids, e.g. node_parents or setattr_node
+        :param node_id: `int` a node id, or -1
+        :return: `array` positions in the column holding node_id, in order
+        """
+        start, ids = self._rows(column_name)
+        return ids[start[node_id + 1]:start[node_id + 2]]
+
+
+    # connections
+    def connection_count(self):
+        return len(self.conn_src)
+
+
+    def connection(self, conn_id):
+        """
+        :return: (`int`, `str`, `int`, `str`) source node, source attr, destination node, destination attr
+        """
+        return (self.conn_src[conn_id], self.strings[self.conn_src_attr[conn_id]],
+                self.conn_dst[conn_id], self.strings[self.conn_dst_attr[conn_id]])
+
+
+    def _build_adjacency(self):
+        self._incoming = {}
+        self._outgoing = {}
+        for conn_id in range(len(self.conn_src)):
+            self._outgoing.setdefault(self.conn_src[conn_id], []).append(conn_id)
+            self._incoming.setdefault(self.conn_dst[conn_id], []).append(conn_id)
+
+
+    def incoming(self, node_id):
+        """
+        :return: `list` of `int` ids of connections whose destination is on node_id
+        """
+        if self._incoming is None:
+            self._build_adjacency()
+        return self._incoming.get(node_id, [])
+
+
+    def outgoing(self, node_id):
+        """
+        :return: `list` of `int` ids of connections whose source is on node_id
+        """
+        if self._outgoing is None:
+            self._build_adjacency()
+        return self._outgoing.get(node_id, [])
+
+
+    def source(self, node_id, attr):
+        """
+        :param node_id: `int`
+        :param attr: `str` destination attribute path exactly as the file writes it
+        :return: (`int`, `str`) | None the plug connected into node_id.attr
+        """
+        attr_id = self.string_id(attr)
+        if attr_id is None:
+            return None
+        for conn_id in self.incoming(node_id):
+            if self.conn_dst_attr[conn_id] == attr_id:
+                return self.conn_src[conn_id], self.strings[self.conn_src_attr[conn_id]]
+        return None
+
+
+    # setAttr
+    def set_attrs(self, node_id):
+        """
+        :return: `list` of (`str`, `int`, `int`) attribute, offset and length of each setAttr on the node
+        """
+        return [(self.strings[self.setattr_attr[i]], self.setattr_offsets[i], self.setattr_lengths[i])
+                for i in self._row('setattr_node', node_id)]
+
+
+    def read_statement(self, offset, length):
+        """
+        Reads a statement back from the scene file
+        :return: `str`
+        """
+        with io.open(self.path, 'rb') as stream:
+            stream.seek(offset)
+            return stream.read(length).decode(self.codec, 'replace')
+
+
+    # containers and components
+    def container_members(self, container_id):
+        """
+        Follows container.hyperLayout <- layout.message and layout.hyperPosition[].dependNode <- member.message
+        :return: `list` of `int` member node ids
+        """
+        members = []
+        for conn_id in self.incoming(container_id):
+            if attr_leaf(self.strings[self.conn_dst_attr[conn_id]]) not in HYPERLAYOUT_ATTRS:
+                continue
+            layout_id = self.conn_src[conn_id]
+            if self.node_type(layout_id) != HYPERLAYOUT_TYPE:
+                continue
+            for layout_conn in self.incoming(layout_id):
+                dst_attr = self.strings[self.conn_dst_attr[layout_conn]]
+                if attr_root(dst_attr) in HYPERPOSITION_ATTRS and attr_leaf(dst_attr) in DEPENDNODE_ATTRS:
+                    members.append(self.conn_src[layout_conn])
+        return members
+
+
+    def container_of(self, node_id):
+        """
+        Offline counterpart of the plugin's containerFromNode()
+        :return: `int` the container node_id is a member of, -1 if none
+        """
+        for conn_id in self.outgoing(node_id):
+            if self.strings[self.conn_src_attr[conn_id]] not in MESSAGE_ATTRS:
+                continue
+            layout_id = self.conn_dst[conn_id]
+            if self.node_type(layout_id) != HYPERLAYOUT_TYPE:
+                continue
+            for layout_conn in self.outgoing(layout_id):
+                if self.strings[self.conn_src_attr[layout_conn]] not in MESSAGE_ATTRS:
+                    continue
+                if self.node_type(self.conn_dst[layout_conn]) in CONTAINER_TYPES:
+                    return self.conn_dst[layout_conn]
+        return -1
+
+
+    def containers(self):
+        """
+        :return: `list` of `int` ids of every container node
+        """
+        return [node_id for each_type in CONTAINER_TYPES for node_id in self.nodes_of_type(each_type)]
+
+
+    def components(self):
+        """
+        Same convention as is_component() in s01_d046_rigItemIteration:
+          a DAG node named *_cmpnt under a node named rig, two levels from world
+        :return: `list` of `int` component node ids
+        """
+        found = []
+        for node_id, name in enumerate(self.node_names):
+            if not name.endswith('_cmpnt'):
+                continue
+            rig_id = self.node_parents[node_id]
+            if rig_id < 0 or self.node_names[rig_id] != 'rig':
+                continue
+            top_id = self.node_parents[rig_id]
+            if top_id >= 0 and self.node_parents[top_id] < 0:
+                found.append(node_id)
+        return found
+
+
+    def attr_aliases(self, node_id, name):
+        """
+        Dynamic attributes can be written with either their long or short name,
+          the addAttr statements on the node tell us both
+        :param node_id: `int`
+        :param name: `str` long or short attribute name
+        :return: `frozenset` of `str` every name the attribute can be found under
+        """
+        names = set((name,))
+        name_id = self.string_id(name)
+        if name_id is None:
+            return frozenset(names)
+        for i in self._row('addattr_node', node_id):
+            if name_id in (self.addattr_long[i], self.addattr_short[i]):
+                names.add(self.strings[self.addattr_long[i]])
+                names.add(self.strings[self.addattr_short[i]])
+        return frozenset(names)
+
+
+    def important_objects(self, container_id):
+        """
+        Offline counterpart of the plugin's importantObjectsFromContainer()
+        :param container_id: `int`
+        :return: `dict` componentName, and control, guide, deform and toolParameters node ids, -1 if missing
+        """
+        component_name = self.node_names[container_id].rsplit('_', 1)[0]
+        key_obs = {'componentName': component_name,
+                   'control': -1,
+                   'guide': -1,
+                   'deform': -1,
+                   'toolParameters': -1,
+                   }
+
+        panel_name = '{}_toolParameters'.format(component_name)
+        for member_id in self.container_members(container_id):
+            name = self.node_names[member_id]
+            if name == panel_name:
+                key_obs['toolParameters'] = member_id
+            elif name in ('control', 'guide', 'deform'):
+                key_obs[name] = member_id
+        return key_obs
+
+
+    def flagged_nodes(self, panel_id):
+        """
+        Offline counterpart of the plugin's flaggedNodesFromComponent()
+        :param panel_id: `int` a tool parameters node
+        :return: `list` of `int` ids of the nodes connected into its toDelete elements
+        """
+        to_delete = self.attr_aliases(panel_id, 'toDelete')
+        return [self.conn_src[conn_id] for conn_id in self.incoming(panel_id)
+                if attr_root(self.strings[self.conn_dst_attr[conn_id]]) in to_delete]
+
+
+    def swap_elements(self, panel_id):
+        """
+        Groups the connections into a tool parameters toSwap array by element
+        :param panel_id: `int` a tool parameters node
+        :return: `list` of (`int`, `dict`) element index and {origin: conn_id, guided: conn_id},
+                   ordered by index, a conn_id of -1 means that child isn't connected
+        """
+        to_swap = self.attr_aliases(panel_id, 'toSwap')
+        origin = self.attr_aliases(panel_id, 'origin')
+        guided = self.attr_aliases(panel_id, 'guided')
+
+        elements = {}
+        for conn_id in self.incoming(panel_id):
+            dst_attr = self.strings[self.conn_dst_attr[conn_id]]
+            if attr_root(dst_attr) not in to_swap or '[' not in dst_attr:
+                continue
+            index = int(dst_attr.split('[', 1)[1].split(']', 1)[0])
+            leaf = attr_leaf(dst_attr)
+            element = elements.setdefault(index, {'origin': -1, 'guided': -1})
+            if leaf in origin:
+                element['origin'] = conn_id
+            elif leaf in guided:
+                element['guided'] = conn_id
+        return sorted(elements.items())
+
+
+    # statement handlers
+    def handle_statement(self, offset, raw):
+        """
+        Indexes a single raw statement as yielded by iter_statements()
+        :param offset: `int` byte offset of the statement in the file
+        :param raw: `bytes`
+        :return: `None`
+        """
+        command, tokens = parse_statement(raw, self.codec)
+        self.apply_statement(offset, len(raw), command, tokens)
+
+
+    def apply_statement(self, offset, length, command, tokens):
+        """
+        Indexes a statement already split by parse_statement().
+        This is the only part of indexing that depends on what came before in the file,
+          so statements have to be applied in the order they appear in.
+        :param offset: `int` byte offset of the statement in the file
+        :param length: `int` length of the raw statement
+        :param command: `bytes`
+        :param tokens: `list | None` as returned by parse_statement()
+        :return: `None`
+        """
+        self.statement_count += 1
+        if tokens is not None:
+            self._HANDLERS[command](self, offset, length, tokens)
+
+
+    def _on_create_node(self, offset, length, tokens):
+        name = _flag_value(tokens, '-n', '-name')
+        parent_name = _flag_value(tokens, '-p', '-parent')
+        parent_id = self.resolve(parent_name) if parent_name else -1
+        self._current = self.add_node(name or '', tokens[1][1], parent_id, offset)
+
+
+    def _on_rename(self, offset, length, tokens):
+        uid = _flag_value(tokens, '-uid', '-uuid')
+        if uid is not None:
+            if self._current >= 0:
+                self.node_uids[self._current] = uid
+                self._by_uid[uid] = self._current
+            return
+
+        names = _quoted(tokens)
+        if len(names) == 2:
+            node_id = self.find(names[0])
+            if node_id >= 0:
+                self._rename_node(node_id, names[1])
+
+
+    def _rename_node(self, node_id, new_name):
+        old_name = self.node_names[node_id]
+        self._by_name[old_name].remove(node_id)
+        self.node_names[node_id] = new_name
+        self._by_name.setdefault(new_name, []).append(node_id)
+
+        # paths of the node and anything under it need refreshing
+        old_path = self._node_paths[node_id]
+        new_path = old_path[:len(old_path) - len(old_name)] + new_name
+        for each_id in range(len(self._node_paths)):
+            each_path = self._node_paths[each_id]
+            if each_path == old_path or each_path.startswith(old_path + '|'):
+                del self._by_path[each_path]
+                self._node_paths[each_id] = new_path + each_path[len(old_path):]
+                self._by_path[self._node_paths[each_id]] = each_id
+
+
+    def _on_select(self, offset, length, tokens):
+        names = [value for is_quoted, value in tokens[1:] if is_quoted or not value.startswith('-')]
+        if names:
+            self._current = self.resolve(names[-1])
+
+
+    def _on_set_attr(self, offset, length, tokens):
+        attrs = _quoted(tokens)
+        if not attrs:
+            return
+        attr = attrs[0]
+        if attr.startswith('.'):
+            node_id = self._current
+            attr = attr[1:]
+        else:
+            node_name, attr = split_plug(attr)
+            node_id = self.resolve(node_name)
+        if node_id < 0:
+            return
+
+        self.setattr_node.append(node_id)
+        self.setattr_attr.append(self.intern(attr))
+        self.setattr_offsets.append(offset)
+        self.setattr_lengths.append(length)
+
+
+    def _on_add_attr(self, offset, length, tokens):
+        if self._current < 0:
+            return
+        long_name = _flag_value(tokens, '-ln', '-longName')
+        short_name = _flag_value(tokens, '-sn', '-shortName') or long_name
+        parent = _flag_value(tokens, '-p', '-parent')
+        attr_type = _flag_value(tokens, '-at', '-attributeType', '-dt', '-dataType')
+
+        self.addattr_node.append(self._current)
+        self.addattr_long.append(self.intern(long_name or short_name or ''))
+        self.addattr_short.append(self.intern(short_name or ''))
+        self.addattr_parent.append(self.intern(parent) if parent else -1)
+        self.addattr_type.append(self.intern(attr_type) if attr_type else -1)
+
+
+    def _on_connect_attr(self, offset, length, tokens):
+        plugs = _quoted(tokens)
+        if len(plugs) < 2:
+            return
+        src_node, src_attr = split_plug(plugs[0])
+        dst_node, dst_attr = split_plug(plugs[1])
+
+        self.add_connection(self.resolve(src_node), src_attr, self.resolve(dst_node), dst_attr, offset, length)
+
+
+    def add_connection(self, src_id, src_attr, dst_id, dst_attr, offset=-1, length=0):
+        """
+        Adds a connection to the tables, see add_node()
+        :param src_id: `int` source node
+        :param src_attr: `str` source attribute path
+        :param dst_id: `int` destination node
+        :param dst_attr: `str` destination attribute path
+        :param offset: `int` byte offset of the connectAttr statement, -1 if there is none
+        :param length: `int` length of the statement
+        :return: `int` connection id
+        """
+        self.conn_src.append(src_id)
+        self.conn_src_attr.append(self.intern(src_attr))
+        self.conn_dst.append(dst_id)
+        self.conn_dst_attr.append(self.intern(dst_attr))
+        self.conn_offsets.append(offset)
+        self.conn_lengths.append(length)
+        self._incoming = self._outgoing = None
+        return len(self.conn_src) - 1
+
+
+    def _on_requires(self, offset, length, tokens):
+        node_types = []
+        positional = []
+        i = 1
+        while i < len(tokens):
+            is_quoted, value = tokens[i]
+            if not is_quoted and value.startswith('-'):
+                if value in ('-nodeType', '-nt', '-dataType', '-dt') and i + 1 < len(tokens):
+                    if value in ('-nodeType', '-nt'):
+                        node_types.append(tokens[i + 1][1])
+                    i += 1
+            else:
+                positional.append(value)
+            i += 1
+
+        plugin = positional[0] if positional else ''
+        version = positional[1] if len(positional) > 1 else ''
+        self.requires.append((plugin, version, tuple(node_types)))
+
+
+    def _on_parent(self, offset, length, tokens):
+        names = _quoted(tokens)
+        if len(names) < 2:
+            return
+        self.extra_parents.append((self.resolve(names[0]), self.resolve(names[1])))
+
+
+    _HANDLERS = {
+        b'createNode': _on_create_node,
+        b'rename': _on_rename,
+        b'select': _on_select,
+        b'setAttr': _on_set_attr,
+        b'addAttr': _on_add_attr,
+        b'connectAttr': _on_connect_attr,
+        b'requires': _on_requires,
+        b'parent': _on_parent,
+    }
+
+
+    def summary(self):
+        """
+        :return: `dict` counts and requirements, JSON friendly
+        """
+        return {'path': self.path,
+                'statements': self.statement_count,
+                'nodes': self.node_count(),
+                'placeholders': sum(1 for offset in self.node_offsets if offset < 0),
+                'connections': self.connection_count(),
+                'setAttrs': len(self.setattr_node),
+                'addAttrs': len(self.addattr_node),
+                'requires': [list(each) for each in self.requires],
+                'containers': len(self.containers()),
+                'components': len(self.components()),
+                }
+
+
+HANDLED_COMMANDS = frozenset(SceneIndex._HANDLERS)
+
+
+def parse_statement(raw, codec=DEFAULT_CODEC):
+    """
+    Tokenizes a raw statement if it's one the index cares about.
+    It only depends on the statement itself, not on the rest of the file.
+    :param raw: `bytes` as yielded by iter_statements()
+    :param codec: `str`
+    :return: (`bytes`, `list | None`) the command, and its tokens or None if it's not indexed
+    """
+    # cheap dispatch on the command name before decoding anything
+    command = raw.split(None, 1)[0].rstrip(b';')
+    if command not in HANDLED_COMMANDS:
+        return command, None
+
+    # setAttr data can be huge, and all we need is the attribute
+    quoted_limit = 1 if command == b'setAttr' else None
+    return command, tokenize(raw.decode(codec, 'replace'), quoted_limit)
+
+
+def parse_scene(path):
+    """
+    Indexes a .ma file in a single pass
+    :param path: `str`
+    :return: `SceneIndex`
+    """
+    with io.open(path, 'rb') as stream:
+        codec = codec_from_header(stream)
+        index = SceneIndex(path, codec)
+        for offset, raw in iter_statements(stream):
+            index.handle_statement(offset, raw)
+    return index
+
+
+if __name__ == '__main__':
+    import json
+    for each_path in sys.argv[1:]:
+        print(json.dumps(parse_scene(each_path).summary(), indent=2, sort_keys=True))
@@ -0,0 +1,278 @@
+"""
+Estimates which components of a rig are the most expensive to evaluate.
+
+Works on a parsed .ma scene, or on the live scene when run inside Maya,
+  which is read into the same kind of index first.
+Every node is assigned to a component, using the same conventions the Season01
+  scripts use: a component is a *_cmpnt transform under the rig node, and it owns
+  its DAG hierarchy and the members of the container it belongs to.
+Nodes that aren't part of any component are reported under UNASSIGNED.
+
+For every component the report has:
+ * nodes: how many nodes it owns
+ * depth: longest chain of connections between its own nodes, in nodes
+ * maxFanOut: most distinct nodes a single one of its nodes feeds
+ * criticalPath: longest chain of connections through the whole rig
+                 that goes through the component, in nodes
+ * crossIn/crossOut: connections coming from, or going to, other components
+Cycles are collapsed into a single step as long as the cycle's size,
+  and message connections are ignored since they carry no evaluation.
+
+Components are ranked by critical path, then depth, then node count,
+  the top of the list is where evaluation time most likely goes.
+
+Can be run from the command line on a scene file:
+  python -m Maya.ascii_scene.rig_cost rig.ma
+or in Maya on the open scene:
+  from ascii_scene import rig_cost; print(rig_cost.format_report(rig_cost.profile_live_scene()))
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import sys
+from array import array
+
+from . import graph
+from . import parser
+
+try:
+    from maya.api import OpenMaya as om2
+except ImportError: # offline, only files can be profiled
+    om2 = None
+
+
+UNASSIGNED = '<unassigned>'
+TABLE_HEADER = ('component', 'nodes', 'depth', 'max fan out', 'critical path', 'cross in', 'cross out')
+
+
+def index_from_live_scene():
+    """
+    Reads the nodes and connections of the scene open in Maya into a SceneIndex,
+      the same queries then run on it as on a parsed file
+    :return: `SceneIndex`
+    """
+    if om2 is None:
+        raise RuntimeError("profiling the live scene needs to run inside Maya")
+
+    index = parser.SceneIndex(om2.MFileIO.currentFile())
+    ids = {} # MObjectHandle hashCode -> list of (MObjectHandle, node id)
+
+    def id_of(mob):
+        mobha = om2.MObjectHandle(mob)
+        for each_handle, node_id in ids.get(mobha.hashCode(), ()):
+            if each_handle == mobha:
+                return node_id
+        return -1
+
+    def register(mob, parent_id):
+        mfn_dep = om2.MFnDependencyNode(mob)
+        node_id = index.add_node(mfn_dep.name(), mfn_dep.typeName, parent_id, 0)
+        mobha = om2.MObjectHandle(mob)
+        ids.setdefault(mobha.hashCode(), []).append((mobha, node_id))
+
+    # breadth first, so parents always have an id before their children need it
+    it_dag = om2.MItDag(om2.MItDag.kBreadthFirst)
+    while not it_dag.isDone():
+        mob = it_dag.currentItem()
+        if not mob.hasFn(om2.MFn.kWorld) and id_of(mob) < 0:
+            parent_mob = om2.MFnDagNode(mob).parent(0)
+            register(mob, -1 if parent_mob.hasFn(om2.MFn.kWorld) else id_of(parent_mob))
+        it_dag.next()
+
+    it_dep = om2.MItDependencyNodes()
+    while not it_dep.isDone():
+        mob = it_dep.thisNode()
+        if not mob.hasFn(om2.MFn.kDagNode):
+            register(mob, -1)
+        it_dep.next()
+
+    it_dep = om2.MItDependencyNodes()
+    while not it_dep.isDone():
+        mob = it_dep.thisNode()
+        dst_id = id_of(mob)
+        for dst_plug in om2.MFnDependencyNode(mob).getConnections():
+            if not dst_plug.isDestination:
+                continue
+            src_plug = dst_plug.source()
+            src_id = id_of(src_plug.node())
+            if dst_id < 0 or src_id < 0:
+                continue
+            # short names, same as a saved file would have them
+            index.add_connection(src_id, src_plug.partialName(useFullAttributePath=True),
+                                 dst_id, dst_plug.partialName(useFullAttributePath=True))
+        it_dep.next()
+
+    return index
+
+
+def component_of_nodes(index):
+    """
+    :param index: `SceneIndex`
+    :return: (`list` of `str`, `array`) component names, and the component id of every node, -1 if none
+    """
+    names = []
+    owner = array('i', [-1]) * index.node_count()
+
+    children = {}
+    for node_id, parent_id in enumerate(index.node_parents):
+        if parent_id >= 0:
+            children.setdefault(parent_id, []).append(node_id)
+
+    for comp_id, cmpnt_node in enumerate(index.components()):
+        names.append(index.node_names[cmpnt_node])
+
+        owned = [cmpnt_node]
+        container_id = index.container_of(cmpnt_node)
+        if container_id >= 0:
+            owned.append(container_id)
+            owned.extend(index.container_members(container_id))
+
+        while owned:
+            node_id = owned.pop()
+            if owner[node_id] >= 0:
+                continue
+            owner[node_id] = comp_id
+            owned.extend(children.get(node_id, ()))
+
+    return names, owner
+
+
+def _longest_paths(node_graph, sccs, scc_of, edge_filter=None):
+    # longest chains, counted in nodes, ending at and starting from every strongly connected component,
+    #   sccs come downstream first out of Tarjan, so walking them backwards is a topological order
+    weight = [len(component) for component in sccs]
+    to_here = list(weight)
+    from_here = list(weight)
+
+    for scc_id in reversed(range(len(sccs))):
+        best = 0
+        for node_id in sccs[scc_id]:
+            for i in range(node_graph.rev_start[node_id], node_graph.rev_start[node_id + 1]):
+                pred = node_graph.rev_nodes[i]
+                pred_scc = scc_of[pred]
+                if pred_scc != scc_id and (edge_filter is None or edge_filter(pred, node_id)):
+                    best = max(best, to_here[pred_scc])
+        to_here[scc_id] += best
+
+    for scc_id in range(len(sccs)):
+        best = 0
+        for node_id in sccs[scc_id]:
+            for i in range(node_graph.fwd_start[node_id], node_graph.fwd_start[node_id + 1]):
+                succ = node_graph.fwd_nodes[i]
+                succ_scc = scc_of[succ]
+                if succ_scc != scc_id and (edge_filter is None or edge_filter(node_id, succ)):
+                    best = max(best, from_here[succ_scc])
+        from_here[scc_id] += best
+
+    return weight, to_here, from_here
+
+
+def profile_index(index):
+    """
+    :param index: `SceneIndex` parsed, cached or read from the live scene
+    :return: `dict` rig wide figures, and per component figures ranked most expensive first
+    """
+    names, owner = component_of_nodes(index)
+    node_graph = graph.NodeGraph(index, graph.skip_message_connections(index))
+
+    sccs = node_graph.strongly_connected_components()
+    scc_of = array('i', [0]) * index.node_count()
+    for scc_id, component in enumerate(sccs):
+        for node_id in component:
+            scc_of[node_id] = scc_id
+
+    weight, to_here, from_here = _longest_paths(node_graph, sccs, scc_of)
+    _, inner_to_here, _ = _longest_paths(node_graph, sccs, scc_of,
+                                         lambda src, dst: owner[src] == owner[dst])
+    fan_out = node_graph.fan_out()
+
+    rows = dict((comp_id, {'component': name, 'nodes': 0, 'depth': 0, 'maxFanOut': 0,
+                           'criticalPath': 0, 'crossIn': 0, 'crossOut': 0})
+                for comp_id, name in enumerate(names + [UNASSIGNED]))
+    unassigned_id = len(names)
+
+    for node_id in range(index.node_count()):
+        if index.is_placeholder(node_id) and owner[node_id] < 0:
+            continue # default nodes the file only refers to
+        row = rows[owner[node_id] if owner[node_id] >= 0 else unassigned_id]
+        scc_id = scc_of[node_id]
+        row['nodes'] += 1
+        row['depth'] = max(row['depth'], inner_to_here[scc_id])
+        row['maxFanOut'] = max(row['maxFanOut'], fan_out[node_id])
+        row['criticalPath'] = max(row['criticalPath'], to_here[scc_id] + from_here[scc_id] - weight[scc_id])
+
+    for src in range(index.node_count()):
+        for i in range(node_graph.fwd_start[src], node_graph.fwd_start[src + 1]):
+            dst = node_graph.fwd_nodes[i]
+            if owner[src] == owner[dst]:
+                continue
+            if owner[src] >= 0:
+                rows[owner[src]]['crossOut'] += 1
+            if owner[dst] >= 0:
+                rows[owner[dst]]['crossIn'] += 1
+
+    ranked = [rows[comp_id] for comp_id in sorted(rows) if rows[comp_id]['nodes']]
+    ranked.sort(key=lambda row: (row['criticalPath'], row['depth'], row['nodes']), reverse=True)
+
+    return {'path': index.path,
+            'nodes': sum(row['nodes'] for row in ranked),
+            'edges': node_graph.edge_count,
+            'criticalPath': max(to_here) if to_here else 0,
+            'cycles': sum(1 for component in sccs
+                          if len(component) > 1 or component[0] in node_graph.successors(component[0])),
+            'components': ranked,
+            }
+
+
+def profile_scene(path):
+    """
+    :param path: `str` a .ma file
+    :return: `dict` see profile_index()
+    """
+    return profile_index(parser.parse_scene(path))
+
+
+def profile_live_scene():
+    """
+    :return: `dict` see profile_index()
+    """
+    return profile_index(index_from_live_scene())
+
+
+def format_report(report):
+    """
+    :param report: `dict` as returned by profile_index()
+    :return: `str` the ranking as a block of text fit for the script editor
+    """
+    rows = [TABLE_HEADER]
+    for row in report['components']:
+        rows.append((row['component'], str(row['nodes']), str(row['depth']), str(row['maxFanOut']),
+                     str(row['criticalPath']), str(row['crossIn']), str(row['crossOut'])))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(TABLE_HEADER))]
+    lines = ['{} nodes, {} edges, critical path {}, {} cycles'.format(report['nodes'], report['edges'],
+                                                                     report['criticalPath'], report['cycles'])]
+    lines.extend('  '.join(cell.ljust(widths[i]) for i, cell in enumerate(row)) for row in rows)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n\n', 1)[0].strip())
+    arg_parser.add_argument('scene', nargs='+')
+    arg_parser.add_argument('--json', action='store_true', help="print the reports as JSON instead of tables")
+    args = arg_parser.parse_args(argv)
+
+    reports = [profile_scene(each_path) for each_path in args.scene]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print('\n\n'.join(format_report(report) for report in reports))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+Change aware reloading of the Maya package's modules, for iterating on them in a live session.
+
+Every module of the package that's loaded is remembered along with its source file's
+  modification time, size and content hash, and the package modules it imports.
+When asked to reload, only modules whose source actually changed are picked,
+  a touched file that's byte for byte the same doesn't count, along with every module
+  that imports them directly or indirectly, since those hold on to the old objects.
+They are then reloaded dependencies first, and each reload is timed.
+
+Usage, from the Maya shell or a snippet loader:
+  from Maya import hot_reload
+  snips = hot_reload.TRACKER.load('Maya.s01_d046_rigItemIteration')
+  print(hot_reload.format_report(hot_reload.TRACKER.last_report))
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import ast
+import hashlib
+import importlib
+import io
+import os
+import sys
+import traceback
+from timeit import default_timer
+
+try:
+    from importlib import reload as reload_module
+except ImportError: # Python 2, where it's a builtin
+    reload_module = reload
+
+
+PACKAGE_NAME = __name__.rpartition('.')[0] or 'Maya'
+
+
+def dedupe_sys_path(extra_path=None):
+    """
+    Drops repeated sys.path entries, keeping the first of each, and appends extra_path if it's missing.
+    Entries are compared normalised, so the same directory spelled two ways only stays once.
+    :param extra_path: `str | None`
+    :return: `int` how many entries were removed
+    """
+    seen = set()
+    kept = []
+    for each_path in sys.path + ([extra_path] if extra_path else []):
+        key = os.path.normcase(os.path.abspath(each_path)) if each_path else each_path
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(each_path)
+
+    removed = len(sys.path) + (1 if extra_path else 0) - len(kept)
+    sys.path[:] = kept
+    return removed
+
+
+def source_path(module):
+    """
+    :param module: `module`
+    :return: `str | None` the .py file a module was loaded from, None for builtins and extensions
+    """
+    path = getattr(module, '__file__', None)
+    if not path:
+        return None
+    base, ext = os.path.splitext(path)
+    if ext in ('.pyc', '.pyo'):
+        path = base + '.py'
+    return path if path.endswith('.py') and os.path.isfile(path) else None
+
+
+def file_digest(path):
+    """
+    :param path: `str`
+    :return: `str` hex digest of the file's contents
+    """
+    with io.open(path, 'rb') as stream:
+        return hashlib.sha1(stream.read()).hexdigest()
+
+
+def imported_names(source, module_name, is_package):
+    """
+    Every module name an import statement in the source could refer to,
+      for "from a import b" that's both a and a.b since b might be a submodule
+    :param source: `bytes` module source
+    :param module_name: `str` dotted name of the module, to resolve relative imports
+    :param is_package: `bool` True if the source is a package's __init__
+    :return: `set` of `str`
+    """
+    names = set()
+    package_parts = module_name.split('.') if is_package else module_name.split('.')[:-1]
+
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                names.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                base_parts = package_parts[:len(package_parts) - node.level + 1]
+                base = '.'.join(base_parts + ([node.module] if node.module else []))
+            else:
+                base = node.module
+            if not base:
+                continue
+            names.add(base)
+            for alias in node.names:
+                names.add('{}.{}'.format(base, alias.name))
+
+    return names
+
+
+class ModuleRecord(object):
+    """
+    What is known of a module's source as of its last load
+    """
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        stat = os.stat(path)
+        self.mtime = stat.st_mtime
+        self.size = stat.st_size
+        self.digest = file_digest(path)
+        with io.open(path, 'rb') as stream:
+            self.imports = imported_names(stream.read(), name, os.path.basename(path) == '__init__.py')
+
+
+    def is_changed(self):
+        """
+        The stat is enough to tell nothing changed, the hash is only checked when it differs
+        :return: `bool`
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False # deleted, nothing to reload it from
+        if stat.st_mtime == self.mtime and stat.st_size == self.size:
+            return False
+        if stat.st_size == self.size and file_digest(self.path) == self.digest:
+            self.mtime = stat.st_mtime
+            return False
+        return True
+
+
+class ModuleTracker(object):
+    """
+    Keeps a ModuleRecord for every loaded module of a package and reloads them when they change
+    """
+    def __init__(self, package_name=PACKAGE_NAME):
+        """
+        :param package_name: `str` top level package whose modules are tracked
+        """
+        self.package_name = package_name
+        self.records = {} # module name -> ModuleRecord
+        self.last_report = []
+
+
+    def is_tracked_name(self, name):
+        """
+        :param name: `str` dotted module name
+        :return: `bool` True for modules of the package, this one aside since it holds the records
+        """
+        if name == __name__:
+            return False
+        return name == self.package_name or name.startswith(self.package_name + '.')
+
+
+    def refresh(self):
+        """
+        Records modules of the package that were loaded since last time,
+          by anything, not only through this tracker
+        :return: `None`
+        """
+        for name, module in list(sys.modules.items()):
+            if module is None or name in self.records or not self.is_tracked_name(name):
+                continue
+            path = source_path(module)
+            if path is not None:
+                self.records[name] = ModuleRecord(name, path)
+
+
+    def dependencies(self, name):
+        """
+        :param name: `str`
+        :return: `set` of `str` tracked modules the named one imports
+        """
+        return set(each for each in self.records[name].imports if each in self.records and each != name)
+
+
+    def changed(self):
+        """
+        :return: `list` of `str` names of tracked modules whose source changed since they were loaded
+        """
+        self.refresh()
+        return sorted(name for name, record in self.records.items() if record.is_changed())
+
+
+    def reload_order(self, names):
+        """
+        :param names: `iterable` of `str` modules that changed
+        :return: `list` of `str` those and every module depending on them,
+                   dependencies first, by name where the order doesn't matter
+        """
+        dependents = {}
+        for each_name in self.records:
+            for each_dependency in self.dependencies(each_name):
+                dependents.setdefault(each_dependency, set()).add(each_name)
+
+        affected = set()
+        pending = list(names)
+        while pending:
+            name = pending.pop()
+            if name in affected:
+                continue
+            affected.add(name)
+            pending.extend(dependents.get(name, ()))
+
+        # Kahn's algorithm over the affected modules only
+        in_degree = dict((name, len(self.dependencies(name) & affected)) for name in affected)
+        ready = sorted(name for name, degree in in_degree.items() if not degree)
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for each_dependent in sorted(dependents.get(name, set()) & affected):
+                in_degree[each_dependent] -= 1
+                if not in_degree[each_dependent]:
+                    ready.append(each_dependent)
+            ready.sort()
+
+        # modules importing each other can't be ordered, they go last in name order
+        order.extend(sorted(affected.difference(order)))
+        return order
+
+
+    def reload_changed(self):
+        """
+        :return: `list` of (`str`, `float`, `str | None`) module, seconds taken and error for every module reloaded
+        """
+        report = []
+        failed = set()
+        for name in self.reload_order(self.changed()):
+            if self.dependencies(name) & failed:
+                report.append((name, 0.0, 'skipped, a dependency failed to reload'))
+                failed.add(name)
+                continue
+
+            module = sys.modules.get(name)
+            if module is None:
+                del self.records[name]
+                continue
+
+            start = default_timer()
+            try:
+                reload_module(module)
+            except Exception:
+                report.append((name, default_timer() - start, traceback.format_exc()))
+                failed.add(name)
+                continue
+            report.append((name, default_timer() - start, None))
+            self.records[name] = ModuleRecord(name, self.records[name].path)
+
+        self.last_report = report
+        return report
+
+
+    def load(self, name):
+        """
+        Imports a module the first time, and from then on reloads whatever changed before returning it
+        :param name: `str` dotted module name
+        :return: `module`
+        """
+        self.reload_changed()
+        if name in sys.modules:
+            return sys.modules[name]
+
+        start = default_timer()
+        module = importlib.import_module(name)
+        self.last_report.append((name, default_timer() - start, None))
+        self.refresh()
+        return module
+
+
+def format_report(report):
+    """
+    :param report: `list` as returned by ModuleTracker.reload_changed()
+    :return: `str`
+    """
+    if not report:
+        return 'nothing changed'
+    lines = []
+    for name, seconds, error in report:
+        lines.append('{:8.1f}ms  {}'.format(seconds * 1000.0, name))
+        if error:
+            lines.extend('            ' + line for line in error.rstrip().splitlines())
+    lines.append('{:8.1f}ms  total'.format(sum(seconds for _, seconds, _ in report) * 1000.0))
+    return '\n'.join(lines)
+
+
+try:
+    TRACKER
+except NameError:
+    TRACKER = ModuleTracker()
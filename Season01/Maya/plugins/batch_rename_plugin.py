@@ -0,0 +1,384 @@
+"""
+A Plugin to rename any number of nodes in one go, by rules, as a single undoable step.
+
+Renaming node by node and asking Maya whether each new name exists means a global
+  name lookup per node, and a name only becomes free after the node holding it
+  was renamed, so chains like A->B while B->C depend on the order nodes come in.
+Instead the scene's names are gathered once, every new name is worked out and checked
+  in memory, and the renames are queued on a single modifier in an order that never
+  clashes, going through a temporary name only where renames form a loop (A->B, B->A).
+
+Rules are regular expression substitutions applied in order, optionally followed by
+  a template with {name} (the name after the rules) and {index} (position of the node
+  in the list) fields, e.g. "{name}_{index:03d}".
+A new name that is taken, or is taken by an earlier node in the list, is a collision.
+  By default the node keeps its name, same as the old script did, alternatively
+  a number is appended, same as Maya would do.
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import re
+
+from maya.api import _OpenMaya_py2 as om2
+
+
+def maya_useNewAPI():
+    """
+    See corps_guidance_plugin.py, Maya only needs this to exist
+    """
+    pass
+
+
+PLUGIN_NAME = 'batch_rename_commands'
+CMD_NAME_BATCHRENAME = 'corps_batchRename'
+
+COLLISION_SKIP = 'skip'
+COLLISION_INCREMENT = 'increment'
+
+RENAME_OK = 'renamed'
+RENAME_UNCHANGED = 'unchanged'
+RENAME_INVALID = 'invalid'
+RENAME_COLLISION = 'collision'
+
+VALID_NAME = re.compile(r'^(?:[A-Za-z_][A-Za-z0-9_]*:)*[A-Za-z_][A-Za-z0-9_]*$')
+TRAILING_DIGITS = re.compile(r'\d+$')
+TEMP_NAME_TEMPLATE = '{}__renaming{}'
+
+
+class RenameRule(object):
+    """
+    A single regular expression substitution
+    """
+    def __init__(self, pattern, replacement):
+        """
+        :param pattern: `str` regular expression
+        :param replacement: `str` substitution, groups can be referenced as in re.sub()
+        """
+        self.pattern = re.compile(pattern)
+        self.replacement = replacement
+
+
+    def apply(self, name):
+        """
+        :param name: `str`
+        :return: `str`
+        """
+        return self.pattern.sub(self.replacement, name)
+
+
+def newNameFromRules(name, rules, template=None, index=0):
+    """
+    :param name: `str` current name
+    :param rules: `list` of `RenameRule` applied in order
+    :param template: `str | None` formatted with name and index after the rules ran
+    :param index: `int` position of the node in the list being renamed
+    :return: `str` the new name, possibly invalid, possibly taken
+    """
+    for eachRule in rules:
+        name = eachRule.apply(name)
+    if template:
+        name = template.format(name=name, index=index)
+    return name
+
+
+def incrementedName(name, isTaken):
+    """
+    :param name: `str` a name that's taken
+    :param isTaken: `callable` takes a name and returns True if it can't be used
+    :return: `str` the name with the lowest number appended, or replacing its trailing digits, that's free
+    """
+    base = TRAILING_DIGITS.sub('', name)
+    i = 1
+    while isTaken('{}{}'.format(base, i)):
+        i += 1
+    return '{}{}'.format(base, i)
+
+
+def resolveNames(currentNames, sceneNames, desiredNames, collisionMode=COLLISION_SKIP):
+    """
+    Decides what every node ends up being called, entirely in memory
+    :param currentNames: `list` of `str` names of the nodes to rename, in order
+    :param sceneNames: `iterable` of `str` names of every node in the scene, targets included,
+                                           a name shared by several DAG nodes appears once per node
+    :param desiredNames: `list` of `str` new name for each node, as returned by newNameFromRules()
+    :param collisionMode: `str` COLLISION_SKIP or COLLISION_INCREMENT
+    :return: `list` of (`str`, `str`) status and final name for each node
+    """
+    # names held by nodes that aren't being renamed, counted since DAG short names can repeat
+    heldCounts = dict()
+    for eachName in sceneNames:
+        heldCounts[eachName] = heldCounts.get(eachName, 0) + 1
+    for eachName in currentNames:
+        heldCounts[eachName] = heldCounts.get(eachName, 1) - 1
+    held = set(eachName for eachName, count in heldCounts.iteritems() if count > 0)
+
+    results = [None] * len(currentNames)
+    for i, (currName, newName) in enumerate(zip(currentNames, desiredNames)):
+        if newName == currName:
+            results[i] = (RENAME_UNCHANGED, currName)
+        elif not VALID_NAME.match(newName):
+            results[i] = (RENAME_INVALID, currName)
+        if results[i] is not None:
+            held.add(currName)
+
+    desiredSet = set(desiredNames[i] for i in xrange(len(currentNames)) if results[i] is None)
+
+    # A node that keeps its name because of a collision holds on to it,
+    #   which takes that name away from whichever node claimed it so far,
+    #   so that one keeps its own name in turn and so on down the chain.
+    #   Only the nodes along the chain are revisited, the claims of every other node stand.
+    claimed = dict() # name -> index of the node claiming it
+    for i in xrange(len(currentNames)):
+        if results[i] is not None:
+            continue
+
+        newName = desiredNames[i]
+        if newName not in held and newName not in claimed:
+            claimed[newName] = i
+            results[i] = (RENAME_OK, newName)
+            continue
+
+        if collisionMode == COLLISION_INCREMENT:
+            newName = incrementedName(newName, lambda name: name in held or name in claimed or name in desiredSet)
+            claimed[newName] = i
+            results[i] = (RENAME_OK, newName)
+            continue
+
+        skipped = i
+        while skipped is not None:
+            if claimed.get(desiredNames[skipped]) == skipped:
+                del claimed[desiredNames[skipped]]
+            results[skipped] = (RENAME_COLLISION, currentNames[skipped])
+            held.add(currentNames[skipped])
+            skipped = claimed.get(currentNames[skipped])
+
+    return results
+
+
+def orderRenames(currentNames, finalNames, isFree):
+    """
+    Orders renames so that no node is ever given a name another node still holds
+    :param currentNames: `list` of `str`
+    :param finalNames: `list` of `str` same as currentNames for nodes that aren't renamed
+    :param isFree: `callable` takes a name and returns True if nothing in the scene holds it
+    :return: `list` of (`int`, `str`) node index and name to give it, in the order to do so
+    """
+    holder = dict((currentNames[i], i) for i in xrange(len(currentNames)) if currentNames[i] != finalNames[i])
+    steps = []
+    state = dict() # index -> 1 while being visited, 2 once done
+    deferred = [] # (index, final name) for nodes parked on a temporary name to break a loop
+
+    for start in xrange(len(currentNames)):
+        if currentNames[start] == finalNames[start] or start in state:
+            continue
+
+        # follow the chain of nodes holding the name the previous one wants
+        chain = []
+        i = start
+        while i is not None and i not in state:
+            state[i] = 1
+            chain.append(i)
+            i = holder.get(finalNames[i])
+
+        if i is not None and state[i] == 1:
+            # a loop, the node the chain came back to is parked on a temporary name
+            #   so the rest of the loop can go, and it's given its final name last
+            tempName = TEMP_NAME_TEMPLATE.format(currentNames[i], 0)
+            k = 0
+            while not isFree(tempName):
+                k += 1
+                tempName = TEMP_NAME_TEMPLATE.format(currentNames[i], k)
+            steps.append((i, tempName))
+            deferred.append((i, finalNames[i]))
+
+        for j in reversed(chain):
+            if not deferred or deferred[-1][0] != j:
+                steps.append((j, finalNames[j]))
+            state[j] = 2
+
+    steps.extend(deferred)
+    return steps
+
+
+RUN_LOCAL_INSTANCE_MODE = False # See corps_guidance_plugin.py, debug and dev purposes only
+
+class BatchRename(om2.MPxCommand):
+    """
+    Renames any number of nodes by rules, as a single undoable step.
+     * -rx/-regex and -rp/-replace are used in pairs, as many times as needed,
+         each pair is a substitution applied in the order given
+     * -tp/-template formats the name after the substitutions, with {name} and {index}
+     * -inc/-increment resolves collisions by appending a number instead of skipping the node
+     * -dr/-dryRun only returns what would happen
+    The result is a string array with "oldName newName" for every node renamed.
+    """
+    __dgModifier = None
+    __isApplied = False # False on a dry run, nothing ends up on the undo queue then
+
+    @classmethod
+    def cmdCreator(cls):
+        """
+        See corps_guidance_plugin.py for the Maya crud involved here
+        :return: `BatchRename`
+        """
+        return cls()
+
+
+    @staticmethod
+    def syntaxCreator():
+        """
+        :return: `MSyntax`
+        """
+        stx = om2.MSyntax()
+        stx.setObjectType(om2.MSyntax.kSelectionList, 1)
+        stx.useSelectionAsDefault(True)
+
+        stx.addFlag('-rx', '-regex', om2.MSyntax.kString)
+        stx.makeFlagMultiUse('-rx')
+        stx.addFlag('-rp', '-replace', om2.MSyntax.kString)
+        stx.makeFlagMultiUse('-rp')
+        stx.addFlag('-tp', '-template', om2.MSyntax.kString)
+        stx.addFlag('-inc', '-increment', om2.MSyntax.kBoolean)
+        stx.addFlag('-dr', '-dryRun', om2.MSyntax.kBoolean)
+
+        return stx
+
+
+    @staticmethod
+    def hasSyntax():
+        return True
+
+
+    def isUndoable(self):
+        """
+        Maya asks once doIt() returned, a dry run changed nothing so it has nothing to undo
+        :return: `bool`
+        """
+        return self.__isApplied
+
+
+    @staticmethod
+    def multiUseStrings(argDB, flag):
+        return [argDB.getFlagArgumentList(flag, i).asString(0)
+                for i in xrange(argDB.numberOfFlagUses(flag))]
+
+
+    def doIt(self, args):
+        """
+        Maya Factory method
+        :param args: in new-api mode this is probably going to be a tuple
+        :return: `None`
+        """
+        if not RUN_LOCAL_INSTANCE_MODE:
+            argDB = om2.MArgDatabase(self.syntax(), args)
+            obList = argDB.getObjectList()
+            patterns = self.multiUseStrings(argDB, '-rx')
+            replacements = self.multiUseStrings(argDB, '-rp')
+            template = argDB.flagArgumentString('-tp', 0) if argDB.isFlagSet('-tp') else None
+            collisionMode = COLLISION_INCREMENT if argDB.isFlagSet('-inc') else COLLISION_SKIP
+            dr = argDB.isFlagSet('-dr')
+        else: # debug only case, set manually as needed
+            obList = om2.MGlobal.getActiveSelectionList()
+            patterns = ['_R_']
+            replacements = ['_L_']
+            template = None
+            collisionMode = COLLISION_SKIP
+            dr = True
+
+        if len(patterns) != len(replacements):
+            raise ValueError("every -regex needs a matching -replace")
+        rules = [RenameRule(pattern, replacement) for pattern, replacement in zip(patterns, replacements)]
+
+        # unique nodes, in the order they were passed in
+        mobs = []
+        seenHandles = dict()
+        for i in xrange(obList.length()):
+            mob = obList.getDependNode(i)
+            mobha = om2.MObjectHandle(mob)
+            bucket = seenHandles.setdefault(mobha.hashCode(), [])
+            if any(eachHandle == mobha for eachHandle in bucket):
+                continue
+            bucket.append(mobha)
+            mobs.append(mob)
+
+        currentNames = [om2.MFnDependencyNode(eachMob).name() for eachMob in mobs]
+        desiredNames = [newNameFromRules(name, rules, template, i) for i, name in enumerate(currentNames)]
+
+        # the one and only pass over the scene's names
+        sceneNames = []
+        it_dep = om2.MItDependencyNodes()
+        fn_dep = om2.MFnDependencyNode()
+        while not it_dep.isDone():
+            fn_dep.setObject(it_dep.thisNode())
+            sceneNames.append(fn_dep.name())
+            it_dep.next()
+
+        results = resolveNames(currentNames, sceneNames, desiredNames, collisionMode)
+        finalNames = [finalName for _, finalName in results]
+
+        usedNames = set(sceneNames)
+        usedNames.update(finalNames)
+        steps = orderRenames(currentNames, finalNames, lambda name: name not in usedNames)
+
+        self.__dgModifier = om2.MDGModifier()
+        if not dr:
+            for i, name in steps:
+                self.__dgModifier.renameNode(mobs[i], name)
+            self.__dgModifier.doIt()
+            self.__isApplied = True
+
+        counts = dict()
+        for status, _ in results:
+            counts[status] = counts.get(status, 0) + 1
+        om2.MGlobal.displayInfo('{}: {} {}, {} {}, {} {}, {} {}'.format(CMD_NAME_BATCHRENAME,
+                                                                       counts.get(RENAME_OK, 0), RENAME_OK,
+                                                                       counts.get(RENAME_UNCHANGED, 0), RENAME_UNCHANGED,
+                                                                       counts.get(RENAME_COLLISION, 0), RENAME_COLLISION,
+                                                                       counts.get(RENAME_INVALID, 0), RENAME_INVALID))
+
+        self.setResult(['{} {}'.format(currName, finalName)
+                        for currName, (status, finalName) in zip(currentNames, results) if status == RENAME_OK])
+
+
+    def undoIt(self):
+        """
+        All renames went through the modifier owned by this instance, so does their undo
+        :return: `None`
+        """
+        if self.__isApplied:
+            self.__dgModifier.undoIt()
+
+
+    def redoIt(self):
+        """
+        :return: `None`
+        """
+        if self.__isApplied:
+            self.__dgModifier.doIt()
+
+
+
+def initializePlugin(mob):
+    """
+    See corps_guidance_plugin.py
+    :param mob: `MObject`
+    :return: `None`
+    """
+    fnPlugin = om2.MFnPlugin(mob)
+    fnPlugin.setName(PLUGIN_NAME)
+
+    fnPlugin.registerCommand(CMD_NAME_BATCHRENAME,
+                             BatchRename.cmdCreator,
+                             BatchRename.syntaxCreator)
+
+
+def uninitializePlugin(mob):
+    """
+    See corps_guidance_plugin.py
+    :param mob: `MObject`
+    :return: `None`
+    """
+    fnPlugin = om2.MFnPlugin(mob)
+    fnPlugin.deregisterCommand(CMD_NAME_BATCHRENAME)
@@ -5,7 +5,8 @@ A Plugin working with Cult of Rig season 1 style components capable of
   clearing DG nodes marked for deletion
   removing the guide DAG entries
 More commands might be added later, but for now the above is all the plugin manages
-  and all of that work is contained into a single command
+  and all of that work is contained into a single command.
+corps_guidance_loadReport returns how long loading the plugin took, piece by piece.
 
 The plugin is largely untested and it's a simple port of the script developed
   and used in the late 20s episodes.
@@ -19,8 +20,18 @@ See repository for license and details at https://github.com/cultofrig/didactic
 This software is provided as-is, with no warranties, under the BSD 3-clause license.
 """
 
+import sys
+from timeit import default_timer
+
+_LOAD_START = default_timer()
+
+# The command classes derive from MPxCommand, so OpenMaya is the one import
+#   loading the plugin can't do without, and it's most of what loading costs.
+# Running the rest of this module takes a fraction of a millisecond, there's
+#   nothing worth deferring in it. What is deferred is touching the scene:
+#   the container index callbacks are only installed the first time a command runs,
+#   see firstRunSetup(). corps_guidance_loadReport has the actual numbers.
 from maya.api import _OpenMaya_py2 as om2
-from maya import cmds as m_cmds
 
 
 def maya_useNewAPI():
@@ -36,6 +47,29 @@ def maya_useNewAPI():
 
 PLUGIN_NAME = 'corps_guidance_commands'
 CMD_NAME_SWAPGUIDECONTROL = 'corps_guidance_swapAndOrRemove'
+CMD_NAME_LOADREPORT = 'corps_guidance_loadReport'
+
+# Seconds spent loading the plugin, filled in as it happens, see LoadReport
+LOAD_TIMES = {'import': 0.0,
+              'initialize': 0.0,
+              'register': dict(), # command name -> seconds
+              'deferred': dict(), # what firstRunSetup() did -> seconds
+              }
+
+
+def profilerIfEnabled():
+    """
+    The Season00 callback profiler is optional, and it does nothing unless
+      it was imported and enabled before the plugin was loaded, so rather than
+      importing it, and searching all of sys.path each time it isn't there,
+      it's only picked up if it's already loaded
+    :return: `CallbackProfiler | None`
+    """
+    profilerModule = sys.modules.get('callback_profiler')
+    if profilerModule is None:
+        return None
+    return getattr(profilerModule, 'PROFILER', None)
+
 
 def containerFromNode(mayaNode):
     """
@@ -56,13 +90,244 @@ def containerFromNode(mayaNode):
 
         # at this point we're dealing with an interesting node
         #  and we should find if it's connected to a container
-        mfnDestinationNode = om2.MFnDependencyNode(destinationNode)
-        layoutNodeMsgPlug = mfnDestinationNode.findPlug("message", False)
+        containerNode = containerFromLayout(destinationNode)
+        if containerNode is not None:
+            return containerNode
+
+
+def containerFromLayout(layoutNode):
+    """
+    Second half of the hop in containerFromNode(), given a hyperLayout node
+      it returns the container it's attached to, if any
+    :param layoutNode: `MObject` a hyperLayout node
+    :return: `MObject | None` the container the layout belongs to, None if it's loose
+    """
+    layoutNodeMsgPlug = om2.MFnDependencyNode(layoutNode).findPlug("message", False)
+    for eachLayoutDestination in layoutNodeMsgPlug.destinations():
+        if eachLayoutDestination.node().hasFn(om2.MFn.kContainer):
+            return eachLayoutDestination.node()
+
+
+class ContainerIndex(object):
+    """
+    Scene wide reverse index of container membership.
+    containerFromNode() above walks message -> hyperLayout -> message -> container
+      every time it's asked about a node, which is fine for one node but adds up
+      to thousands of redundant walks when a large selection is inspected.
+    This builds the member -> container relationship once from all containers'
+      getMembers() and keeps it current through connection and node removal callbacks,
+      so each lookup afterwards is a dictionary hit.
+    Scene IO (open, new, import, referencing) simply invalidates the index,
+      which is then rebuilt lazily on the first lookup that follows.
+    """
+    def __init__(self):
+        self.__members = dict() # member hashCode -> (member MObjectHandle, container MObjectHandle)
+        self.__containers = dict() # container hashCode -> set of member hashCodes
+        self.__callbackIDs = list()
+        self.__isBuilt = False
+        self.__isSuspended = False
+
 
-        msgDestinations = layoutNodeMsgPlug.destinations()
-        for eachLayoutDestination in msgDestinations:
-            if eachLayoutDestination.node().hasFn(om2.MFn.kContainer):
-                return eachLayoutDestination.node()
+    @property
+    def isInstalled(self):
+        """
+        :return: `bool` whether the callbacks keeping the index current are in place
+        """
+        return bool(self.__callbackIDs)
+
+
+    def install(self):
+        """
+        Adds the callbacks responsible to keep the index current.
+        Building the index itself is deferred until the first lookup.
+        :return: `None`
+        """
+        if self.isInstalled:
+            return
+
+        ids = self.__callbackIDs
+        ids.append(om2.MDGMessage.addConnectionCallback(self.__onConnection))
+        ids.append(om2.MDGMessage.addNodeRemovedCallback(self.__onNodeRemoved, 'dependNode'))
+
+        for eachMsg in (om2.MSceneMessage.kBeforeNew,
+                        om2.MSceneMessage.kBeforeOpen,
+                        om2.MSceneMessage.kBeforeImport,
+                        om2.MSceneMessage.kBeforeCreateReference,
+                        om2.MSceneMessage.kBeforeRemoveReference):
+            ids.append(om2.MSceneMessage.addCallback(eachMsg, self.__onBeforeSceneIO))
+
+        for eachMsg in (om2.MSceneMessage.kAfterNew,
+                        om2.MSceneMessage.kAfterOpen,
+                        om2.MSceneMessage.kAfterImport,
+                        om2.MSceneMessage.kAfterCreateReference,
+                        om2.MSceneMessage.kAfterRemoveReference):
+            ids.append(om2.MSceneMessage.addCallback(eachMsg, self.__onAfterSceneIO))
+
+
+    def uninstall(self):
+        """
+        Removes only the callbacks this index added and drops the index
+        :return: `None`
+        """
+        if self.__callbackIDs:
+            om2.MMessage.removeCallbacks(self.__callbackIDs)
+        self.__callbackIDs = list()
+        self.invalidate()
+
+
+    def invalidate(self):
+        """
+        Drops the index, it will be rebuilt on the next lookup
+        :return: `None`
+        """
+        self.__members.clear()
+        self.__containers.clear()
+        self.__isBuilt = False
+
+
+    def build(self):
+        """
+        Walks every container in the scene once and records its members
+        :return: `int` number of members indexed
+        """
+        self.invalidate()
+
+        itr = om2.MItDependencyNodes(om2.MFn.kContainer)
+        while not itr.isDone():
+            self.__indexContainer(itr.thisNode())
+            itr.next()
+
+        self.__isBuilt = True
+        return len(self.__members)
+
+
+    def containerOf(self, mayaNode):
+        """
+        Index backed equivalent of containerFromNode().
+        If the index isn't installed it can't be trusted to be current,
+          in which case we fall back on walking the graph.
+        :param mayaNode: `MObject` any dependency node in Maya
+        :return: `MObject | None` the container object the argument is a member of if there is one
+                                    otherwise None
+        """
+        if not self.isInstalled or self.__isSuspended:
+            return containerFromNode(mayaNode)
+
+        if not self.__isBuilt:
+            self.build()
+
+        memberHandle = om2.MObjectHandle(mayaNode)
+        entry = self.__members.get(memberHandle.hashCode())
+        if entry is None:
+            return None
+
+        indexedMemberHandle, containerHandle = entry
+        if not indexedMemberHandle == memberHandle or not containerHandle.isValid():
+            # hash collision, or something slipped past the callbacks,
+            #   either way we don't trust the entry
+            return containerFromNode(mayaNode)
+
+        return containerHandle.object()
+
+
+    def __indexContainer(self, containerNode):
+        containerHandle = om2.MObjectHandle(containerNode)
+        containerHash = containerHandle.hashCode()
+
+        memberHashes = self.__containers.setdefault(containerHash, set())
+        for eachMember in om2.MFnContainerNode(containerNode).getMembers():
+            memberHandle = om2.MObjectHandle(eachMember)
+            memberHash = memberHandle.hashCode()
+            self.__members[memberHash] = (memberHandle, containerHandle)
+            memberHashes.add(memberHash)
+
+
+    def __addMember(self, memberNode, containerNode):
+        memberHandle = om2.MObjectHandle(memberNode)
+        containerHandle = om2.MObjectHandle(containerNode)
+        memberHash = memberHandle.hashCode()
+
+        self.__dropMember(memberHash)
+        self.__members[memberHash] = (memberHandle, containerHandle)
+        self.__containers.setdefault(containerHandle.hashCode(), set()).add(memberHash)
+
+
+    def __dropMember(self, memberHash):
+        entry = self.__members.pop(memberHash, None)
+        if entry is None:
+            return
+
+        memberHashes = self.__containers.get(entry[1].hashCode())
+        if memberHashes is not None:
+            memberHashes.discard(memberHash)
+
+
+    def __dropContainer(self, containerHash):
+        for eachMemberHash in self.__containers.pop(containerHash, ()):
+            self.__members.pop(eachMemberHash, None)
+
+
+    def __onConnection(self, srcPlug, dstPlug, made, clientData):
+        if not self.__isBuilt or self.__isSuspended:
+            return
+
+        dstNode = dstPlug.node()
+        srcNode = srcPlug.node()
+
+        if dstNode.hasFn(om2.MFn.kHyperLayout):
+            # a node's message going in or out of a layout is a membership change
+            if made:
+                containerNode = containerFromLayout(dstNode)
+                if containerNode is not None:
+                    self.__addMember(srcNode, containerNode)
+            else:
+                self.__dropMember(om2.MObjectHandle(srcNode).hashCode())
+
+        elif srcNode.hasFn(om2.MFn.kHyperLayout) and dstNode.hasFn(om2.MFn.kContainer):
+            # a whole layout being attached to or detached from a container
+            containerHash = om2.MObjectHandle(dstNode).hashCode()
+            self.__dropContainer(containerHash)
+            if made:
+                self.__indexContainer(dstNode)
+
+
+    def __onNodeRemoved(self, node, clientData):
+        if not self.__isBuilt or self.__isSuspended:
+            return
+
+        nodeHash = om2.MObjectHandle(node).hashCode()
+        self.__dropMember(nodeHash)
+        if node.hasFn(om2.MFn.kContainer):
+            self.__dropContainer(nodeHash)
+
+
+    def __onBeforeSceneIO(self, clientData):
+        self.__isSuspended = True
+        self.invalidate()
+
+
+    def __onAfterSceneIO(self, clientData):
+        self.__isSuspended = False
+
+
+# Only one index is necessary per session, it's installed the first time
+#   a command needs it and removed alongside the plugin,
+#   see firstRunSetup() and uninitializePlugin()
+CONTAINER_INDEX = ContainerIndex()
+
+
+def firstRunSetup():
+    """
+    Everything the commands need that loading the plugin doesn't, done once
+      the first time any of them runs, and timed into LOAD_TIMES
+    :return: `None`
+    """
+    if CONTAINER_INDEX.isInstalled:
+        return
+
+    start = default_timer()
+    CONTAINER_INDEX.install()
+    LOAD_TIMES['deferred']['containerIndex'] = default_timer() - start
 
 
 # Just some strings we happen to re-use a lot for keywords.
@@ -161,6 +426,351 @@ def cmdFriendlyNameFromPlug(plug):
                             useLongNames=True)
 
 
+def plugFromCmdFriendlyName(plugName):
+    """
+    Inverse of cmdFriendlyNameFromPlug()
+    :param plugName: `str` full path, host object included, to a plug, or an empty string
+    :return: `MPlug | None` the plug, None for an empty string
+    """
+    if not plugName:
+        return None
+    sel = om2.MSelectionList()
+    sel.add(plugName)
+    return sel.getPlug(0)
+
+
+SWAP_OP_CONNECT = 'connect'
+SWAP_OP_DISCONNECT = 'disconnect'
+SWAP_OP_SWAP = 'swap'
+
+class SwapOperation(object):
+    """
+    A single decision taken on a toSwap pair, separated from the act of applying it.
+    It keeps the plugs the decision was based on, which is all that's needed to
+      both check later on that the graph still looks the same, and to apply it.
+    """
+    # plug roles in the order they are serialised
+    PLUG_KEYS = ('trackerOrigin', 'trackerGuided', 'activeOrigin', 'activeGuided', 'activeGuidedSource')
+
+    def __init__(self, trackerOrigin, trackerGuided, activeOrigin, activeGuided, activeGuidedSource):
+        """
+        :param trackerOrigin: `MPlug` origin on tracker panel
+        :param trackerGuided: `MPlug | None` guided on tracker panel
+        :param activeOrigin: `MPlug | None` source of tracked origin plug
+        :param activeGuided: `MPlug | None` source of tracked guided plug
+        :param activeGuidedSource: `MPlug | None` most upstream plug to swap
+        """
+        self.trackerOrigin = trackerOrigin
+        self.trackerGuided = trackerGuided
+        self.activeOrigin = activeOrigin
+        self.activeGuided = activeGuided
+        self.activeGuidedSource = activeGuidedSource
+
+        if activeOrigin is not None and activeGuidedSource is None:
+            self.kind = SWAP_OP_CONNECT
+        elif activeOrigin is None and activeGuidedSource is not None:
+            self.kind = SWAP_OP_DISCONNECT
+        elif activeOrigin is not None and activeGuidedSource is not None:
+            self.kind = SWAP_OP_SWAP
+        else:
+            raise ValueError("a swap operation with neither an active origin or a guided source does nothing")
+
+
+    @classmethod
+    def fromTrackerPlugs(cls, trPlug_origin, trPlug_guided):
+        """
+        Inspects the connections around a tracked pair and decides what
+          toggling it requires
+        :param trPlug_origin: `MPlug` origin on tracker panel
+        :param trPlug_guided: `MPlug` guided on tracker panel
+        :return: `SwapOperation | None` None if the pair requires nothing to be done
+        """
+        actPlug_origin = None
+        actPlug_guided = None
+        actPlug_guidedSource = None
+
+        if trPlug_origin.isDestination:
+            actPlug_origin = trPlug_origin.source()
+
+        if trPlug_guided.isDestination:
+            actPlug_guided = trPlug_guided.source()
+            if actPlug_guided.isDestination:
+                actPlug_guidedSource = actPlug_guided.source()
+
+        doNothing = (actPlug_origin is None) and (actPlug_guidedSource is None)
+        if doNothing:
+            return None
+
+        return cls(trPlug_origin, trPlug_guided, actPlug_origin, actPlug_guided, actPlug_guidedSource)
+
+
+    @classmethod
+    def fromDict(cls, opDict):
+        """
+        :param opDict: `dict` as produced by asDict()
+        :return: `SwapOperation`
+        """
+        # plans written before the tracker's guided plug was recorded simply don't check it
+        op = cls(*[plugFromCmdFriendlyName(opDict.get(k, '')) for k in cls.PLUG_KEYS])
+        if op.kind != opDict['op']:
+            raise ValueError("operation recorded as {} resolves to {}".format(opDict['op'], op.kind))
+        return op
+
+
+    def asDict(self):
+        """
+        :return: `dict` JSON friendly representation of the operation, plugs are stored by name
+        """
+        opDict = {'op': self.kind}
+        for k in self.PLUG_KEYS:
+            opDict[k] = cmdFriendlyNameFromPlug(getattr(self, k))
+        return opDict
+
+
+    def isCurrent(self):
+        """
+        Checks the connections this operation was decided on are still in place
+        :return: `bool`
+        """
+        if self.activeOrigin is None:
+            if self.trackerOrigin.isDestination:
+                return False
+        elif not self.trackerOrigin.isDestination or self.trackerOrigin.source() != self.activeOrigin:
+            return False
+
+        if self.trackerGuided is not None:
+            if self.activeGuided is None:
+                if self.trackerGuided.isDestination:
+                    return False
+            elif not self.trackerGuided.isDestination or self.trackerGuided.source() != self.activeGuided:
+                return False
+
+        if self.activeGuidedSource is None:
+            return self.activeGuided is None or not self.activeGuided.isDestination
+
+        return self.activeGuided.isDestination and self.activeGuided.source() == self.activeGuidedSource
+
+
+    def queueOn(self, dgMod):
+        """
+        Queues the operation on a modifier, nothing is applied until the modifier runs
+        :param dgMod: `MDGModifier`
+        :return: `None`
+        """
+        if self.kind == SWAP_OP_CONNECT:
+            dgMod.connect(self.activeOrigin, self.activeGuided)
+            dgMod.disconnect(self.activeOrigin, self.trackerOrigin)
+
+        elif self.kind == SWAP_OP_DISCONNECT:
+            dgMod.disconnect(self.activeGuidedSource, self.activeGuided)
+            dgMod.connect(self.activeGuidedSource, self.trackerOrigin)
+
+        elif self.kind == SWAP_OP_SWAP:
+            # a modifier has no forced connection, so we break
+            #   both existing inputs before crossing them over
+            dgMod.disconnect(self.activeOrigin, self.trackerOrigin)
+            dgMod.disconnect(self.activeGuidedSource, self.activeGuided)
+            dgMod.connect(self.activeGuidedSource, self.trackerOrigin)
+            dgMod.connect(self.activeOrigin, self.activeGuided)
+
+        else:
+            # the constructor only ever produces one of the above,
+            #   if things get to this point something mutated the kind after the fact
+            raise RuntimeError("WTF, mate?!")
+
+
+def planSwapFromPanel(panelMob):
+    """
+    Planning phase of a guide toggle, walks every toSwap element on a tool parameters
+      panel and decides what each requires, without touching the graph
+    :param panelMob: `MObject` the tool parameters DAG node of a component
+    :return: `list` of `SwapOperation`
+    """
+    mfn_panelDag = om2.MFnDagNode(panelMob)
+    plug_toSwap = mfn_panelDag.findPlug('toSwap', False)
+
+    ops = []
+    for eachNamedCouple in iterSwapPlugs(plug_toSwap):
+        op = SwapOperation.fromTrackerPlugs(eachNamedCouple[TRACKER_PLUG_NAMES[0]],
+                                            eachNamedCouple[TRACKER_PLUG_NAMES[1]])
+        if op is not None:
+            ops.append(op)
+    return ops
+
+
+class SwapPlan(object):
+    """
+    Ordered collection of per component swap operations.
+    It can be exported to JSON for a dry run, loaded back, checked against
+      the current graph and applied, as long as that graph hasn't changed
+      since the plan was made.
+    """
+    VERSION = 1
+
+    def __init__(self):
+        self.components = [] # list of (componentName, [SwapOperation, ...])
+
+
+    def addComponent(self, componentName, ops):
+        """
+        :param componentName: `str`
+        :param ops: `list` of `SwapOperation`
+        :return: `None`
+        """
+        self.components.append((componentName, ops))
+
+
+    @property
+    def operationCount(self):
+        """
+        :return: `int` total number of operations across all components
+        """
+        return sum(len(ops) for _, ops in self.components)
+
+
+    def toJson(self, **kwargs):
+        """
+        :param kwargs: forwarded to json.dumps()
+        :return: `str`
+        """
+        import json
+        return json.dumps({'version': self.VERSION,
+                           'components': [{'component': componentName,
+                                           'operations': [op.asDict() for op in ops]}
+                                          for componentName, ops in self.components]},
+                          **kwargs)
+
+
+    @classmethod
+    def fromJson(cls, jsonString):
+        """
+        Rebuilds a plan from its JSON form, resolving all plugs by name
+        :param jsonString: `str` as produced by toJson()
+        :return: `SwapPlan`
+        """
+        import json
+        planDict = json.loads(jsonString)
+        if planDict.get('version') != cls.VERSION:
+            raise ValueError("unsupported swap plan version {}".format(planDict.get('version')))
+
+        plan = cls()
+        for eachComponent in planDict['components']:
+            plan.addComponent(eachComponent['component'],
+                              [SwapOperation.fromDict(opDict) for opDict in eachComponent['operations']])
+        return plan
+
+
+    def isCurrent(self):
+        """
+        :return: `bool` True if every operation in the plan still matches the graph
+        """
+        return all(op.isCurrent() for _, ops in self.components for op in ops)
+
+
+    def queueOn(self, dgMod):
+        """
+        Apply phase, queues every operation on a modifier
+        :param dgMod: `MDGModifier`
+        :return: `None`
+        """
+        for _, ops in self.components:
+            for op in ops:
+                op.queueOn(dgMod)
+
+
+def flaggedNodesFromComponent(componentDict):
+    """
+    Collects the nodes flagged for deletion by their connection to the
+      tool parameters toDelete plug
+    :param componentDict: `dict` as returned by importantObjectsFromContainer()
+    :return: `list` of `MObject`
+    """
+    mfn_panelDag = om2.MFnDagNode(componentDict[TOOLPARAMETERS_SUFFIX].object())
+    plug_toDelete = mfn_panelDag.findPlug('toDelete', False)
+
+    flaggedMobs = []
+    for i in xrange(plug_toDelete.evaluateNumElements()):
+        elemPlug = plug_toDelete.elementByPhysicalIndex(i)
+        if elemPlug.isDestination:
+            flaggedMobs.append(elemPlug.source().node())
+    return flaggedMobs
+
+
+def guideFromComponent(componentDict):
+    """
+    :param componentDict: `dict` as returned by importantObjectsFromContainer()
+    :return: `MObject | None` the guide DAG object for the component if it has one
+    """
+    guideMobha = componentDict[GUIDE_KEY]
+    if guideMobha is None or not guideMobha.isValid() or guideMobha.object().isNull():
+        return None
+
+    guideMob = guideMobha.object()
+    assert guideMob.hasFn(om2.MFn.kDagNode), "guide object stored in dictionary doesn't seem to be a DAG node"
+    return guideMob
+
+
+def queueBulkDeletion(dagMod, mobs):
+    """
+    Deduplicates a collection of nodes and queues their deletion on a modifier.
+    DAG nodes are ordered deepest first, so a child is always gone before its parent,
+      and deleting the parent doesn't leave a dangling operation for the child.
+    :param dagMod: `MDagModifier`
+    :param mobs: `iterable` of `MObject`
+    :return: `int` number of unique nodes queued for deletion
+    """
+    buckets = dict() # hashCode -> list of MObjectHandle, collisions are just compared
+    uniqueMobs = []
+    for eachMob in mobs:
+        mobha = om2.MObjectHandle(eachMob)
+        if not mobha.isValid():
+            continue
+
+        bucket = buckets.setdefault(mobha.hashCode(), [])
+        if any(eachHandle == mobha for eachHandle in bucket):
+            continue
+        bucket.append(mobha)
+        uniqueMobs.append(eachMob)
+
+    def dagDepth(mob):
+        if mob.hasFn(om2.MFn.kDagNode):
+            return om2.MDagPath.getAPathTo(mob).length()
+        return 0
+
+    uniqueMobs.sort(key=dagDepth, reverse=True)
+    for eachMob in uniqueMobs:
+        dagMod.deleteNode(eachMob)
+
+    return len(uniqueMobs)
+
+
+def uniqueContainersFromList(obList):
+    """
+    Reduces a selection list to the unique containers its objects belong to,
+      preserving the order in which each container was first encountered.
+    Any number of objects from the same component will therefore only yield
+      that component once.
+    :param obList: `MSelectionList`
+    :return: `list` of `MObjectHandle` one per unique container found
+    """
+    containerHandles = []
+    seenHashes = set()
+
+    for i in xrange(obList.length()):
+        containerNode = CONTAINER_INDEX.containerOf(obList.getDependNode(i))
+        if containerNode is None or containerNode.isNull():
+            continue
+
+        containerHandle = om2.MObjectHandle(containerNode)
+        if containerHandle.hashCode() in seenHashes:
+            continue
+
+        seenHashes.add(containerHandle.hashCode())
+        containerHandles.append(containerHandle)
+
+    return containerHandles
+
+
 RUN_LOCAL_INSTANCE_MODE = False # If on the class will be able to run without
                                 #   being managed by the Maya plugin registrar
                                 #   this is only really useful for debug and dev purposes
@@ -168,17 +778,26 @@ class SwapGuideControl(om2.MPxCommand):
     """
     General Maya command with flags for CultOfRig style components to operate on
       a general component's guide mode.
+    Any number of objects can be passed in, they are reduced to the unique components
+      they belong to and each phase requested runs over all of them in one go.
      * -swp will swap plugs from the tool parameters pairings as needed to toggle
              a guide's effect on or off
      * -rd  will remove all nodes flagged for deletion by their connection
              to the tool parameters plug
      * -rg  will remove the top DAG object for a component's guide taking the
              hierarchy with it
+     * -dr  will only plan the swap and return it as JSON, nothing is changed
+     * -fp  will apply a plan previously returned by -dr, provided the graph
+             hasn't changed since
+    The result is a string array with one entry per component reporting
+      what was done to it.
+    All edits are queued on an MDagModifier owned by the command instance,
+      which is what undo and redo replay.
     """
-    __needsUndoing = 0 # Start with None for not set, replace with meaningful int during run
-    __containerHandle = None
-    __componentDict = dict()
-    __toolParsMobha = None
+    __dgModifier = None
+    __componentDicts = list()
+    __componentResults = list()
+    __planResults = list() # (componentName, result) for the components of a plan passed with -fp
 
     @classmethod
     def swgc_cmd_creator(cls):
@@ -215,17 +834,20 @@ class SwapGuideControl(om2.MPxCommand):
         """
 
         stx = om2.MSyntax()
-        stx.setObjectType(om2.MSyntax.kSelectionList, 1, 1)
+        stx.setObjectType(om2.MSyntax.kSelectionList, 0)
         stx.useSelectionAsDefault(True)
-        # ^^ We do allow for an active selection to pass its first object in
+        # ^^ We do allow for an active selection to be passed in
         #       if the command is called with no arguments
 
-        # We don't want to complicate undo work by storing reductions of the selection
-        # We limit the command to operate on one object at a time.
-        # It's the responsibility of the called to support multiselection as needed.
+        # There is no upper bound to the objects passed in, they are reduced
+        #   to unique containers in doIt() and all of them are processed
+        #   within the same command, and therefore within the same undo step.
+        # No lower bound either, since a plan can be applied on its own.
         stx.addFlag('-sw', '-swapPlugs', om2.MSyntax.kBoolean)
         stx.addFlag('-rd', '-removeDG', om2.MSyntax.kBoolean)
         stx.addFlag('-rg', '-removeDAG', om2.MSyntax.kBoolean)
+        stx.addFlag('-dr', '-dryRun', om2.MSyntax.kBoolean)
+        stx.addFlag('-fp', '-fromPlan', om2.MSyntax.kString)
 
         return stx
 
@@ -254,6 +876,7 @@ class SwapGuideControl(om2.MPxCommand):
         :param args: in new-api mode this is probably going to be a tuple
         :return: `None`
         """
+        firstRunSetup()
 
         if not RUN_LOCAL_INSTANCE_MODE:
             argDB = om2.MArgDatabase(self.syntax(), args)
@@ -261,166 +884,185 @@ class SwapGuideControl(om2.MPxCommand):
             sw = argDB.isFlagSet('-sw')
             rd = argDB.isFlagSet('-rd')
             rg = argDB.isFlagSet('-rg')
+            dr = argDB.isFlagSet('-dr')
+            planJson = argDB.flagArgumentString('-fp', 0) if argDB.isFlagSet('-fp') else None
         else: # debug only case, set manually as needed
             obList = om2.MGlobal.getActiveSelectionList()
             sw = True
             rd = False
             rg = False
-
-        # We assume there can only be one object in the list we received
-        #   based on the constraints we established for the arguments
-        mob = obList.getDependNode(0)
-
-        containerNode = containerFromNode(mob)
-        self.__containerHandle = om2.MObjectHandle(containerNode)
-
-
-        if containerNode is None or containerNode.isNull():
+            dr = False
+            planJson = None
+
+        self.__componentDicts = [importantObjectsFromContainer(eachHandle)
+                                 for eachHandle in uniqueContainersFromList(obList)]
+        self.__componentResults = [{'swapped': 0, 'removedDG': 0, 'removedDAG': 0}
+                                   for _ in self.__componentDicts]
+        self.__planResults = list()
+        self.__dgModifier = om2.MDagModifier()
+
+        # Planning phase, nothing in the graph is touched until the plan is applied
+        plan = None
+        if planJson is not None:
+            plan = SwapPlan.fromJson(planJson)
+            if not plan.isCurrent():
+                raise RuntimeError("swap plan is stale, the graph changed since it was made")
+        elif sw or dr:
+            plan = self.planSwap()
+
+        if dr:
+            self.setResult(plan.toJson())
             return
-        else:
-            self.__componentDict = importantObjectsFromContainer(self.__containerHandle)
-            self.__toolParsMobha = self.__componentDict[TOOLPARAMETERS_SUFFIX]
-
-            requiresPanel = sw or rg
-
-            if requiresPanel and (self.__toolParsMobha is None or not self.__toolParsMobha.isValid()):
-                return
-
-        if sw:
-            # This section is responsible for, if invoked, swapping the plugs
-            #     that set the state of the component to guided or unguided
-            mfn_panelDag = om2.MFnDagNode(self.__toolParsMobha.object())
-            plug_toSwap = mfn_panelDag.findPlug('toSwap', False)
-
-            for eachNamedCouple in iterSwapPlugs(plug_toSwap):
-                trPlug_origin = eachNamedCouple[TRACKER_PLUG_NAMES[0]] # origin on tracker panel
-                trPlug_guided = eachNamedCouple[TRACKER_PLUG_NAMES[1]] # guided on tracker panel
-
-                actPlug_origin = None # source of tracked origin plug, might remain None
-                actPlug_originSource = None # source of active origin plug, might remain None
-                actPlug_guided = None # source of tracked guided plug, might remain None
-                actPlug_guidedSource = None # most upstream plug to swap, might remain None
-
-                if trPlug_origin.isDestination:
-                    actPlug_origin = trPlug_origin.source()
-                    if actPlug_origin.isDestination:
-                        actPlug_originSource = actPlug_origin.source()
-
-                if trPlug_guided.isDestination:
-                    actPlug_guided = trPlug_guided.source()
-                    if actPlug_guided.isDestination:
-                        actPlug_guidedSource = actPlug_guided.source()
-
-                doNothing = (actPlug_origin is None) and (actPlug_guidedSource is None)
-                if doNothing:
-                    continue
-                else: # else is redundant here, it's only for clarity and legibility
-                    self.__needsUndoing = 1
-
-                name_trOrigin = cmdFriendlyNameFromPlug(trPlug_origin)
-                name_trGuided = cmdFriendlyNameFromPlug(trPlug_guided)
-
-                name_actOrigin = cmdFriendlyNameFromPlug(actPlug_origin)
-                name_actOriginSource = cmdFriendlyNameFromPlug(actPlug_originSource)
-                name_actGuided = cmdFriendlyNameFromPlug(actPlug_guided)
-                name_actGuidedSource = cmdFriendlyNameFromPlug(actPlug_guidedSource)
-
-                connect = actPlug_origin is not None and actPlug_guidedSource is None
-                disconnect = actPlug_origin is None and actPlug_guidedSource is not None
-                swap = actPlug_origin is not None and actPlug_guidedSource is not None
-
-                if connect:
-                    m_cmds.connectAttr(name_actOrigin, name_actGuided)
-                    m_cmds.disconnectAttr(name_actOrigin, name_trOrigin)
-
-                elif disconnect:
-                    m_cmds.disconnectAttr(name_actGuidedSource, name_actGuided)
-                    m_cmds.connectAttr(name_actGuidedSource, name_trOrigin)
-
-                elif swap:
-                    m_cmds.connectAttr(name_actGuidedSource, name_trOrigin, force=True)
-                    m_cmds.connectAttr(name_actOrigin, name_actGuided, force=True)
-
-                else:
-                    # if things get to this point it means that no combination of
-                    #   flags ever took place and all cases are False.
-                    # This error should literally be impossible since check coverage is complete.
-                    # If this occurs something might have mutated the various branching flags
-                    #   between checks, which would be extremely unlikely to happen
-                    raise RuntimeError("WTF, mate?!")
-        # end swap
+
+        # Each phase runs across all components before the next one starts,
+        #   that way removals can't pull nodes from under a later component's swap
+        if plan is not None:
+            plan.queueOn(self.__dgModifier)
+            if planJson is not None:
+                # a loaded plan might not relate to the objects passed in,
+                #   so it reports on its own components, kept apart from the
+                #   component dicts since removals have no objects to work on for them
+                for componentName, ops in plan.components:
+                    self.__planResults.append((componentName,
+                                               {'swapped': len(ops), 'removedDG': 0, 'removedDAG': 0}))
+
+        # Removals are gathered across all components first and queued in one go,
+        #   so the cost scales with the nodes removed rather than with components
+        toRemove = []
+        if rd:
+            for compDict, compResult in zip(self.__componentDicts, self.__componentResults):
+                if self.hasValidPanel(compDict):
+                    flaggedMobs = flaggedNodesFromComponent(compDict)
+                    compResult['removedDG'] = len(flaggedMobs)
+                    toRemove.extend(flaggedMobs)
 
         if rg:
-            # This section, if invoked, is responsible to iterate the plugs
-            #     flagging what objects require deletion and issuing
-            #     the command to delete each
-            mfn_panelDag = om2.MFnDagNode(self.__toolParsMobha.object())
-            plug_toDelete = mfn_panelDag.findPlug('toDelete', False)
+            for compDict, compResult in zip(self.__componentDicts, self.__componentResults):
+                guideMob = guideFromComponent(compDict)
+                if guideMob is not None:
+                    compResult['removedDAG'] = 1
+                    toRemove.append(guideMob)
+
+        queueBulkDeletion(self.__dgModifier, toRemove)
 
-            elemCount = plug_toDelete.evaluateNumElements()
+        self.__dgModifier.doIt()
+        self.setResult(self.resultsAsStrings())
 
-            foundAtLeastOne = 0
-            for i in xrange(elemCount):
-                elemPlug = plug_toDelete.elementByPhysicalIndex(i)
-                if elemPlug.isDestination:
-                    foundAtLeastOne = 2
-                    sourceNode = elemPlug.source().node()
 
-                    if sourceNode.hasFn(om2.MFn.kDagNode):
-                        om2.MDagPath.getAPathTo(sourceNode)
-                        pathToNode = om2.MDagPath.getAPathTo(sourceNode).fullPathName()
-                    else:
-                        pathToNode = om2.MFnDependencyNode(sourceNode).name()
+    @staticmethod
+    def hasValidPanel(componentDict):
+        """
+        :param componentDict: `dict` as returned by importantObjectsFromContainer()
+        :return: `bool` True if the component has a usable tool parameters panel
+        """
+        toolParsMobha = componentDict[TOOLPARAMETERS_SUFFIX]
+        return toolParsMobha is not None and toolParsMobha.isValid()
 
-                    if pathToNode:
-                        m_cmds.delete(pathToNode)
 
-            self.__needsUndoing += foundAtLeastOne
-        # end delete DG nodes
+    def resultsAsStrings(self):
+        """
+        Formats what was done to each component during doIt() in a command friendly way
+        :return: `list` of `str` one entry per component
+        """
+        rows = [(compDict['componentName'], compResult)
+                for compDict, compResult in zip(self.__componentDicts, self.__componentResults)]
+        rows.extend(self.__planResults)
+        return ['{} swapped={} removedDG={} removedDAG={}'.format(componentName,
+                                                                 compResult['swapped'],
+                                                                 compResult['removedDG'],
+                                                                 compResult['removedDAG'])
+                for componentName, compResult in rows]
 
-        if rd:
-            # This section, if invoked, is responsible to delete the guide DAG object
-            #     for the component, which should take with it the entire hierarchy
-            guideMobha = self.__componentDict[GUIDE_KEY]
-            if guideMobha is None or not guideMobha.isValid() or guideMobha.object().isNull():
-                self.__needsUndoing = self.__needsUndoing or 0
-                return
 
-            guideMob = guideMobha.object()
-            assert guideMob.hasFn(om2.MFn.kDagNode), "guide object stored in dictionary doesn't seem to be a DAG node"
+    def planSwap(self):
+        """
+        Plans the swap for every component the command is operating on
+        :return: `SwapPlan`
+        """
+        plan = SwapPlan()
+        for compDict, compResult in zip(self.__componentDicts, self.__componentResults):
+            if not self.hasValidPanel(compDict):
+                continue
 
-            pathToGuide = om2.MDagPath.getAPathTo(guideMobha.object()).fullPathName()
-            m_cmds.delete(pathToGuide)
-        # end delete DAG node
+            ops = planSwapFromPanel(compDict[TOOLPARAMETERS_SUFFIX].object())
+            compResult['swapped'] = len(ops)
+            plan.addComponent(compDict['componentName'], ops)
+        return plan
 
 
-    @staticmethod
-    def undoIt():
+    def undoIt(self):
         """
         Maya expects this method to exist and to be able to call it if the command
-          is flagged as undoable. Since all we use is a bunch of commands
-          undoing is relatively trivial, and we can just call Maya's own undo
-          and let it go over the chunk of commands that was ran during doIt()
-        Normally this wouldn't be static as it might need to access something from
-          inside the instance of the command class that was run, but when
-          all these methods do is call a one-liner Maya command there really
-          is no reason for them to be more than a static wrapper of the factory undo call.
+          is flagged as undoable.
+        Everything doIt() did went through the modifier owned by this instance,
+          so undoing is just asking the modifier to reverse its own operations,
+          which leaves the rest of Maya's undo queue alone.
         :return: `None`
         """
-        m_cmds.undo()
+        self.__dgModifier.undoIt()
 
 
-    @staticmethod
-    def redoIt():
+    def redoIt(self):
         """
         See docstring for undoIt() above. This is equivalent except for redoing
           instead of undoing.
         :return: `None`
         """
-        m_cmds.redo()
+        self.__dgModifier.doIt()
+
+
+
+class LoadReport(om2.MPxCommand):
+    """
+    Returns LOAD_TIMES as JSON: how long importing the module, initializing the plugin
+      and registering each command took, and what was deferred to the first command run.
+    Nothing to undo, it only reads.
+    """
+    @classmethod
+    def cmdCreator(cls):
+        """
+        See SwapGuideControl.swgc_cmd_creator()
+        :return: `LoadReport`
+        """
+        return cls()
+
+
+    @staticmethod
+    def syntaxCreator():
+        """
+        :return: `MSyntax`
+        """
+        return om2.MSyntax()
+
+
+    @staticmethod
+    def hasSyntax():
+        return True
+
+
+    @staticmethod
+    def isUndoable():
+        return False
+
+
+    def doIt(self, args):
+        """
+        :return: `None`
+        """
+        import json
+        self.setResult(json.dumps(LOAD_TIMES, sort_keys=True))
 
 
 
+# Every command the plugin registers, initializePlugin() only walks this
+#   so loading is one registration per command and nothing else
+COMMANDS = ((CMD_NAME_SWAPGUIDECONTROL, SwapGuideControl,
+             SwapGuideControl.swgc_cmd_creator, SwapGuideControl.obSw2xR_stx_creator),
+            (CMD_NAME_LOADREPORT, LoadReport,
+             LoadReport.cmdCreator, LoadReport.syntaxCreator),
+            )
+
+
 def initializePlugin(mob):
     """
     This function is necessary for Maya to be able to operate on this file as a plug-in.
@@ -432,12 +1074,22 @@ def initializePlugin(mob):
     :param mob: `MObject` Some black boxed entry point for Maya to manage this plug-in
     :return: `None`
     """
+    start = default_timer()
+
     fnPlugin = om2.MFnPlugin(mob)
     fnPlugin.setName(PLUGIN_NAME)
 
-    fnPlugin.registerCommand(CMD_NAME_SWAPGUIDECONTROL,
-                             SwapGuideControl.swgc_cmd_creator,
-                             SwapGuideControl.obSw2xR_stx_creator)
+    for cmdName, _, creator, syntaxCreator in COMMANDS:
+        cmdStart = default_timer()
+        fnPlugin.registerCommand(cmdName, creator, syntaxCreator)
+        LOAD_TIMES['register'][cmdName] = default_timer() - cmdStart
+
+    profiler = profilerIfEnabled()
+    if profiler is not None:
+        for cmdName, cmdClass, _, _ in COMMANDS:
+            profiler.instrumentMethod(cmdClass, 'doIt', '{}.doIt'.format(cmdName))
+
+    LOAD_TIMES['initialize'] = default_timer() - start
 
 
 def uninitializePlugin(mob):
@@ -448,5 +1100,15 @@ def uninitializePlugin(mob):
     :return: `None`
     """
     fnPlugin = om2.MFnPlugin(mob)
-    fnPlugin.deregisterCommand(CMD_NAME_SWAPGUIDECONTROL)
+    for cmdName, _, _, _ in COMMANDS:
+        fnPlugin.deregisterCommand(cmdName)
+
+    CONTAINER_INDEX.uninstall()
+
+    profiler = profilerIfEnabled()
+    if profiler is not None:
+        # only our own, other tools may have instrumented theirs
+        profiler.restoreMethods(['{}.doIt'.format(cmdName) for cmdName, _, _, _ in COMMANDS])
+
 
+LOAD_TIMES['import'] = default_timer() - _LOAD_START
@@ -0,0 +1,698 @@
+"""
+A Plugin to mirror whole components, or a whole side of a character, as a single undoable step.
+
+A component is a *_cmpnt transform under the rig, it owns its DAG hierarchy and,
+  if it has one, the container it's published to along with all of the container's members.
+Its counterpart is the component named the same with the side token swapped,
+  e.g. arm_L_cmpnt and arm_R_cmpnt, and every member is paired with the member
+  of the counterpart that has its mirrored name.
+DAG members that can't be paired by name, typically because the other side
+  was just duplicated and Maya numbered its nodes, are paired by position in the
+  hierarchy instead, and are renamed to their mirrored name.
+
+For every pair the mirror then:
+ * renames counterparts that were paired by position
+ * sets the counterpart's local translate, rotate and scale so its world transform
+     mirrors the member's across the chosen plane, jointOrient, rotateAxis and the
+     rotate and scale pivots taken into account
+ * makes the counterpart's incoming connections match the member's, sources that belong
+     to the component are replaced with their counterpart, sources outside of it with the
+     node of the mirrored name if there is one, or left as they are if the name has no side
+Everything is worked out first, from a single pass over the scene's names,
+  then queued on one modifier, so any number of components cost one step to do and undo.
+
+See repository for license and details at https://github.com/cultofrig/didactic
+This software is provided as-is, with no warranties, under the BSD 3-clause license.
+"""
+
+import re
+
+from maya.api import _OpenMaya_py2 as om2
+
+
+def maya_useNewAPI():
+    """
+    See corps_guidance_plugin.py, Maya only needs this to exist
+    """
+    pass
+
+
+PLUGIN_NAME = 'mirror_component_commands'
+CMD_NAME_MIRRORCOMPONENT = 'corps_mirrorComponent'
+
+COMPONENT_SUFFIX = '_cmpnt'
+DEFAULT_FROM_SIDE = 'L'
+DEFAULT_TO_SIDE = 'R'
+
+AXIS_INDICES = {'x': 0, 'y': 1, 'z': 2}
+TRANSLATE_ATTRS = ('translateX', 'translateY', 'translateZ')
+ROTATE_ATTRS = ('rotateX', 'rotateY', 'rotateZ')
+SCALE_ATTRS = ('scaleX', 'scaleY', 'scaleZ')
+JOINT_ORIENT_ATTRS = ('jointOrientX', 'jointOrientY', 'jointOrientZ')
+
+
+def sidePattern(side):
+    """
+    :param side: `str` a side token, such as L
+    :return: `SRE_Pattern` matching the token as a whole word between underscores or name ends
+    """
+    return re.compile(r'(?<![A-Za-z0-9]){}(?![A-Za-z0-9])'.format(re.escape(side)))
+
+
+def mirroredName(name, fromPattern, toSide):
+    """
+    :param name: `str`
+    :param fromPattern: `SRE_Pattern` as returned by sidePattern()
+    :param toSide: `str`
+    :return: `str` the name with the side swapped, the same name if it has no side
+    """
+    return fromPattern.sub(toSide, name)
+
+
+def mirrorMatrix(worldMatrix, axis, behavior=True):
+    """
+    :param worldMatrix: `MMatrix`
+    :param axis: `int` 0, 1 or 2, the axis normal to the mirror plane
+    :param behavior: `bool` True to mirror all three axes, so mirrored rotations go the opposite way,
+                            False to only mirror the one normal to the plane, so world aligned stays world aligned
+    :return: `MMatrix` the mirrored world matrix, always right handed
+    """
+    reflection = om2.MMatrix()
+    reflection.setElement(axis, axis, -1.0)
+
+    if behavior:
+        flip = om2.MMatrix()
+        for i in xrange(3):
+            flip.setElement(i, i, -1.0)
+    else:
+        flip = reflection
+
+    return flip * worldMatrix * reflection
+
+
+def localValues(localMatrix, rotateAxis, jointOrient, rotateOrder, scaleMatrix=None, pivots=None):
+    """
+    Maya composes a transform's rotation as rotateAxis * rotate * jointOrient, and the whole as
+      -scalePivot * scale * scalePivot * scalePivotTranslate * -rotatePivot * rotation * rotatePivot * rotatePivotTranslate * translate
+    This solves for the rotate and translate parts given the whole, the scale and the pivots
+    :param localMatrix: `MMatrix` desired local matrix
+    :param rotateAxis: `MMatrix`
+    :param jointOrient: `MMatrix` identity for anything that isn't a joint
+    :param rotateOrder: `int` value of the rotateOrder attribute
+    :param scaleMatrix: `MMatrix | None` scale and shear the transform will have, only needed with pivots
+    :param pivots: `tuple | None` scalePivot, scalePivotTranslate, rotatePivot and rotatePivotTranslate
+                                  as `MVector`, None if they're all at the origin
+    :return: (`MVector`, `MEulerRotation`) translate and rotate
+    """
+    xfo = om2.MTransformationMatrix(localMatrix)
+    rotation = xfo.rotation(asQuaternion=True).asMatrix()
+    rotate = om2.MEulerRotation.decompose(rotateAxis.inverse() * rotation * jointOrient.inverse(), rotateOrder)
+    translate = xfo.translation(om2.MSpace.kTransform)
+
+    if pivots is not None:
+        # where the pivots alone take the origin, translate is added on top of that
+        scalePivot, scalePivotTranslate, rotatePivot, rotatePivotTranslate = pivots
+        if scaleMatrix is None:
+            scaleMatrix = om2.MMatrix()
+        scaled = -scalePivot * scaleMatrix + scalePivot + scalePivotTranslate
+        translate -= (scaled - rotatePivot) * rotation + rotatePivot + rotatePivotTranslate
+
+    return translate, rotate
+
+
+class HandleDict(object):
+    """
+    Dictionary keyed by Maya node, hash codes can collide so each one holds a short bucket
+    """
+    def __init__(self):
+        self.__buckets = dict()
+        self.__len = 0
+
+
+    def __len__(self):
+        return self.__len
+
+
+    def get(self, mob, default=None):
+        mobha = om2.MObjectHandle(mob)
+        for eachHandle, value in self.__buckets.get(mobha.hashCode(), ()):
+            if eachHandle == mobha:
+                return value
+        return default
+
+
+    def __contains__(self, mob):
+        return self.get(mob, self) is not self
+
+
+    def set(self, mob, value):
+        mobha = om2.MObjectHandle(mob)
+        bucket = self.__buckets.setdefault(mobha.hashCode(), [])
+        for i, (eachHandle, _) in enumerate(bucket):
+            if eachHandle == mobha:
+                bucket[i] = (mobha, value)
+                return
+        bucket.append((mobha, value))
+        self.__len += 1
+
+
+def nodeName(mob):
+    """
+    :param mob: `MObject`
+    :return: `str` a name that selects exactly this node, DAG short names can repeat
+    """
+    if mob.hasFn(om2.MFn.kDagNode):
+        return om2.MFnDagNode(mob).partialPathName()
+    return om2.MFnDependencyNode(mob).name()
+
+
+def isComponent(mob):
+    """
+    :param mob: `MObject`
+    :return: `bool` True for a *_cmpnt transform under a rig, same as is_component() in the Season01 scripts
+    """
+    if not mob.hasFn(om2.MFn.kTransform):
+        return False
+    fnDag = om2.MFnDagNode(mob)
+    if not fnDag.name().endswith(COMPONENT_SUFFIX):
+        return False
+    rigMob = fnDag.parent(0)
+    return not rigMob.hasFn(om2.MFn.kWorld) and om2.MFnDagNode(rigMob).parent(0).hasFn(om2.MFn.kWorld)
+
+
+def componentFromNode(mob):
+    """
+    :param mob: `MObject` any member of a component, or its container
+    :return: `MObject | None` the *_cmpnt transform the node belongs to
+    """
+    if mob.hasFn(om2.MFn.kContainer):
+        for eachMember in om2.MFnContainerNode(mob).getMembers():
+            if isComponent(eachMember):
+                return eachMember
+        return None
+
+    if not mob.hasFn(om2.MFn.kDagNode):
+        containerMob = containerFromNode(mob)
+        return componentFromNode(containerMob) if containerMob is not None else None
+
+    dagPath = om2.MDagPath.getAPathTo(mob)
+    while dagPath.length():
+        if isComponent(dagPath.node()):
+            return dagPath.node()
+        dagPath.pop()
+    return None
+
+
+def containerFromNode(mob):
+    """
+    message -> hyperLayout -> message -> container, see corps_guidance_plugin.py
+    :param mob: `MObject`
+    :return: `MObject | None`
+    """
+    msgPlug = om2.MFnDependencyNode(mob).findPlug("message", False)
+    for eachDestination in msgPlug.destinations():
+        layoutMob = eachDestination.node()
+        if not layoutMob.hasFn(om2.MFn.kHyperLayout):
+            continue
+        layoutMsgPlug = om2.MFnDependencyNode(layoutMob).findPlug("message", False)
+        for eachLayoutDestination in layoutMsgPlug.destinations():
+            if eachLayoutDestination.node().hasFn(om2.MFn.kContainer):
+                return eachLayoutDestination.node()
+
+
+def isBookkeeping(mob):
+    """
+    Containers and their hyperLayouts are wired by Maya, not by the rig
+    :param mob: `MObject`
+    :return: `bool`
+    """
+    return mob.hasFn(om2.MFn.kContainer) or mob.hasFn(om2.MFn.kHyperLayout)
+
+
+class Component(object):
+    """
+    A component's root, its container, and all of its members in hierarchy order,
+      DAG members breadth first so parents always come before their children
+    """
+    def __init__(self, rootMob):
+        """
+        :param rootMob: `MObject` the *_cmpnt transform
+        """
+        self.root = rootMob
+        self.name = om2.MFnDagNode(rootMob).name()
+
+        self.container = containerFromNode(rootMob)
+        if self.container is None:
+            fnRoot = om2.MFnDagNode(rootMob)
+            for i in xrange(fnRoot.childCount()):
+                self.container = containerFromNode(fnRoot.child(i))
+                if self.container is not None:
+                    break
+
+        self.members = []
+        seen = HandleDict()
+
+        def add(mob):
+            if mob not in seen:
+                seen.set(mob, True)
+                self.members.append(mob)
+
+        itDag = om2.MItDag(om2.MItDag.kBreadthFirst)
+        itDag.reset(rootMob, om2.MItDag.kBreadthFirst)
+        while not itDag.isDone():
+            add(itDag.currentItem())
+            itDag.next()
+
+        if self.container is not None:
+            add(self.container)
+            for eachMember in om2.MFnContainerNode(self.container).getMembers():
+                add(eachMember)
+
+        self.memberSet = seen
+
+
+def pairMembers(source, target, fromPattern, toSide):
+    """
+    :param source: `Component`
+    :param target: `Component`
+    :param fromPattern: `SRE_Pattern`
+    :param toSide: `str`
+    :return: (`HandleDict`, `list`, `list`) source member to target member,
+               (target MObject, new name) for members paired by position,
+               names of source members that have no counterpart
+    """
+    targetByName = dict()
+    for eachMob in target.members:
+        targetByName.setdefault(om2.MFnDependencyNode(eachMob).name(), []).append(eachMob)
+
+    pairs = HandleDict()
+    claimed = HandleDict()
+    renames = []
+    missing = []
+
+    unpaired = []
+    for eachMob in source.members:
+        name = mirroredName(om2.MFnDependencyNode(eachMob).name(), fromPattern, toSide)
+        candidates = [mob for mob in targetByName.get(name, ()) if mob not in claimed]
+        if candidates:
+            pairs.set(eachMob, candidates[0])
+            claimed.set(candidates[0], True)
+        else:
+            unpaired.append(eachMob)
+
+    # Anything left, if it's in the hierarchy, is the child of the same type
+    #   at the same position under the counterpart of its parent.
+    #   Members come parents first, so the parent is paired by now if it can be.
+    for eachMob in unpaired:
+        name = om2.MFnDependencyNode(eachMob).name()
+        if not eachMob.hasFn(om2.MFn.kDagNode) or eachMob == source.root:
+            missing.append(name)
+            continue
+
+        fnDag = om2.MFnDagNode(eachMob)
+        parentMob = fnDag.parent(0)
+        targetParent = pairs.get(parentMob)
+        if targetParent is None:
+            missing.append(name)
+            continue
+
+        fnParent = om2.MFnDagNode(parentMob)
+        position = 0
+        for i in xrange(fnParent.childCount()):
+            sibling = fnParent.child(i)
+            if sibling == eachMob:
+                break
+            if om2.MFnDependencyNode(sibling).typeName == fnDag.typeName:
+                position += 1
+
+        fnTargetParent = om2.MFnDagNode(targetParent)
+        found = None
+        for i in xrange(fnTargetParent.childCount()):
+            child = fnTargetParent.child(i)
+            if om2.MFnDependencyNode(child).typeName != fnDag.typeName:
+                continue
+            if position == 0:
+                found = child
+                break
+            position -= 1
+
+        if found is None or found in claimed:
+            missing.append(name)
+            continue
+
+        pairs.set(eachMob, found)
+        claimed.set(found, True)
+        renames.append((found, mirroredName(name, fromPattern, toSide)))
+
+    return pairs, renames, missing
+
+
+RUN_LOCAL_INSTANCE_MODE = False # See corps_guidance_plugin.py, debug and dev purposes only
+
+class MirrorComponent(om2.MPxCommand):
+    """
+    Mirrors components onto their counterparts on the other side, as a single undoable step.
+     * objects can be any member of a component, its root, or its container,
+         a component is only mirrored once however many of its members are passed
+     * -as/-allSide mirrors every component of the from side in the scene, objects are ignored
+     * -fs/-fromSide and -ts/-toSide are the side tokens, L and R by default
+     * -ax/-axis is the axis normal to the mirror plane, x by default
+     * -ori/-orientation mirrors orientation only, world aligned nodes stay world aligned,
+         by default all axes are mirrored so mirrored rotations behave the opposite way
+     * -nn/-noNames, -nt/-noTransforms and -nc/-noConnections leave that part out
+     * -dr/-dryRun only returns what would happen
+    The result is a string array with one line per component.
+    """
+    __dgModifier = None
+    __isApplied = False # False on a dry run, nothing ends up on the undo queue then
+
+    @classmethod
+    def cmdCreator(cls):
+        """
+        See corps_guidance_plugin.py for the Maya crud involved here
+        :return: `MirrorComponent`
+        """
+        return cls()
+
+
+    @staticmethod
+    def syntaxCreator():
+        """
+        :return: `MSyntax`
+        """
+        stx = om2.MSyntax()
+        stx.setObjectType(om2.MSyntax.kSelectionList, 0)
+        stx.useSelectionAsDefault(True)
+
+        stx.addFlag('-as', '-allSide', om2.MSyntax.kBoolean)
+        stx.addFlag('-fs', '-fromSide', om2.MSyntax.kString)
+        stx.addFlag('-ts', '-toSide', om2.MSyntax.kString)
+        stx.addFlag('-ax', '-axis', om2.MSyntax.kString)
+        stx.addFlag('-ori', '-orientation', om2.MSyntax.kBoolean)
+        stx.addFlag('-nn', '-noNames', om2.MSyntax.kBoolean)
+        stx.addFlag('-nt', '-noTransforms', om2.MSyntax.kBoolean)
+        stx.addFlag('-nc', '-noConnections', om2.MSyntax.kBoolean)
+        stx.addFlag('-dr', '-dryRun', om2.MSyntax.kBoolean)
+
+        return stx
+
+
+    @staticmethod
+    def hasSyntax():
+        return True
+
+
+    def isUndoable(self):
+        """
+        Maya asks once doIt() returned, a dry run changed nothing so it has nothing to undo
+        :return: `bool`
+        """
+        return self.__isApplied
+
+
+    def doIt(self, args):
+        """
+        Maya Factory method
+        :param args: in new-api mode this is probably going to be a tuple
+        :return: `None`
+        """
+        if not RUN_LOCAL_INSTANCE_MODE:
+            argDB = om2.MArgDatabase(self.syntax(), args)
+            obList = argDB.getObjectList()
+            allSide = argDB.isFlagSet('-as')
+            fromSide = argDB.flagArgumentString('-fs', 0) if argDB.isFlagSet('-fs') else DEFAULT_FROM_SIDE
+            toSide = argDB.flagArgumentString('-ts', 0) if argDB.isFlagSet('-ts') else DEFAULT_TO_SIDE
+            axisName = argDB.flagArgumentString('-ax', 0).lower() if argDB.isFlagSet('-ax') else 'x'
+            behavior = not argDB.isFlagSet('-ori')
+            doNames = not argDB.isFlagSet('-nn')
+            doTransforms = not argDB.isFlagSet('-nt')
+            doConnections = not argDB.isFlagSet('-nc')
+            dr = argDB.isFlagSet('-dr')
+        else: # debug only case, set manually as needed
+            obList = om2.MGlobal.getActiveSelectionList()
+            allSide = False
+            fromSide = DEFAULT_FROM_SIDE
+            toSide = DEFAULT_TO_SIDE
+            axisName = 'x'
+            behavior = True
+            doNames = doTransforms = doConnections = True
+            dr = True
+
+        if axisName not in AXIS_INDICES:
+            raise ValueError("-axis has to be one of x, y or z, not {}".format(axisName))
+        axis = AXIS_INDICES[axisName]
+        fromPattern = sidePattern(fromSide)
+
+        # the one and only pass over the scene's names, used to find counterparts outside of components
+        sceneNodes = dict()
+        it_dep = om2.MItDependencyNodes()
+        fn_dep = om2.MFnDependencyNode()
+        while not it_dep.isDone():
+            fn_dep.setObject(it_dep.thisNode())
+            sceneNodes.setdefault(fn_dep.name(), []).append(it_dep.thisNode())
+            it_dep.next()
+
+        if allSide:
+            roots = [mob for eachList in sceneNodes.itervalues() for mob in eachList
+                     if isComponent(mob) and fromPattern.search(om2.MFnDependencyNode(mob).name())]
+        else:
+            roots = [componentFromNode(obList.getDependNode(i)) for i in xrange(obList.length())]
+
+        sources = []
+        seenRoots = HandleDict()
+        for eachRoot in roots:
+            if eachRoot is None or eachRoot in seenRoots:
+                continue
+            seenRoots.set(eachRoot, True)
+            sources.append(Component(eachRoot))
+
+        self.__dgModifier = om2.MDGModifier()
+        report = []
+
+        # pair everything first, connections can go across components being mirrored together
+        mirrored = []
+        allPairs = HandleDict()
+        for eachSource in sources:
+            targetName = mirroredName(eachSource.name, fromPattern, toSide)
+            targetRoots = [mob for mob in sceneNodes.get(targetName, ()) if isComponent(mob)]
+            if targetName == eachSource.name or not targetRoots:
+                om2.MGlobal.displayWarning('{}: no counterpart named {} for {}'.format(CMD_NAME_MIRRORCOMPONENT,
+                                                                                     targetName, eachSource.name))
+                continue
+
+            target = Component(targetRoots[0])
+            pairs, renames, missing = pairMembers(eachSource, target, fromPattern, toSide)
+            for eachMob in eachSource.members:
+                pair = pairs.get(eachMob)
+                if pair is not None:
+                    allPairs.set(eachMob, pair)
+            mirrored.append((eachSource, target, pairs, renames, missing))
+
+        for eachSource, target, pairs, renames, missing in mirrored:
+            counts = {'paired': len(pairs), 'missing': len(missing), 'renamed': 0,
+                      'transforms': 0, 'connections': 0}
+
+            if doNames:
+                for targetMob, newName in renames:
+                    self.__dgModifier.renameNode(targetMob, newName)
+                counts['renamed'] = len(renames)
+
+            drivenPlugs = set()
+            if doConnections:
+                counts['connections'] = self.queueConnections(eachSource, pairs, allPairs,
+                                                              sceneNodes, fromPattern, toSide, drivenPlugs)
+
+            if doTransforms:
+                counts['transforms'] = self.queueTransforms(eachSource, pairs, allPairs,
+                                                            axis, behavior, drivenPlugs)
+
+            for name in missing:
+                om2.MGlobal.displayWarning('{}: {} has no counterpart in {}'.format(CMD_NAME_MIRRORCOMPONENT,
+                                                                                   name, target.name))
+
+            report.append('{} {} paired {} missing {} renamed {} transforms {} connections {}'.format(
+                          eachSource.name, target.name, counts['paired'], counts['missing'], counts['renamed'],
+                          counts['transforms'], counts['connections']))
+
+        if not dr:
+            self.__dgModifier.doIt()
+            self.__isApplied = True
+
+        om2.MGlobal.displayInfo('{}: {} components mirrored'.format(CMD_NAME_MIRRORCOMPONENT, len(report)))
+        self.setResult(report)
+
+
+    def queueConnections(self, source, pairs, allPairs, sceneNodes, fromPattern, toSide, drivenPlugs):
+        """
+        Queues the connections that make every target member's inputs match its source member's
+        :param source: `Component`
+        :param pairs: `HandleDict` this component's source member to target member
+        :param allPairs: `HandleDict` the same over every component being mirrored
+        :param sceneNodes: `dict` name to `list` of `MObject`
+        :param drivenPlugs: `set` filled with the names of the target plugs that end up connected
+        :return: `int` how many connections were queued
+        """
+        count = 0
+        for eachMob in source.members:
+            targetMob = pairs.get(eachMob)
+            if targetMob is None or isBookkeeping(eachMob):
+                continue
+
+            for dstPlug in om2.MFnDependencyNode(eachMob).getConnections():
+                if not dstPlug.isDestination:
+                    continue
+                srcPlug = dstPlug.source()
+                srcMob = srcPlug.node()
+                if isBookkeeping(srcMob):
+                    continue
+
+                targetSrcMob = allPairs.get(srcMob)
+                if targetSrcMob is None:
+                    srcName = om2.MFnDependencyNode(srcMob).name()
+                    candidates = sceneNodes.get(mirroredName(srcName, fromPattern, toSide))
+                    targetSrcMob = candidates[0] if candidates else srcMob
+
+                targetDstName = '{}.{}'.format(nodeName(targetMob), dstPlug.partialName(includeNonMandatoryIndices=True,
+                                                                                        useFullAttributePath=True,
+                                                                                        useLongNames=True))
+                targetSrcName = '{}.{}'.format(nodeName(targetSrcMob), srcPlug.partialName(includeNonMandatoryIndices=True,
+                                                                                           useFullAttributePath=True))
+                try:
+                    selList = om2.MSelectionList()
+                    selList.add(targetDstName)
+                    selList.add(targetSrcName)
+                    targetDstPlug = selList.getPlug(0)
+                    targetSrcPlug = selList.getPlug(1)
+                except RuntimeError:
+                    om2.MGlobal.displayWarning('{}: can\'t connect {} to {}'.format(CMD_NAME_MIRRORCOMPONENT,
+                                                                                   targetSrcName, targetDstName))
+                    continue
+
+                drivenPlugs.add(targetDstName)
+                currentSrcPlug = targetDstPlug.source()
+                if not currentSrcPlug.isNull:
+                    if currentSrcPlug == targetSrcPlug:
+                        continue
+                    self.__dgModifier.disconnect(currentSrcPlug, targetDstPlug)
+                self.__dgModifier.connect(targetSrcPlug, targetDstPlug)
+                count += 1
+
+        return count
+
+
+    def queueTransforms(self, source, pairs, allPairs, axis, behavior, drivenPlugs):
+        """
+        Queues local translate, rotate and scale values that mirror every transform member's world matrix
+        :param source: `Component`
+        :param pairs: `HandleDict` this component's source member to target member
+        :param allPairs: `HandleDict` the same over every component being mirrored
+        :param axis: `int`
+        :param behavior: `bool` see mirrorMatrix()
+        :param drivenPlugs: `set` names of the target plugs connections were queued for, left alone
+        :return: `int` how many transforms were set
+        """
+        mirroredWorlds = HandleDict()
+        count = 0
+        for eachMob in source.members:
+            targetMob = pairs.get(eachMob)
+            if targetMob is None or not eachMob.hasFn(om2.MFn.kTransform) or not targetMob.hasFn(om2.MFn.kTransform):
+                continue
+
+            sourcePath = om2.MDagPath.getAPathTo(eachMob)
+            targetPath = om2.MDagPath.getAPathTo(targetMob)
+            worldMatrix = mirrorMatrix(sourcePath.inclusiveMatrix(), axis, behavior)
+            mirroredWorlds.set(targetMob, worldMatrix)
+
+            # The parent's new world matrix if it's being mirrored too, members come parents first,
+            #   otherwise the one it has now
+            targetParent = om2.MFnDagNode(targetMob).parent(0)
+            parentWorld = mirroredWorlds.get(targetParent)
+            if parentWorld is None:
+                parentWorld = targetPath.exclusiveMatrix()
+
+            fnTarget = om2.MFnTransform(targetPath)
+            fnTargetDep = om2.MFnDependencyNode(targetMob)
+            rotateAxis = fnTarget.rotateOrientation(om2.MSpace.kTransform).asMatrix()
+            if targetMob.hasFn(om2.MFn.kJoint):
+                jointOrient = om2.MEulerRotation([fnTargetDep.findPlug(attr, False).asMAngle().asRadians()
+                                                  for attr in JOINT_ORIENT_ATTRS]).asMatrix()
+            else:
+                jointOrient = om2.MMatrix()
+            rotateOrder = fnTargetDep.findPlug('rotateOrder', False).asInt()
+
+            fnSourceDep = om2.MFnDependencyNode(eachMob)
+            scale = [fnSourceDep.findPlug(attr, False).asDouble() for attr in SCALE_ATTRS]
+            scaleXfo = om2.MTransformationMatrix()
+            scaleXfo.setScale(scale, om2.MSpace.kTransform)
+            scaleXfo.setShear(fnTarget.shear(om2.MSpace.kTransform), om2.MSpace.kTransform)
+            pivots = (om2.MVector(fnTarget.scalePivot(om2.MSpace.kTransform)),
+                      fnTarget.scalePivotTranslation(om2.MSpace.kTransform),
+                      om2.MVector(fnTarget.rotatePivot(om2.MSpace.kTransform)),
+                      fnTarget.rotatePivotTranslation(om2.MSpace.kTransform))
+
+            translate, rotate = localValues(worldMatrix * parentWorld.inverse(), rotateAxis, jointOrient, rotateOrder,
+                                            scaleXfo.asMatrix(), pivots)
+            rotate.setToClosestSolution(om2.MEulerRotation([fnTargetDep.findPlug(attr, False).asMAngle().asRadians()
+                                                            for attr in ROTATE_ATTRS], rotateOrder))
+
+            isSet = False
+            targetName = nodeName(targetMob)
+            for attrs, values, isAngle in ((TRANSLATE_ATTRS, (translate.x, translate.y, translate.z), False),
+                                           (ROTATE_ATTRS, (rotate.x, rotate.y, rotate.z), True),
+                                           (SCALE_ATTRS, scale, False)):
+                for attr, value in zip(attrs, values):
+                    plug = fnTargetDep.findPlug(attr, False)
+                    if plug.isLocked or plug.isDestination or plug.parent().isDestination:
+                        continue
+                    if '{}.{}'.format(targetName, attr) in drivenPlugs or '{}.{}'.format(targetName, attr[:-1]) in drivenPlugs:
+                        continue
+                    if isAngle:
+                        self.__dgModifier.newPlugValueMAngle(plug, om2.MAngle(value))
+                    else:
+                        self.__dgModifier.newPlugValueDouble(plug, value)
+                    isSet = True
+            count += isSet
+
+        return count
+
+
+    def undoIt(self):
+        """
+        Renames, connections and values all went through the modifier owned by this instance, so does their undo
+        :return: `None`
+        """
+        if self.__isApplied:
+            self.__dgModifier.undoIt()
+
+
+    def redoIt(self):
+        """
+        :return: `None`
+        """
+        if self.__isApplied:
+            self.__dgModifier.doIt()
+
+
+
+def initializePlugin(mob):
+    """
+    See corps_guidance_plugin.py
+    :param mob: `MObject`
+    :return: `None`
+    """
+    fnPlugin = om2.MFnPlugin(mob)
+    fnPlugin.setName(PLUGIN_NAME)
+
+    fnPlugin.registerCommand(CMD_NAME_MIRRORCOMPONENT,
+                             MirrorComponent.cmdCreator,
+                             MirrorComponent.syntaxCreator)
+
+
+def uninitializePlugin(mob):
+    """
+    See corps_guidance_plugin.py
+    :param mob: `MObject`
+    :return: `None`
+    """
+    fnPlugin = om2.MFnPlugin(mob)
+    fnPlugin.deregisterCommand(CMD_NAME_MIRRORCOMPONENT)
@@ -44,6 +44,48 @@ def containerFromNode(mayaNode):
                 return eachLayoutDestination.node()
 
 
+def containerIndexFromScene():
+    """
+    Builds a reverse index of container membership for the whole scene in one go.
+    Walking the hyperLayout hop in containerFromNode() for every selected object
+      adds up fast on large selections, asking each container for its members
+      once and then looking nodes up is a lot cheaper.
+    :return: `dict` {member hashCode: (member MObjectHandle, container MObjectHandle)}
+    """
+    index = {}
+
+    itr = om2.MItDependencyNodes(om2.MFn.kContainer)
+    while not itr.isDone():
+        containerHandle = om2.MObjectHandle(itr.thisNode())
+        for eachMember in om2.MFnContainerNode(itr.thisNode()).getMembers():
+            memberHandle = om2.MObjectHandle(eachMember)
+            index[memberHandle.hashCode()] = (memberHandle, containerHandle)
+        itr.next()
+
+    return index
+
+
+def containerFromIndex(mayaNode, index):
+    """
+    Index backed equivalent of containerFromNode()
+    :param mayaNode: `MObject` any dependency node in Maya
+    :param index: `dict` as returned by containerIndexFromScene()
+    :return: `MObject | None` the container object the argument is a member of if there is one
+                                otherwise None
+    """
+    memberHandle = om2.MObjectHandle(mayaNode)
+    entry = index.get(memberHandle.hashCode())
+    if entry is None:
+        return None
+
+    indexedMemberHandle, containerHandle = entry
+    if not indexedMemberHandle == memberHandle:
+        # hash collision, walk the graph instead
+        return containerFromNode(mayaNode)
+
+    return containerHandle.object()
+
+
 CONTAINER_SUFFIX = '_container'
 def iterContainersFromObjectIterator(generator, suffixFilter = CONTAINER_SUFFIX):
     """
@@ -57,8 +99,9 @@ def iterContainersFromObjectIterator(generator, suffixFilter = CONTAINER_SUFFIX)
     :return: `(str, MObjectHandle)` A tuple containing the name of the container and the
                                       Maya object handle of the container node
     """
+    index = containerIndexFromScene()
     for x in generator():
-        container = containerFromNode(x)
+        container = containerFromIndex(x, index)
         if container is None:
             continue
 
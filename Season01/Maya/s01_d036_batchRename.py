@@ -1,26 +1,15 @@
 from maya.api import OpenMaya as om2
 from maya import cmds as m_cmds
 
-sel = om2.MGlobal.getActiveSelectionList()
-selCount = sel.length()
-
-trimLength = len('toChange')
+# Renames the selection from _R_ to _L_ dropping the toChange prefix.
+# The work is done by the batch rename plugin's command, which checks every
+#   new name against the scene's names in one go, and renames everything
+#   in a single step that can be undone, so the undo queue is left alone.
+if not m_cmds.pluginInfo('batch_rename_plugin', query=True, loaded=True):
+    m_cmds.loadPlugin('batch_rename_plugin')
 
-hasActed = False
-dg_mod = om2.MDGModifier()
-for i in xrange(selCount):
-    currMob = sel.getDependNode(i)
-    fn = om2.MFnDependencyNode(currMob)
-    
-    currName = fn.name()
-    
-    newName = currName.replace('_R_', '_L_')[trimLength:]
-    if m_cmds.objExists(newName):
-        continue
-    else:
-        hasActed = True
-        dg_mod.renameNode(currMob, newName)
-
-if hasActed:    
-    dg_mod.doIt()
-    m_cmds.flushUndo()
+sel = om2.MGlobal.getActiveSelectionList()
+if sel.length():
+    renamed = m_cmds.corps_batchRename(regex=['_R_', '^toChange'],
+                                       replace=['_L_', ''])
+    om2.MGlobal.displayInfo('{} nodes renamed'.format(len(renamed or [])))
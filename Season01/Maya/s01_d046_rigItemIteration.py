@@ -1,6 +1,221 @@
 from maya.api import _OpenMaya_py2 as om2
 
+
+class RigIndex(object):
+    """
+    Cache of rig -> components -> input/output handles built in one DAG traversal.
+    DAG, rename and scene callbacks mark the rig a change happened under as dirty,
+      and only that rig is re-indexed on its next query.
+    Only a "rig" parented in or out under a top node, or a top node holding one
+      parented in or out under world, can add or remove a whole rig, those drop the lot.
+    Container members are cached per component the first time they're asked for,
+      and forgotten whenever a connection to a container's hyperLayout changes.
+    Until install() is called the functions below simply walk the DAG every time.
+    """
+    def __init__(self):
+        self._rigs = {} # rig hash -> rig entry dict
+        self._components = {} # component hash -> component entry dict
+        self._dirty_rigs = set()
+        self._callback_ids = []
+        self._is_built = False
+
+    @property
+    def is_installed(self):
+        return bool(self._callback_ids)
+
+    def install(self):
+        if self.is_installed:
+            return
+        ids = self._callback_ids
+        ids.append(om2.MDagMessage.addAllDagChangesCallback(self._on_dag_change))
+        ids.append(om2.MNodeMessage.addNameChangedCallback(om2.MObject(), self._on_name_changed))
+        for each_msg in (om2.MSceneMessage.kBeforeNew, om2.MSceneMessage.kBeforeOpen,
+                         om2.MSceneMessage.kAfterImport, om2.MSceneMessage.kAfterCreateReference):
+            ids.append(om2.MSceneMessage.addCallback(each_msg, self._on_scene_change))
+        ids.append(om2.MDGMessage.addConnectionCallback(self._on_connection))
+
+    def uninstall(self):
+        if self._callback_ids:
+            om2.MMessage.removeCallbacks(self._callback_ids)
+        self._callback_ids = []
+        self.invalidate()
+
+    def invalidate(self):
+        self._rigs.clear()
+        self._components.clear()
+        self._dirty_rigs.clear()
+        self._is_built = False
+
+    def build(self):
+        self.invalidate()
+
+        # rigs sit two levels under world, so we only look that deep for them
+        world_fn = om2.MFnDagNode(om2.MItDag().root())
+        for i in range(world_fn.childCount()):
+            top_fn = om2.MFnDagNode(world_fn.child(i))
+            for j in range(top_fn.childCount()):
+                child_mob = top_fn.child(j)
+                if om2.MFnDagNode(child_mob).name() == "rig":
+                    self._index_rig(child_mob)
+
+        self._is_built = True
+
+    def _index_rig(self, rig_mob):
+        rig_handle = om2.MObjectHandle(rig_mob)
+        rig_hash = rig_handle.hashCode()
+        self._drop_rig(rig_hash)
+
+        rig_entry = {'handle': rig_handle, 'components': []}
+        fn = om2.MFnDagNode(rig_mob)
+        for i in range(fn.childCount()):
+            child_mob = fn.child(i)
+            if om2.MFnDagNode(child_mob).name().endswith('_cmpnt'):
+                comp_entry = self._index_component(child_mob, rig_hash)
+                rig_entry['components'].append(comp_entry)
+
+        self._rigs[rig_hash] = rig_entry
+        self._dirty_rigs.discard(rig_hash)
+        return rig_entry
+
+    def _index_component(self, component_mob, rig_hash):
+        comp_entry = {'handle': om2.MObjectHandle(component_mob),
+                      'rig': rig_hash,
+                      'inputs': [],
+                      'outputs': [], # each output followed by its whole hierarchy
+                      'members': None, # container member handles, filled on first use
+                      }
+
+        fn = om2.MFnDagNode(component_mob)
+        for i in range(fn.childCount()):
+            child_mob = fn.child(i)
+            child_name = om2.MFnDagNode(child_mob).name()
+            if child_name.endswith('_input'):
+                comp_entry['inputs'].append(om2.MObjectHandle(child_mob))
+            elif child_name.endswith('_output'):
+                comp_entry['outputs'].append(om2.MObjectHandle(child_mob))
+
+                itr_dag = om2.MItDag()
+                itr_dag.reset(child_mob)
+                itr_dag.next()
+                while (not itr_dag.isDone()):
+                    comp_entry['outputs'].append(om2.MObjectHandle(itr_dag.currentItem()))
+                    itr_dag.next()
+
+        self._components[comp_entry['handle'].hashCode()] = comp_entry
+        return comp_entry
+
+    def _drop_rig(self, rig_hash):
+        rig_entry = self._rigs.pop(rig_hash, None)
+        if rig_entry is None:
+            return
+        for each_comp in rig_entry['components']:
+            self._components.pop(each_comp['handle'].hashCode(), None)
+
+    def _flush_dirty(self):
+        # re-indexes every dirty rig, so components added under them since become known
+        for rig_hash in list(self._dirty_rigs):
+            rig_entry = self._rigs.get(rig_hash)
+            if rig_entry is not None and rig_entry['handle'].isValid():
+                self._index_rig(rig_entry['handle'].object())
+            else:
+                self._drop_rig(rig_hash)
+        self._dirty_rigs.clear()
+
+    def _lookup(self, table, mob):
+        if not self._is_built:
+            self.build()
+        handle = om2.MObjectHandle(mob)
+        entry = table.get(handle.hashCode())
+        if (entry is None or not entry['handle'] == handle) and self._dirty_rigs:
+            # a miss might be something new under a rig that changed, not just yet indexed
+            self._flush_dirty()
+            entry = table.get(handle.hashCode())
+        if entry is None or not entry['handle'] == handle:
+            return None
+        return entry
+
+    def rig_entry(self, mob):
+        entry = self._lookup(self._rigs, mob)
+        if entry is not None and entry['handle'].hashCode() in self._dirty_rigs:
+            entry = self._index_rig(mob)
+        return entry
+
+    def component_entry(self, mob):
+        entry = self._lookup(self._components, mob)
+        if entry is not None and entry['rig'] in self._dirty_rigs:
+            self._index_rig(self._rigs[entry['rig']]['handle'].object())
+            entry = self._lookup(self._components, mob)
+        return entry
+
+    def _mark_dirty_from_path(self, dag_path):
+        # walks up from a changed path to the rig it belongs to, if any
+        path = om2.MDagPath(dag_path)
+        while path.length() > 0:
+            node_hash = om2.MObjectHandle(path.node()).hashCode()
+            if node_hash in self._rigs:
+                self._dirty_rigs.add(node_hash)
+                return True
+            path.pop()
+        return False
+
+    def _on_dag_change(self, msg_type, child_path, parent_path, client_data):
+        if not self._is_built:
+            return
+        if self._mark_dirty_from_path(parent_path):
+            return
+        if self._is_rig_level_change(child_path, parent_path):
+            self.invalidate()
+
+    def _is_rig_level_change(self, child_path, parent_path):
+        # a whole rig only comes or goes when a "rig" is parented in or out under a top node,
+        #  or a top node with a "rig" under it is parented in or out under world
+        parent_depth = parent_path.length()
+        if parent_depth > 1:
+            return False
+        try:
+            child_fn = om2.MFnDagNode(child_path.node())
+        except RuntimeError:
+            return True # can't tell what it was, so err on the safe side
+        if parent_depth == 1:
+            return child_fn.name() == "rig"
+        for i in range(child_fn.childCount()):
+            if om2.MFnDagNode(child_fn.child(i)).name() == "rig":
+                return True
+        return False
+
+    def _on_name_changed(self, node, prev_name, client_data):
+        if not self._is_built or not node.hasFn(om2.MFn.kDagNode):
+            return
+        if prev_name == "rig" or om2.MFnDagNode(node).name() == "rig":
+            self.invalidate()
+            return
+        if not self._rigs:
+            return
+        try:
+            node_path = om2.MDagPath.getAPathTo(node)
+        except RuntimeError:
+            return # being created, not parented anywhere yet
+        self._mark_dirty_from_path(node_path)
+
+    def _on_connection(self, src_plug, dst_plug, made, client_data):
+        # container membership lives in the connections to its hyperLayout
+        if not self._is_built or not dst_plug.node().hasFn(om2.MFn.kHyperLayout):
+            return
+        for each_comp in self._components.values():
+            each_comp['members'] = None
+
+    def _on_scene_change(self, client_data):
+        self.invalidate()
+
+
+# Install it to have the functions below query the index instead of walking the DAG
+RIG_INDEX = RigIndex()
+
+
 def is_control_rig(mob):
+    if RIG_INDEX.is_installed:
+        return RIG_INDEX.rig_entry(mob) is not None
+
     fn = om2.MFnDagNode(mob)
     is_named_correctly = fn.name() == "rig"
 
@@ -19,6 +234,9 @@ def is_control_rig(mob):
 
 
 def is_component(mob):
+    if RIG_INDEX.is_installed:
+        return RIG_INDEX.component_entry(mob) is not None
+
     fn = om2.MFnDagNode(mob)
 
     is_under_rig = is_control_rig(fn.parent(0))
@@ -29,6 +247,12 @@ def is_component(mob):
 
 
 def iter_components(rig_mob):
+    if RIG_INDEX.is_installed:
+        rig_entry = RIG_INDEX.rig_entry(rig_mob)
+        for each_comp in (rig_entry['components'] if rig_entry else ()):
+            yield each_comp['handle'].object()
+        return
+
     if is_control_rig(rig_mob):
         fn = om2.MFnDagNode(rig_mob)
         child_count = fn.childCount()
@@ -40,31 +264,126 @@ def iter_components(rig_mob):
                 yield child_mob
 
                 
+def container_from_node(mob):
+    # message -> hyperLayout -> message -> container, no names involved
+    msg_plug = om2.MFnDependencyNode(mob).findPlug("message", False)
+    for each_dest in msg_plug.destinations():
+        layout_mob = each_dest.node()
+        if not layout_mob.hasFn(om2.MFn.kHyperLayout):
+            continue
+
+        layout_msg_plug = om2.MFnDependencyNode(layout_mob).findPlug("message", False)
+        for each_layout_dest in layout_msg_plug.destinations():
+            if each_layout_dest.node().hasFn(om2.MFn.kContainer):
+                return each_layout_dest.node()
+
+
+def _container_candidates(component_mob):
+    # the component itself first, then its children (control, guide etc.)
+    #  in case only those were published to the container
+    yield component_mob
+    fn = om2.MFnDagNode(component_mob)
+    for i in range(fn.childCount()):
+        yield fn.child(i)
+
+
+def _cached_container(component_mob):
+    if not RIG_INDEX.is_installed:
+        return None, None
+    comp_entry = RIG_INDEX.component_entry(component_mob)
+    if comp_entry is None:
+        return None, None
+    container_handle = comp_entry.get('container')
+    if container_handle is not None and not container_handle.isValid():
+        container_handle = None
+    return comp_entry, container_handle
+
+
 def container_from_component(component_mob):
     assert is_component(component_mob)
 
-    comp_fn = om2.MFnDagNode(component_mob)
-    comp_dag_name = comp_fn.name()
-
-    container_name = "{}_container".format(comp_dag_name[:-6])
+    comp_entry, container_handle = _cached_container(component_mob)
+    if container_handle is not None:
+        return container_handle.object()
 
-    sel = om2.MSelectionList()
-    sel.add(container_name)
+    container_mob = None
+    for each_mob in _container_candidates(component_mob):
+        container_mob = container_from_node(each_mob)
+        if container_mob is not None:
+            break
 
-    container_mob = sel.getDependNode(0)
+    if comp_entry is not None and container_mob is not None:
+        comp_entry['container'] = om2.MObjectHandle(container_mob)
 
     return container_mob
 
 
+def containers_from_components(component_mobs):
+    """
+    Batch version of container_from_component().
+    Rather than walking each component's connections this asks every container
+      for its members once and looks all components up in that.
+    :param component_mobs: `iterable` of `MObject` components
+    :return: `list` of `MObject | None` the container of each component, in the same order
+    """
+    member_index = {}
+    itr = om2.MItDependencyNodes(om2.MFn.kContainer)
+    while not itr.isDone():
+        container_mob = itr.thisNode()
+        container_handle = om2.MObjectHandle(container_mob)
+        for each_member in om2.MFnContainerNode(container_mob).getMembers():
+            member_handle = om2.MObjectHandle(each_member)
+            member_index[member_handle.hashCode()] = (member_handle, container_handle)
+        itr.next()
+
+    containers = []
+    for each_comp in component_mobs:
+        comp_entry, container_handle = _cached_container(each_comp)
+
+        if container_handle is None:
+            for each_mob in _container_candidates(each_comp):
+                candidate_handle = om2.MObjectHandle(each_mob)
+                found = member_index.get(candidate_handle.hashCode())
+                if found is not None and found[0] == candidate_handle:
+                    container_handle = found[1]
+                    break
+
+            if comp_entry is not None and container_handle is not None:
+                comp_entry['container'] = container_handle
+
+        containers.append(container_handle.object() if container_handle is not None else None)
+
+    return containers
+
+
 def iter_component_members(component_mob):
-    container_fn = om2.MFnContainerNode(container_from_component(component_mob))
+    comp_entry = RIG_INDEX.component_entry(component_mob) if RIG_INDEX.is_installed else None
+    if comp_entry is not None and comp_entry['members'] is not None:
+        for each_handle in comp_entry['members']:
+            if each_handle.isValid():
+                yield each_handle.object()
+        return
+
+    container_mob = container_from_component(component_mob)
+    if container_mob is None:
+        return
+
+    container_fn = om2.MFnContainerNode(container_mob)
 
     members = container_fn.getMembers()
+    if comp_entry is not None:
+        comp_entry['members'] = [om2.MObjectHandle(each_member) for each_member in members]
     for each_member in members:
         yield each_member
 
 
 def iter_input(component_mob):
+    if RIG_INDEX.is_installed:
+        comp_entry = RIG_INDEX.component_entry(component_mob)
+        for each_handle in (comp_entry['inputs'] if comp_entry else ()):
+            yield each_handle.object()
+        return
+
     if is_component(component_mob):
         fn = om2.MFnDagNode(component_mob)
         child_count = fn.childCount()
@@ -77,6 +396,12 @@ def iter_input(component_mob):
 
 
 def iter_output(component_mob):
+    if RIG_INDEX.is_installed:
+        comp_entry = RIG_INDEX.component_entry(component_mob)
+        for each_handle in (comp_entry['outputs'] if comp_entry else ()):
+            yield each_handle.object()
+        return
+
     if is_component(component_mob):
         fn = om2.MFnDagNode(component_mob)
         child_count = fn.childCount()
@@ -96,4 +421,85 @@ def iter_output(component_mob):
 
                     yield curr_node
                     itr_dag.next()
-            
\ No newline at end of file
+            
+
+TRAVERSE_AS_OBJECTS = 'objects'
+TRAVERSE_AS_PATHS = 'paths'
+TRAVERSE_AS_HANDLES = 'handles'
+
+def traverse_dag(root_mobs, fn_type=om2.MFn.kInvalid, max_depth=-1, prune=None,
+                 mode=TRAVERSE_AS_OBJECTS, include_roots=True):
+    """
+    Depth first traversal under any number of roots, gathering results in bulk.
+    When there's neither a pruning predicate nor a depth limit the type filter is left
+      to MItDag itself, so nodes of other types never reach Python at all.
+    :param root_mobs: `iterable` of `MObject` DAG nodes to start from
+    :param fn_type: `int` MFn type the results need to have, kInvalid for any
+    :param max_depth: `int` how far below each root to go, negative for no limit
+    :param prune: `callable | None` takes an MObject, returning True stops the walk
+                                    from going below it, the node itself is still considered
+    :param mode: `str` one of TRAVERSE_AS_OBJECTS, TRAVERSE_AS_PATHS or TRAVERSE_AS_HANDLES
+    :param include_roots: `bool` whether the roots themselves can be part of the result
+    :return: `MObjectArray | MDagPathArray | list` depending on mode
+    """
+    if mode == TRAVERSE_AS_PATHS:
+        results = om2.MDagPathArray()
+    elif mode == TRAVERSE_AS_OBJECTS:
+        results = om2.MObjectArray()
+    elif mode == TRAVERSE_AS_HANDLES:
+        results = []
+    else:
+        raise ValueError("unknown traversal mode {}".format(mode))
+
+    # a pruning predicate or a depth limit needs to see every node,
+    #   filtering natively would hide the ones in between and nothing would be pruned
+    native_filter = fn_type if prune is None and max_depth < 0 else om2.MFn.kInvalid
+    needs_type_check = fn_type != om2.MFn.kInvalid and native_filter == om2.MFn.kInvalid
+
+    itr_dag = om2.MItDag(om2.MItDag.kDepthFirst, native_filter)
+    for each_root in root_mobs:
+        itr_dag.reset(each_root, om2.MItDag.kDepthFirst, native_filter)
+        if itr_dag.isDone():
+            continue
+        root_depth = om2.MDagPath.getAPathTo(each_root).length()
+
+        while not itr_dag.isDone():
+            curr_mob = itr_dag.currentItem()
+            curr_path = itr_dag.getPath()
+            depth = curr_path.length() - root_depth
+
+            keep = (depth > 0 or include_roots) and \
+                   (max_depth < 0 or depth <= max_depth) and \
+                   (not needs_type_check or curr_mob.hasFn(fn_type))
+            if keep:
+                if mode == TRAVERSE_AS_PATHS:
+                    results.append(curr_path)
+                elif mode == TRAVERSE_AS_OBJECTS:
+                    results.append(curr_mob)
+                else:
+                    results.append(om2.MObjectHandle(curr_mob))
+
+            if (max_depth >= 0 and depth >= max_depth) or (prune is not None and prune(curr_mob)):
+                itr_dag.prune()
+            itr_dag.next()
+
+    return results
+
+
+def component_outputs(component_mob, fn_type=om2.MFn.kInvalid, max_depth=-1, prune=None,
+                      mode=TRAVERSE_AS_OBJECTS):
+    """
+    Bulk, filtered version of iter_output(), see traverse_dag() for the arguments.
+    e.g. component_outputs(comp, om2.MFn.kJoint) for only the joints under outputs
+    """
+    if not is_component(component_mob):
+        return traverse_dag((), mode=mode)
+
+    output_mobs = []
+    fn = om2.MFnDagNode(component_mob)
+    for i in range(fn.childCount()):
+        child_mob = fn.child(i)
+        if om2.MFnDagNode(child_mob).name().endswith('_output'):
+            output_mobs.append(child_mob)
+
+    return traverse_dag(output_mobs, fn_type, max_depth, prune, mode)
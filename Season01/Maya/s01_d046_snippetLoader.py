@@ -1,37 +1,34 @@
 """
-A somewhat horrifying way to load, reload etc. our snippets for the day.
+A somewhat less horrifying way to load, reload etc. our snippets for the day.
 Also starts the debug server.
 Made to be loaded in the Maya shell to type inline tests while
    we get small functions rolling
+
+Run it again after editing anything in the Maya package, only the modules
+   that changed and the ones importing them are reloaded, in order, and timed.
 """
 
-try:
-    from Maya import s01_d046_rigItemIteration as snips
-    reload(snips)
-    print("reloading")
-except:
-    import ptvsd
-    ptvsd.enable_attach(address=('0.0.0.0', 3000), redirect_output=True)
+import sys
+
+k_path = "" # Your directory goes here
 
-    k_path = "" # Your directory goes here
+if k_path and k_path not in sys.path:
+    sys.path.append(k_path)
+    print("Appended new path to sys called {}".format(k_path))
 
-    from sys import path
+from Maya import hot_reload
 
-    found = False
-    for x in path:
-        if x == k_path:
-            found = True
-            break
-    
-    if not found:
-        path.append(k_path)
-        print("Appended new path to sys called {}".format(k_path))
+removed = hot_reload.dedupe_sys_path()
+if removed:
+    print("Removed {} duplicate entries from sys.path".format(removed))
+
+if 'ptvsd' not in sys.modules:
+    import ptvsd
+    ptvsd.enable_attach(address=('0.0.0.0', 3000), redirect_output=True)
 
-    from Maya import s01_d046_snippets as snips
-    reload(snips)
+snips = hot_reload.TRACKER.load('Maya.s01_d046_rigItemIteration')
+print(hot_reload.format_report(hot_reload.TRACKER.last_report))
 
-    print("first time loading {}".format(snips))
-    
 
 from maya.api import OpenMaya as om2
 
@@ -43,4 +40,3 @@ for i in range(sel.length()):
         for comp in snips.iter_components(mob):
             for m in snips.iter_component_members(comp):
                 print om2.MFnDependencyNode(m).name()
-    